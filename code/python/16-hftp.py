@@ -1,11 +1,24 @@
 # -*- coding: utf-8 -*-
-# pip install ifaddr colorama legacy-cgi
+# pip install ifaddr colorama
+# optional: pip install pillow brotli  (image thumbnails, brotli responses)
 
+from array import array
 import argparse
+import asyncio
 import atexit
 import base64
+import bisect
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import wait as futures_wait
 from contextlib import contextmanager
-from dataclasses import dataclass
+from dataclasses import dataclass, field
+import datetime
+import email.message
+import email.utils
+import errno
+import gzip
+import hashlib
 import http.server
 import html
 import io
@@ -14,25 +27,39 @@ import ipaddress
 import json
 import mimetypes
 import os
+import queue
 import re
+import secrets
 import shlex
 import shutil
 import signal
 import socket
 import socketserver
+import stat
 import subprocess
 import sys
+import tarfile
 import tempfile
 import threading
 import time
 import traceback
+import zlib
 import webbrowser
-from typing import BinaryIO, Dict, Iterator, List, Optional, Tuple
+import zipfile
+from typing import BinaryIO, Dict, Iterable, Iterator, List, Optional, Tuple
 from urllib.parse import parse_qs, quote, unquote, urlparse
 
-import cgi
 import ifaddr
 
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = ImageOps = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
 if sys.platform == "win32":
     from colorama import init as colorama_init
 
@@ -46,8 +73,59 @@ PORTAL_NAME = "HTTP-based FILE TRANSFER PORTAL"
 EXIT_EVENT = threading.Event()
 LOCAL_IPS = set()
 PASTEBIN_ENDPOINT = "/__pastebin"
+STATUS_ENDPOINT = "/__status"
+STATIC_ENDPOINT = "/__static"
+UPLOADS_ENDPOINT = "/__uploads"
+DEFAULT_BACKLOG = 128
+DEFAULT_KEEPALIVE_TIMEOUT = 15.0
+DEFAULT_DRAIN_TIMEOUT = 10.0
+DEFAULT_ASYNC_WORKERS = 8
+MAX_REQUEST_HEAD_BYTES = 64 * 1024
 MAX_PASTEBIN_BYTES = 1024 * 1024
 UPLOAD_CHUNK_SIZE = 1024 * 1024
+MAX_MULTIPART_HEADER_BYTES = 16 * 1024
+MAX_UPLOAD_PART_BYTES: Optional[int] = None
+UPLOAD_SESSION_TTL = 24 * 60 * 60.0
+DURABILITY_LEVELS = ("none", "per-file", "batched")
+GROUP_COMMIT_INTERVAL = 0.05
+GROUP_COMMIT_MAX_BYTES = 64 * 1024 * 1024
+GROUP_COMMIT_MAX_FILES = 256
+LISTING_CACHE_MAX_BYTES = 64 * 1024 * 1024
+LISTING_CACHE_TTL = 10.0
+LISTING_PAGE_SIZE = 500
+LISTING_MAX_LIMIT = 5000
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+SENDFILE_CHUNK_SIZE = 8 * 1024 * 1024
+MAX_RANGES = 16  # Range headers with more specs than this are ignored (200, whole file)
+COMPRESS_MIN_BYTES = 1024
+COMPRESSIBLE_TYPES = ("text/", "application/json")
+LINE_INDEX_BLOCK = 64 * 1024
+LINE_INDEX_CACHE_ENTRIES = 32
+PREVIEW_WINDOW_LINES = 500
+PREVIEW_MAX_WINDOW_LINES = 5000
+PREVIEW_MAX_WINDOW_BYTES = 2 * 1024 * 1024
+PREVIEW_MAX_LINE_BYTES = 64 * 1024
+THUMBNAIL_SIZES = (64, 320, 1280)
+THUMBNAIL_CACHE_MAX_BYTES = 256 * 1024 * 1024
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_TIMEOUT = 30.0
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_STORE_DIR = "hftp-thumbnails.v1"  # private subdirectory of --thumb-cache
+THUMBNAIL_STORE_MARKER = ".hftp-thumbnail-store"
+THUMBNAIL_KEY_RE = re.compile(r"^[0-9a-f]{40}\.(webp|jpeg)$")
+ARCHIVE_FORMATS = {
+    "zip": ("application/zip", ".zip"),
+    "tar": ("application/x-tar", ".tar"),
+    "tar.gz": ("application/gzip", ".tar.gz"),
+}
+DEFAULT_ARCHIVE_MAX_ENTRIES = 100_000
+DEFAULT_ARCHIVE_MAX_BYTES = 16 * 1024 * 1024 * 1024
+ARCHIVE_MAX_ENTRIES: Optional[int] = DEFAULT_ARCHIVE_MAX_ENTRIES
+ARCHIVE_MAX_BYTES: Optional[int] = DEFAULT_ARCHIVE_MAX_BYTES
+ARCHIVE_CHUNK_SIZE = 256 * 1024
+ARCHIVE_COMPRESS_LEVEL = 6
+ACCESS_LOG_QUEUE_SIZE = 8192
+ACCESS_LOG_BATCH_SIZE = 512
 
 FAVICON_ICO_BASE64 = "AAABAAIAEBAAAAEAIABoBAAAJgAAACAgAAABACAAqBAAAI4EAAAoAAAAEAAAACAAAAABACAAAAAAAAAEAAAAAAAAAAAAAAAAAAAAAAAA/////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////+7u7v/h4eH/4eHh/+Hh4f/h4eH/4eHh/+Hh4f/h4eH/4eHh/+Hh4f/h4eH/4eHh/+Hh4f/h4eH/6enp//39/f///////////87Ozv89PT3/HR0d/x4eHv8eHh7/Hh4e/x4eHv8eHh7/Hh4e/x4eHv8eHh7/HR0d/ysrK/+oqKj///////////+IiIj/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/UlJS//v7+///////gICA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/0pKSv/5+fn//////4CAgP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/SkpK//n5+f//////gICA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/0pKSv/5+fn//////4CAgP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP9KSkr/+fn5//////+AgID/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/0pKSv/5+fn//////4CAgP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP9MTEz/+vr6//////+Dg4P/AAAA/wAAAP8AAAD/AAAA/wEBAf8FBQX/BQUF/wUFBf8FBQX/BQUF/wUFBf8FBQX/BQUF/wUFBf8LCwv/iYmJ////////////t7e3/xkZGf8EBAT/BQUF/wcHB/9iYmL/tra2/7a2tv+2trb/tra2/7a2tv+2trb/xMTE//T09P////////////v7+//Pz8//tra2/7a2tv+7u7v/7+/v/////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////wAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAoAAAAIAAAAEAAAAABACAAAAAAAAAQAAAAAAAAAAAAAAAAAAAAAAAA///////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////7+/v/6urq/+Pj4//j4+P/4+Pj/+Pj4//j4+P/4+Pj/+Pj4//j4+P/4+Pj/+Pj4//j4+P/4+Pj/+Pj4//j4+P/4+Pj/+Pj4//j4+P/4+Pj/+Pj4//j4+P/4+Pj/+Pj4//j4+P/5OTk//Pz8//+/v7/////////////////////////////////5+fn/3t7e/8vLy//Gxsb/xwcHP8cHBz/HBwc/xwcHP8cHBz/HBwc/xwcHP8cHBz/HBwc/xwcHP8cHBz/HBwc/xwcHP8cHBz/HBwc/xwcHP8fHx//TU1N/7W1tf/9/f3///////////////////////39/f96enr/AQEB/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/JSUl/9TU1P//////////////////////6urq/zAwMP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/CAgL/lJSU///////////////////////j4+P/HBwc/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/4CAgP//////////////////////4+Pj/xwcHP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/gICA///////////////////////j4+P/HBwc/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/+AgID//////////////////////+Pj4/8cHBz/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/4CAgP//////////////////////4+Pj/xwcHP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/4ODg///////////////////////4+Pj/xwcHP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8MDAz/sbGx///////////////////////k5OT/Hx8f/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/CwsL/2FhYf/w8PD///////////////////////Pz8/9OTk7/AAAA/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/wAAAP8BAQH/RkZG/4GBgf+AgID/f39//39/f/9/f3//f39//39/f/9/f3//f39//39/f/9/f3//f39//4ODg/+xsbH/8PDw/////////////////////////////////7W1tf8kJCT/AwMD/wAAAP8AAAD/AAAA/wAAAP8AAAD/AAAA/09PT//k5OT//////////////////////////////////////////////////////////////////////////////////////////////////////////////////f39/9TU1P+Tk5P/f39//39/f/9/f3//f39//39/f/+JiYn/4+Pj/////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////////wAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAAA"
 FAVICON_ICO_BYTES = base64.b64decode(FAVICON_ICO_BASE64)
@@ -76,11 +154,13 @@ class NewFileTracker:
         with self._lock:
             self._registered.discard(os.path.realpath(filepath))
 
-    def is_new(self, filepath: str) -> bool:
+    def is_new(self, filepath: str, mtime: Optional[float] = None) -> bool:
         real = os.path.realpath(filepath)
         with self._lock:
             if real in self._registered:
                 return True
+        if mtime is not None:
+            return mtime >= self._start_time
         try:
             return os.path.getmtime(filepath) >= self._start_time
         except OSError:
@@ -90,6 +170,218 @@ class NewFileTracker:
 NEW_FILE_TRACKER = NewFileTracker()
 
 
+@dataclass(frozen=True)
+class ListingEntry:
+    """One directory entry as exposed by the JSON listing."""
+
+    name: str
+    is_dir: bool
+    size: int
+    mtime: float
+    is_new: bool
+    url: str
+    previewable: bool
+    thumb: Optional[str] = None
+
+    def to_json(self) -> dict:
+        return {
+            "name": self.name,
+            "is_dir": self.is_dir,
+            "size": self.size,
+            "mtime": self.mtime,
+            "is_new": self.is_new,
+            "url": self.url,
+            "previewable": self.previewable,
+            "thumb": self.thumb,
+        }
+
+
+def listing_digest(
+    dir_st: os.stat_result, entries: Iterable[Tuple[str, Optional[os.stat_result]]]
+) -> str:
+    """Digest of a directory and the (name, stat) of its entries, in listing order."""
+    digest = hashlib.sha1(f"{dir_st.st_ino}:{dir_st.st_mtime_ns}".encode("utf-8"))
+    for name, entry_st in entries:
+        if entry_st is not None:
+            digest.update(
+                f"\0{name}:{entry_st.st_size}:{entry_st.st_mtime_ns}".encode(
+                    "utf-8", "surrogateescape"
+                )
+            )
+    return digest.hexdigest()[:20]
+
+
+LISTING_SORT_KEYS = {
+    "name": lambda entry: entry.name.lower(),
+    "size": lambda entry: entry.size,
+    "mtime": lambda entry: entry.mtime,
+}
+
+
+@dataclass(frozen=True)
+class DirectoryListing:
+    """Entries and pre-rendered HTML rows of one directory scan.
+
+    entries and rows are aligned and stored directories first, then by name.
+    Pages of the JSON listing resume from an opaque cursor naming the last
+    entry sent (its sort key and name), so entries created or deleted between
+    pages are neither skipped nor repeated.
+    """
+
+    mtime_ns: int
+    built_at: float
+    digest: str
+    last_modified: float
+    entries: Tuple[ListingEntry, ...]
+    rows: Tuple[str, ...]
+    nbytes: int
+    _orders: Dict[Tuple[str, bool], List[int]] = field(
+        default_factory=dict, compare=False, repr=False
+    )
+    _orders_lock: threading.Lock = field(
+        default_factory=threading.Lock, compare=False, repr=False
+    )
+
+    @property
+    def count(self) -> int:
+        return len(self.entries)
+
+    def is_current(self, path: str) -> bool:
+        """Re-stat the directory and every entry; False if any size or mtime moved."""
+
+        def stat_or_none(name: str) -> Optional[os.stat_result]:
+            try:
+                return os.stat(os.path.join(path, name))
+            except OSError:
+                return None
+
+        try:
+            dir_st = os.stat(path)
+        except OSError:
+            return False
+        stats = ((entry.name, stat_or_none(entry.name)) for entry in self.entries)
+        return listing_digest(dir_st, stats) == self.digest
+
+    def order(self, sort: str = "name", descending: bool = False) -> List[int]:
+        """Return entry indices sorted directories first, then by sort key and name."""
+        with self._orders_lock:
+            cached = self._orders.get((sort, descending))
+            if cached is None:
+                key = LISTING_SORT_KEYS[sort]
+                cached = sorted(
+                    range(len(self.entries)),
+                    key=lambda i: (key(self.entries[i]), self.entries[i].name),
+                    reverse=descending,
+                )
+                cached.sort(key=lambda i: not self.entries[i].is_dir)
+                self._orders[(sort, descending)] = cached
+            return cached
+
+    def cursor_after(self, index: int, sort: str, descending: bool) -> str:
+        """Opaque cursor that resumes a listing right after entry index."""
+        entry = self.entries[index]
+        position = [sort, descending, entry.is_dir, LISTING_SORT_KEYS[sort](entry), entry.name]
+        return base64.urlsafe_b64encode(json.dumps(position).encode("ascii")).decode("ascii")
+
+    @staticmethod
+    def resume(
+        entries: Tuple[ListingEntry, ...],
+        indices: List[int],
+        cursor: str,
+        sort: str,
+        descending: bool,
+    ) -> int:
+        """Position in indices of the first entry after cursor; ValueError if it is invalid."""
+        try:
+            position = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+            cursor_sort, cursor_desc, is_dir, value, name = position
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor") from None
+        if (cursor_sort, cursor_desc) != (sort, descending):
+            raise ValueError("Cursor belongs to another sort order")
+        key = LISTING_SORT_KEYS[sort]
+        after = (not is_dir, value, name)
+
+        def is_after(entry: ListingEntry) -> bool:
+            rank = (not entry.is_dir, key(entry), entry.name)
+            if rank[0] != after[0]:
+                return rank[0] > after[0]
+            return rank[1:] < after[1:] if descending else rank[1:] > after[1:]
+
+        low, high = 0, len(indices)
+        while low < high:
+            middle = (low + high) // 2
+            try:
+                found = is_after(entries[indices[middle]])
+            except TypeError:
+                # A sort value of the wrong type cannot be compared with ours.
+                raise ValueError("Invalid cursor") from None
+            if found:
+                high = middle
+            else:
+                low = middle + 1
+        return low
+
+
+class ListingCache:
+    """LRU of rendered directory rows, keyed on path and the directory's st_mtime_ns.
+
+    Entries are bounded by total rendered size. Entries older than LISTING_CACHE_TTL
+    are rebuilt, so in-place edits that do not touch the directory mtime still show up.
+    """
+
+    def __init__(self, max_bytes: int = LISTING_CACHE_MAX_BYTES) -> None:
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, DirectoryListing]" = OrderedDict()
+        self._size = 0
+        self.max_bytes = max_bytes
+
+    def get(self, path: str, mtime_ns: int) -> Optional[DirectoryListing]:
+        with self._lock:
+            listing = self._entries.get(path)
+            if listing is None:
+                return None
+            if (
+                listing.mtime_ns != mtime_ns
+                or time.monotonic() - listing.built_at > LISTING_CACHE_TTL
+            ):
+                self._discard(path)
+                return None
+            self._entries.move_to_end(path)
+            return listing
+
+    def put(self, path: str, listing: DirectoryListing) -> None:
+        if listing.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            self._discard(path)
+            self._entries[path] = listing
+            self._size += listing.nbytes
+            while self._size > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._discard(oldest)
+
+    def invalidate(self, filepath: str) -> None:
+        """Drop listings of the directory containing filepath and of anything below it."""
+        targets = {os.path.abspath(filepath), os.path.realpath(filepath)}
+        parents = {os.path.dirname(target) for target in targets}
+        with self._lock:
+            for key in list(self._entries):
+                if key in parents or any(
+                    key == target or key.startswith(target + os.sep)
+                    for target in targets
+                ):
+                    self._discard(key)
+
+    def _discard(self, path: str) -> None:
+        listing = self._entries.pop(path, None)
+        if listing is not None:
+            self._size -= listing.nbytes
+
+
+LISTING_CACHE = ListingCache()
+
+
 @dataclass(frozen=True)
 class UploadResult:
     """Describe a completed atomic upload."""
@@ -98,12 +390,171 @@ class UploadResult:
     size: int
 
 
+def fsync_directory(directory: str) -> None:
+    """Persist directory entries (renames) where the platform allows it."""
+    try:
+        descriptor = os.open(directory, os.O_RDONLY)
+    except OSError:
+        # Directories cannot be opened on Windows; rename is durable there.
+        return
+    try:
+        os.fsync(descriptor)
+    finally:
+        os.close(descriptor)
+
+
+class GroupCommitter:
+    """Background fsync and replace of finished uploads, one batch at a time.
+
+    A batch is committed once GROUP_COMMIT_INTERVAL has passed since its first
+    file, as soon as it reaches the byte or file threshold, or right away when
+    a caller is waiting on it; files queued meanwhile form the next batch.
+    Every temp file is fsynced through a duplicated descriptor, then moved over
+    its target, then every parent directory is fsynced once, so a crash never
+    leaves a target replaced by data that is not on disk. Each submission gets
+    a Future that fails with the OSError if its file could not be committed.
+    """
+
+    def __init__(
+        self,
+        interval: float = GROUP_COMMIT_INTERVAL,
+        max_bytes: int = GROUP_COMMIT_MAX_BYTES,
+        max_files: int = GROUP_COMMIT_MAX_FILES,
+    ) -> None:
+        self.interval = interval
+        self.max_bytes = max_bytes
+        self.max_files = max_files
+        self.batches = 0
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[int, str, str, Future]] = []
+        self._pending_bytes = 0
+        self._urgent = False
+        self._committing: List[Future] = []
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(
+        self,
+        descriptor: int,
+        temp_path: str,
+        destination: str,
+        size: int,
+        urgent: bool = False,
+    ) -> Future:
+        """Queue a finished temp file; the Future resolves once it replaced its target durably."""
+        committed: Future = Future()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._pending.append((descriptor, temp_path, destination, committed))
+            self._pending_bytes += size
+            self._urgent = self._urgent or urgent
+            self._cond.notify()
+        return committed
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Commit whatever is pending now and wait for it; False on timeout or failure."""
+        with self._cond:
+            waiting = self._committing + [entry[3] for entry in self._pending]
+            if self._pending:
+                self._urgent = True
+                self._cond.notify()
+        done, not_done = futures_wait(waiting, timeout)
+        return not not_done and all(f.exception() is None for f in done)
+
+    def _full(self) -> bool:
+        return (
+            self._urgent
+            or len(self._pending) >= self.max_files
+            or self._pending_bytes >= self.max_bytes
+        )
+
+    def _run(self) -> None:
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._pending)
+                self._cond.wait_for(self._full, timeout=self.interval)
+                pending, self._pending = self._pending, []
+                self._pending_bytes = 0
+                self._urgent = False
+                self._committing = [entry[3] for entry in pending]
+            try:
+                self._commit(pending)
+            except Exception as e:
+                for _, _, _, committed in pending:
+                    if not committed.done():
+                        committed.set_exception(e)
+            finally:
+                self.batches += 1
+                with self._cond:
+                    self._committing = []
+
+    @staticmethod
+    def _commit(pending: List[Tuple[int, str, str, Future]]) -> None:
+        synced = []
+        for descriptor, temp_path, destination, committed in pending:
+            try:
+                os.fsync(descriptor)
+            except OSError as e:
+                # Leave the previous target in place rather than data that may be lost.
+                GroupCommitter._fail([committed], destination, e)
+                try:
+                    os.remove(temp_path)
+                except OSError:
+                    pass
+            else:
+                synced.append((temp_path, destination, committed))
+            finally:
+                os.close(descriptor)
+
+        replaced: Dict[str, List[Future]] = {}
+        for temp_path, destination, committed in synced:
+            try:
+                os.replace(temp_path, destination)
+            except OSError as e:
+                GroupCommitter._fail([committed], destination, e)
+                continue
+            LISTING_CACHE.invalidate(destination)
+            replaced.setdefault(os.path.dirname(destination), []).append(committed)
+
+        for directory, waiters in replaced.items():
+            try:
+                fsync_directory(directory)
+            except OSError as e:
+                GroupCommitter._fail(waiters, directory, e)
+                continue
+            for committed in waiters:
+                committed.set_result(None)
+
+    @staticmethod
+    def _fail(waiters: List[Future], path: str, error: OSError) -> None:
+        # Uploads that did not ask to wait were already acknowledged; say so loudly.
+        print(
+            CLIStyle.color(
+                f"Upload commit failed for {path}: {error}", CLIStyle.COLORS["ERROR"]
+            ),
+            file=sys.stderr,
+        )
+        for committed in waiters:
+            committed.set_exception(error)
+
+
 class UploadCoordinator:
-    """Serialize writes per target and replace completed uploads atomically."""
+    """Serialize writes per target and replace completed uploads atomically.
+
+    durability selects how completed uploads reach the disk: "none" leaves
+    it to the OS, "per-file" fsyncs each file before its replace, and
+    "batched" hands the temp file to a GroupCommitter, which fsyncs a batch
+    of files, replaces their targets and then fsyncs the directories. A
+    batched upload appears once its batch commits; callers may wait for that
+    and see the commit error if it fails.
+    """
 
-    def __init__(self) -> None:
+    def __init__(self, durability: str = "per-file") -> None:
         self._registry_lock = threading.Lock()
         self._locks: Dict[str, Tuple[threading.Lock, int]] = {}
+        self.durability = durability
+        self.committer = GroupCommitter()
 
     @contextmanager
     def _lock_target(self, filepath: str) -> Iterator[None]:
@@ -125,13 +576,18 @@ class UploadCoordinator:
                     self._locks[target] = (lock, users - 1)
 
     def write_stream(
-        self, filepath: str, source: BinaryIO, expected_size: Optional[int] = None
+        self,
+        filepath: str,
+        source: BinaryIO,
+        expected_size: Optional[int] = None,
+        wait_durable: bool = False,
     ) -> UploadResult:
         """Write a stream to a sibling temporary file and atomically replace its target."""
         destination = os.path.realpath(filepath)
         directory = os.path.dirname(destination)
         os.makedirs(directory, exist_ok=True)
 
+        committed = None
         with self._lock_target(destination):
             existed = os.path.exists(destination)
             descriptor, temp_path = tempfile.mkstemp(
@@ -143,16 +599,72 @@ class UploadCoordinator:
                 with os.fdopen(descriptor, "wb") as target:
                     size = self._copy_stream(source, target, expected_size)
                     target.flush()
-                    os.fsync(target.fileno())
-                os.replace(temp_path, destination)
-                return UploadResult(existed=existed, size=size)
+                    committed = self._sync(
+                        target.fileno(), temp_path, destination, size, wait_durable
+                    )
+                if committed is None:
+                    os.replace(temp_path, destination)
+                    LISTING_CACHE.invalidate(destination)
             finally:
-                if os.path.exists(temp_path):
+                # A batched temp file belongs to the committer from here on.
+                if committed is None and os.path.exists(temp_path):
                     os.remove(temp_path)
+        if committed is not None and wait_durable:
+            committed.result()
+        return UploadResult(existed=existed, size=size)
+
+    def commit_file(
+        self, temp_path: str, filepath: str, wait_durable: bool = False
+    ) -> UploadResult:
+        """Flush a completed sibling temporary file and atomically replace its target."""
+        destination = os.path.realpath(filepath)
+        committed = None
+        with self._lock_target(destination):
+            existed = os.path.exists(destination)
+            size = os.path.getsize(temp_path)
+            with open(temp_path, "rb+") as target:
+                committed = self._sync(
+                    target.fileno(), temp_path, destination, size, wait_durable
+                )
+            if committed is None:
+                os.replace(temp_path, destination)
+                LISTING_CACHE.invalidate(destination)
+        if committed is not None and wait_durable:
+            committed.result()
+        return UploadResult(existed=existed, size=size)
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait for batched uploads that have not been committed yet."""
+        return self.committer.flush(timeout)
+
+    def _sync(
+        self,
+        descriptor: int,
+        temp_path: str,
+        destination: str,
+        size: int,
+        wait_durable: bool,
+    ) -> Optional[Future]:
+        """Apply the durability level to a finished temporary file.
+
+        Returns the committer's Future when the committer now owns the temp file
+        and its replace; None when the caller replaces it right away.
+        """
+        if self.durability == "per-file":
+            os.fsync(descriptor)
+        elif self.durability == "batched":
+            return self.committer.submit(
+                os.dup(descriptor), temp_path, destination, size, urgent=wait_durable
+            )
+        return None
 
-    def write_bytes(self, filepath: str, content: bytes) -> UploadResult:
+    def write_bytes(
+        self, filepath: str, content: bytes, wait_durable: bool = False
+    ) -> UploadResult:
         """Atomically write in-memory upload content."""
-        return self.write_stream(filepath, io.BytesIO(content), len(content))
+        return self.write_stream(
+            filepath, io.BytesIO(content), len(content), wait_durable
+        )
 
     @staticmethod
     def _copy_stream(
@@ -178,6 +690,303 @@ class UploadCoordinator:
 UPLOAD_COORDINATOR = UploadCoordinator()
 
 
+@dataclass
+class UploadSession:
+    """State of one resumable upload: its target and how much has been received."""
+
+    id: str
+    destination: str
+    temp_path: str
+    length: Optional[int]
+    offset: int = 0
+    updated: float = field(default_factory=time.time)
+    lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+
+class ResumableUploads:
+    """Track resumable upload sessions and their sibling part files.
+
+    Chunks are written in place at the session offset, so a dropped request
+    keeps everything received before it. Sessions idle for longer than the
+    TTL are expired, part file included, whenever the registry is used.
+    """
+
+    def __init__(self, ttl: float = UPLOAD_SESSION_TTL) -> None:
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._sessions: Dict[str, UploadSession] = {}
+
+    def create(self, filepath: str, length: Optional[int]) -> UploadSession:
+        destination = os.path.realpath(filepath)
+        directory = os.path.dirname(destination)
+        os.makedirs(directory, exist_ok=True)
+        descriptor, temp_path = tempfile.mkstemp(
+            prefix=f".{os.path.basename(destination)}.",
+            suffix=".upload",
+            dir=directory,
+        )
+        os.close(descriptor)
+        session = UploadSession(
+            id=secrets.token_urlsafe(16),
+            destination=destination,
+            temp_path=temp_path,
+            length=length,
+        )
+        self.expire()
+        with self._lock:
+            self._sessions[session.id] = session
+        return session
+
+    def get(self, session_id: str) -> Optional[UploadSession]:
+        self.expire()
+        with self._lock:
+            return self._sessions.get(session_id)
+
+    def is_live(self, session: UploadSession) -> bool:
+        """True while session is registered; checked once its lock is held."""
+        with self._lock:
+            return self._sessions.get(session.id) is session
+
+    def write(self, session: UploadSession, source: BinaryIO, count: int) -> int:
+        """Append up to count bytes at the session offset; stops early if the body does."""
+        received = 0
+        with open(session.temp_path, "r+b") as target:
+            target.seek(session.offset)
+            try:
+                while received < count:
+                    try:
+                        chunk = source.read(min(UPLOAD_CHUNK_SIZE, count - received))
+                    except OSError:
+                        break
+                    if not chunk:
+                        break
+                    target.write(chunk)
+                    received += len(chunk)
+                    session.offset += len(chunk)
+                    session.updated = time.time()
+            finally:
+                target.truncate(session.offset)
+        return received
+
+    def finalize(
+        self, session: UploadSession, wait_durable: bool = False
+    ) -> UploadResult:
+        """Move a finished part file over its target under the per-target lock."""
+        with self._lock:
+            self._sessions.pop(session.id, None)
+        try:
+            return UPLOAD_COORDINATOR.commit_file(
+                session.temp_path, session.destination, wait_durable
+            )
+        except BaseException:
+            # On success the part file was replaced or handed to the committer.
+            self._remove_part(session)
+            raise
+
+    def discard(self, session: UploadSession) -> None:
+        with self._lock:
+            self._sessions.pop(session.id, None)
+        self._remove_part(session)
+
+    def expire(self) -> None:
+        deadline = time.time() - self.ttl
+        with self._lock:
+            expired = [
+                session
+                for session in self._sessions.values()
+                if session.updated < deadline and not session.lock.locked()
+            ]
+            for session in expired:
+                del self._sessions[session.id]
+        for session in expired:
+            debug("Upload session expired", path=session.destination)
+            self._remove_part(session)
+
+    @staticmethod
+    def _remove_part(session: UploadSession) -> None:
+        try:
+            os.remove(session.temp_path)
+        except FileNotFoundError:
+            pass
+
+
+RESUMABLE_UPLOADS = ResumableUploads()
+
+
+class MultipartError(ValueError):
+    """Malformed or oversized multipart/form-data body."""
+
+    def __init__(self, message: str, status: int = 400) -> None:
+        super().__init__(message)
+        self.status = status
+
+
+class MultipartPart:
+    """Readable body of one multipart part; returns b"" once its boundary is reached."""
+
+    def __init__(
+        self,
+        reader: "MultipartReader",
+        headers: email.message.Message,
+        max_bytes: Optional[int],
+    ) -> None:
+        self.headers = headers
+        self.name = headers.get_param("name", header="content-disposition")
+        self.filename = headers.get_filename()
+        self.size = 0
+        self._reader = reader
+        self._max_bytes = max_bytes
+        self._done = False
+
+    def read(self, size: int = -1) -> bytes:
+        if self._done:
+            return b""
+        if size is None or size < 0:
+            size = UPLOAD_CHUNK_SIZE
+        data = self._reader._read_body(size)
+        if not data:
+            self._done = True
+            return b""
+        self.size += len(data)
+        if self._max_bytes is not None and self.size > self._max_bytes:
+            raise MultipartError("Upload exceeds the per-file size limit", 413)
+        return data
+
+    def drain(self) -> None:
+        while self.read(UPLOAD_CHUNK_SIZE):
+            pass
+
+
+class MultipartReader:
+    """Incremental multipart/form-data parser over a request body stream.
+
+    Parts are yielded in order and must be consumed before the next one is
+    requested (unread data is skipped). Memory stays bounded by about one
+    UPLOAD_CHUNK_SIZE plus the delimiter length, whatever the body size.
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        boundary: bytes,
+        content_length: Optional[int],
+        max_part_bytes: Optional[int] = None,
+    ) -> None:
+        self._stream = stream
+        self._remaining = content_length
+        self._delimiter = b"\r\n--" + boundary
+        # The first delimiter is not preceded by CRLF; pretend it is.
+        self._buffer = bytearray(b"\r\n")
+        self._max_part_bytes = max_part_bytes
+        self._current: Optional[MultipartPart] = None
+        self._finished = False
+        self._skip_preamble()
+
+    def __iter__(self) -> Iterator[MultipartPart]:
+        return self
+
+    def __next__(self) -> MultipartPart:
+        if self._current is not None:
+            self._current.drain()
+            self._current = None
+        if self._finished:
+            raise StopIteration
+        self._current = MultipartPart(
+            self, self._read_part_headers(), self._max_part_bytes
+        )
+        return self._current
+
+    def _fill(self) -> bool:
+        """Append the next piece of the body to the buffer; False at end of body."""
+        if self._remaining == 0:
+            return False
+        size = UPLOAD_CHUNK_SIZE
+        if self._remaining is not None:
+            size = min(size, self._remaining)
+        read = getattr(self._stream, "read1", self._stream.read)
+        chunk = read(size)
+        if not chunk:
+            if self._remaining is not None:
+                raise MultipartError("Incomplete multipart body")
+            return False
+        if self._remaining is not None:
+            self._remaining -= len(chunk)
+        self._buffer += chunk
+        return True
+
+    def _skip_preamble(self) -> None:
+        keep = len(self._delimiter) - 1
+        while True:
+            index = self._buffer.find(self._delimiter)
+            if index >= 0:
+                del self._buffer[: index + len(self._delimiter)]
+                self._after_delimiter()
+                return
+            if len(self._buffer) > keep:
+                del self._buffer[:-keep]
+            if not self._fill():
+                raise MultipartError("Multipart boundary not found")
+
+    def _after_delimiter(self) -> None:
+        """Consume what follows a delimiter: "--" closes the body, CRLF opens a part."""
+        while len(self._buffer) < 2:
+            if not self._fill():
+                raise MultipartError("Truncated multipart body")
+        if self._buffer[:2] == b"--":
+            self._finished = True
+            return
+        while True:
+            index = self._buffer.find(b"\r\n")
+            if index >= 0:
+                if self._buffer[:index].strip(b" \t"):
+                    raise MultipartError("Invalid multipart delimiter")
+                del self._buffer[: index + 2]
+                return
+            if len(self._buffer) > MAX_MULTIPART_HEADER_BYTES or not self._fill():
+                raise MultipartError("Invalid multipart delimiter")
+
+    def _read_part_headers(self) -> email.message.Message:
+        while True:
+            if self._buffer.startswith(b"\r\n"):
+                raw = b""
+                del self._buffer[:2]
+                break
+            index = self._buffer.find(b"\r\n\r\n")
+            if index >= 0:
+                raw = bytes(self._buffer[:index])
+                del self._buffer[: index + 4]
+                break
+            if len(self._buffer) > MAX_MULTIPART_HEADER_BYTES:
+                raise MultipartError("Multipart part headers too large")
+            if not self._fill():
+                raise MultipartError("Truncated multipart headers")
+
+        headers = email.message.Message()
+        for line in raw.decode("utf-8", "replace").split("\r\n"):
+            name, sep, value = line.partition(":")
+            if sep:
+                headers[name.strip()] = value.strip()
+        return headers
+
+    def _read_body(self, size: int) -> bytes:
+        """Return up to size bytes of the current part, or b"" at its closing delimiter."""
+        keep = len(self._delimiter) - 1
+        while True:
+            index = self._buffer.find(self._delimiter)
+            if index == 0:
+                del self._buffer[: len(self._delimiter)]
+                self._after_delimiter()
+                return b""
+            available = index if index > 0 else len(self._buffer) - keep
+            if available > 0:
+                count = min(available, size)
+                data = bytes(self._buffer[:count])
+                del self._buffer[:count]
+                return data
+            if not self._fill():
+                raise MultipartError("Truncated multipart body")
+
+
 TEXT_EXTENSIONS = {
     ".txt",
     ".md",
@@ -267,6 +1076,18 @@ IMAGE_EXTENSIONS = {
     ".avif",
 }
 
+THUMBNAIL_EXTENSIONS = {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".bmp",
+    ".webp",
+    ".tiff",
+    ".tif",
+    ".avif",
+}
+
 VIDEO_EXTENSIONS = {
     ".mp4",
     ".webm",
@@ -289,6 +1110,40 @@ VIDEO_MIME_TYPES = {
     ".3g2": "video/3gpp2",
 }
 
+# Already-compressed formats are stored as-is in zip archives; deflating them
+# again costs CPU and saves next to nothing.
+ARCHIVE_STORED_EXTENSIONS = VIDEO_EXTENSIONS | {
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".webp",
+    ".avif",
+    ".heic",
+    ".mkv",
+    ".avi",
+    ".mp3",
+    ".m4a",
+    ".aac",
+    ".opus",
+    ".flac",
+    ".zip",
+    ".gz",
+    ".tgz",
+    ".bz2",
+    ".xz",
+    ".zst",
+    ".7z",
+    ".rar",
+    ".jar",
+    ".apk",
+    ".whl",
+    ".docx",
+    ".xlsx",
+    ".pptx",
+    ".epub",
+}
+
 
 class TemporaryPastebin:
     """Store one shared temporary text snippet for the running server process."""
@@ -348,6 +1203,12 @@ def is_image_file(filepath: str) -> bool:
     return ext in IMAGE_EXTENSIONS
 
 
+def has_thumbnail(filepath: str) -> bool:
+    """Check if a downscaled variant of the file can be generated"""
+    ext = os.path.splitext(filepath)[1].lower()
+    return THUMBNAILS.available and ext in THUMBNAIL_EXTENSIONS
+
+
 def is_video_file(filepath: str) -> bool:
     """Check if a file is a browser-playable video."""
     ext = os.path.splitext(filepath)[1].lower()
@@ -396,47 +1257,538 @@ def get_syntax_language(filepath: str) -> str:
     return lang_map.get(ext, "plaintext")
 
 
-class CLIStyle:
-    """CLI tool unified style config"""
+class ThumbnailCache:
+    """On-disk cache of downscaled images with LRU eviction by total bytes.
 
-    COLORS = {
-        "TITLE": 7,
-        "SUB_TITLE": 2,
-        "CONTENT": 3,
-        "EXAMPLE": 7,
-        "WARNING": 4,
-        "ERROR": 2,
-        "SUCCESS": 3,
-    }
+    Entries are keyed on source path, mtime, size, edge length and format.
+    Generation runs on a small thread pool and concurrent requests for the
+    same variant share one job. Requires Pillow; without it available is
+    False and callers serve the original.
 
-    @staticmethod
-    def color(text: str = "", color: int = None) -> str:
-        """Unified color processing function"""
-        if color is None:
-            color = CLIStyle.COLORS["CONTENT"]
-        color_table = {
-            0: "{}",
-            1: "\033[1;30m{}\033[0m",
-            2: "\033[1;31m{}\033[0m",
-            3: "\033[1;32m{}\033[0m",
-            4: "\033[1;33m{}\033[0m",
-            5: "\033[1;34m{}\033[0m",
-            6: "\033[1;35m{}\033[0m",
-            7: "\033[1;36m{}\033[0m",
-            8: "\033[1;37m{}\033[0m",
-        }
-        return color_table[color].format(text)
+    Files live in a THUMBNAIL_STORE_DIR subdirectory (mode 0700, tagged with
+    THUMBNAIL_STORE_MARKER) so eviction never touches anything hftp did not
+    write; a store that is not ours disables thumbnails instead.
+    """
 
+    def __init__(
+        self,
+        directory: Optional[str] = None,
+        max_bytes: int = THUMBNAIL_CACHE_MAX_BYTES,
+        workers: int = THUMBNAIL_WORKERS,
+    ) -> None:
+        self.directory = directory or os.path.join(
+            tempfile.gettempdir(), "hftp-thumbnails"
+        )
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.enabled = True
+        self.total_bytes = 0
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, int]" = OrderedDict()
+        self._jobs: Dict[str, Future] = {}
+        self._failed: set = set()
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self.store = ""
+
+    @property
+    def available(self) -> bool:
+        return self.enabled and Image is not None
+
+    @property
+    def webp(self) -> bool:
+        if Image is None:
+            return False
+        Image.init()
+        return "WEBP" in Image.SAVE
 
-def debug(*args, file: Optional[str] = None, append: bool = True, **kwargs) -> None:
-    """Print debug information with source file and line number."""
-    if not DEBUG_MODE:
-        return
+    def get(self, filepath: str, st: os.stat_result, edge: int, fmt: str) -> Optional[bytes]:
+        """Return the encoded thumbnail, generating it if needed; None on failure."""
+        key = self._key(filepath, st, edge, fmt)
+        with self._lock:
+            self._start_locked()
+            if not self.enabled:
+                return None
+            path = os.path.join(self.store, key)
+            if key in self._failed:
+                return None
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                job = None
+            else:
+                job = self._jobs.get(key)
+                if job is None:
+                    job = self._executor.submit(
+                        self._generate, key, filepath, path, edge, fmt
+                    )
+                    self._jobs[key] = job
+        if job is None:
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                os.utime(path)
+                return data
+            except OSError:
+                with self._lock:
+                    self._forget_locked(key)
+                return self.get(filepath, st, edge, fmt)
+        try:
+            return job.result(timeout=THUMBNAIL_TIMEOUT)
+        except Exception as e:
+            debug("Thumbnail failed", path=filepath, error=str(e))
+            return None
 
-    frame = inspect.currentframe().f_back
-    info = inspect.getframeinfo(frame)
+    @staticmethod
+    def _key(filepath: str, st: os.stat_result, edge: int, fmt: str) -> str:
+        source = f"{os.path.realpath(filepath)}\0{st.st_mtime_ns}\0{st.st_size}\0{edge}"
+        return hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest() + "." + fmt
 
-    file_name = os.path.basename(info.filename)
+    def _start_locked(self) -> None:
+        """Create the pool and adopt thumbnails left by earlier runs, oldest first."""
+        if self._executor is not None:
+            return
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="hftp-thumb"
+        )
+        self.store = os.path.join(self.directory, THUMBNAIL_STORE_DIR)
+        try:
+            self._open_store()
+        except OSError as e:
+            print(
+                CLIStyle.color(
+                    f"Warning: thumbnails disabled, cannot use {self.store}: {e}",
+                    CLIStyle.COLORS["WARNING"],
+                ),
+                file=sys.stderr,
+            )
+            self.enabled = False
+            return
+        found = []
+        with os.scandir(self.store) as it:
+            for entry in it:
+                if THUMBNAIL_KEY_RE.match(entry.name) and entry.is_file(
+                    follow_symlinks=False
+                ):
+                    st = entry.stat(follow_symlinks=False)
+                    found.append((st.st_mtime, entry.name, st.st_size))
+        for _, name, size in sorted(found):
+            self._entries[name] = size
+            self.total_bytes += size
+        self._evict_locked()
+
+    def _open_store(self) -> None:
+        """Create the private store, or check that an existing one is ours."""
+        os.makedirs(self.directory, exist_ok=True)
+        marker = os.path.join(self.store, THUMBNAIL_STORE_MARKER)
+        try:
+            os.mkdir(self.store, 0o700)
+        except FileExistsError:
+            st = os.lstat(self.store)
+            if not stat.S_ISDIR(st.st_mode):
+                raise NotADirectoryError(errno.ENOTDIR, "not a directory")
+            if hasattr(os, "getuid") and st.st_uid != os.getuid():
+                raise PermissionError(errno.EPERM, "owned by another user")
+            if os.path.isfile(marker):
+                return
+            if os.listdir(self.store):
+                raise FileExistsError(errno.EEXIST, "not an hftp thumbnail store")
+        with open(marker, "w"):
+            pass
+
+    def _generate(self, key: str, filepath: str, path: str, edge: int, fmt: str) -> bytes:
+        try:
+            data = self._render(filepath, edge, fmt)
+            temp_path = f"{path}.{threading.get_ident()}.tmp"
+            with open(temp_path, "wb") as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            with self._lock:
+                if len(self._failed) >= 4096:
+                    self._failed.clear()
+                self._failed.add(key)
+                self._jobs.pop(key, None)
+            raise
+        with self._lock:
+            self._jobs.pop(key, None)
+            self._forget_locked(key)
+            self._entries[key] = len(data)
+            self.total_bytes += len(data)
+            self._evict_locked()
+        return data
+
+    @staticmethod
+    def _render(filepath: str, edge: int, fmt: str) -> bytes:
+        with Image.open(filepath) as source:
+            # JPEG decoders can downscale while decoding, far cheaper than resizing.
+            source.draft("RGB", (edge, edge))
+            image = ImageOps.exif_transpose(source)
+            image.thumbnail((edge, edge))
+        has_alpha = image.mode in ("RGBA", "LA", "PA") or "transparency" in image.info
+        if fmt == "jpeg":
+            if has_alpha:
+                image = image.convert("RGBA")
+                background = Image.new("RGB", image.size, "white")
+                background.paste(image, mask=image.getchannel("A"))
+                image = background
+            elif image.mode != "RGB":
+                image = image.convert("RGB")
+        elif image.mode not in ("RGB", "RGBA"):
+            image = image.convert("RGBA" if has_alpha else "RGB")
+        buffer = io.BytesIO()
+        image.save(buffer, fmt.upper(), quality=THUMBNAIL_QUALITY)
+        return buffer.getvalue()
+
+    def _forget_locked(self, key: str) -> None:
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self.total_bytes -= size
+
+    def _evict_locked(self) -> None:
+        while self.total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self.total_bytes -= size
+            try:
+                os.remove(os.path.join(self.store, key))
+            except OSError:
+                pass
+
+
+THUMBNAILS = ThumbnailCache()
+
+
+class LineIndex:
+    """Sparse newline index: the newline count at every LINE_INDEX_BLOCK boundary.
+
+    Locating line N is a bisect, one seek and a scan of at most one block;
+    the index costs 8 bytes per block however many lines the file has.
+    Data appended since the last scan is indexed incrementally.
+    """
+
+    def __init__(self, st: os.stat_result) -> None:
+        self.ino = st.st_ino
+        self.size = 0
+        self.mtime_ns = 0
+        self.newlines = 0
+        self.ends_with_newline = True
+        self.lock = threading.Lock()
+        self._counts = array("Q", [0])
+
+    @property
+    def lines(self) -> int:
+        return self.newlines + (0 if self.ends_with_newline else 1)
+
+    @property
+    def nbytes(self) -> int:
+        return self._counts.itemsize * len(self._counts)
+
+    def extend(self, f: BinaryIO, st: os.stat_result) -> None:
+        """Count newlines from the indexed size up to st.st_size."""
+        position = self.size
+        f.seek(position)
+        while position < st.st_size:
+            end = min(st.st_size, (position // LINE_INDEX_BLOCK + 16) * LINE_INDEX_BLOCK)
+            chunk = f.read(end - position)
+            if not chunk:
+                break
+            offset = 0
+            while offset < len(chunk):
+                step = min(
+                    len(chunk) - offset, LINE_INDEX_BLOCK - position % LINE_INDEX_BLOCK
+                )
+                self.newlines += chunk.count(b"\n", offset, offset + step)
+                offset += step
+                position += step
+                if position % LINE_INDEX_BLOCK == 0:
+                    self._counts.append(self.newlines)
+            self.ends_with_newline = chunk.endswith(b"\n")
+        self.size = position
+        self.mtime_ns = st.st_mtime_ns
+
+    def line_offset(self, f: BinaryIO, line: int) -> int:
+        """Byte offset where a 0-based line starts; the indexed size past the end."""
+        if line <= 0:
+            return 0
+        if line > self.newlines:
+            return self.size
+        block = bisect.bisect_left(self._counts, line) - 1
+        position = block * LINE_INDEX_BLOCK
+        needed = line - self._counts[block]
+        f.seek(position)
+        while True:
+            chunk = f.read(LINE_INDEX_BLOCK)
+            if not chunk:
+                return self.size
+            found = chunk.count(b"\n")
+            if found >= needed:
+                index = -1
+                for _ in range(needed):
+                    index = chunk.index(b"\n", index + 1)
+                return position + index + 1
+            needed -= found
+            position += len(chunk)
+
+    def read_lines(
+        self, f: BinaryIO, start: int, count: int, max_bytes: int
+    ) -> Tuple[List[str], bool]:
+        """Decode up to count lines from start; returns (lines, last_line_unterminated)."""
+        end = min(self.lines, start + count)
+        lines: List[str] = []
+        used = 0
+        partial = False
+        f.seek(self.line_offset(f, start))
+        for line in range(start, end):
+            raw = f.readline(PREVIEW_MAX_LINE_BYTES + 1)
+            used += len(raw)
+            if len(raw) > PREVIEW_MAX_LINE_BYTES and not raw.endswith(b"\n"):
+                line_start = f.tell() - len(raw)
+                next_start = self.line_offset(f, line + 1)
+                raw = raw[:PREVIEW_MAX_LINE_BYTES]
+                text = raw.decode("utf-8", "replace")
+                lines.append(
+                    f"{text} … [line truncated, {format_size(next_start - line_start)}]"
+                )
+                f.seek(next_start)
+                partial = False
+            else:
+                partial = not raw.endswith(b"\n")
+                lines.append(raw.rstrip(b"\r\n").decode("utf-8", "replace"))
+            if used >= max_bytes:
+                break
+        return lines, partial
+
+
+class LineIndexCache:
+    """LRU of LineIndex objects keyed by path and revalidated by inode, mtime and size.
+
+    A file that only grew keeps its index and is scanned from the old end;
+    anything else (rewrite, truncation, rotation) is indexed from scratch.
+    """
+
+    def __init__(self, max_entries: int = LINE_INDEX_CACHE_ENTRIES) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, LineIndex]" = OrderedDict()
+
+    def get(self, path: str, f: BinaryIO) -> LineIndex:
+        st = os.fstat(f.fileno())
+        with self._lock:
+            index = self._entries.get(path)
+            if (
+                index is None
+                or index.ino != st.st_ino
+                or st.st_size < index.size
+                or (st.st_size == index.size and st.st_mtime_ns != index.mtime_ns)
+            ):
+                index = LineIndex(st)
+                self._entries[path] = index
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        with index.lock:
+            if index.size != st.st_size or index.mtime_ns != st.st_mtime_ns:
+                index.extend(f, st)
+        return index
+
+
+LINE_INDEX_CACHE = LineIndexCache()
+
+
+class ArchiveLimitError(ValueError):
+    """Directory too large to archive under the configured entry/byte limits."""
+
+
+class ArchiveSink(io.RawIOBase):
+    """Write-only stream passing archive output on in ARCHIVE_CHUNK_SIZE pieces.
+
+    It cannot seek or tell, so zipfile falls back to data descriptors and
+    tarfile to its stream mode; nothing is buffered beyond one chunk.
+    """
+
+    def __init__(self, write) -> None:
+        self._write = write
+        self._buffer = bytearray()
+        self.written = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        if len(self._buffer) >= ARCHIVE_CHUNK_SIZE:
+            self.flush()
+        return len(data)
+
+    def flush(self) -> None:
+        if self._buffer:
+            data = bytes(self._buffer)
+            self._buffer.clear()
+            self.written += len(data)
+            self._write(data)
+
+
+class DirectoryArchive:
+    """A directory tree written as zip, tar or tar.gz to a non-seekable stream.
+
+    scan() walks the tree up front with stat calls only, so limits are enforced
+    before any response bytes go out; write() then streams each file in
+    ARCHIVE_CHUNK_SIZE pieces. Symlinked files are archived like a download
+    would serve them, symlinked directories are not descended into (they could
+    loop or leave the tree), and special files and in-flight upload temp files
+    are skipped.
+    """
+
+    def __init__(self, path: str, fmt: str, name: str) -> None:
+        self.path = path
+        self.fmt = fmt
+        self.name = name
+        # (filesystem path, name inside the archive, stat); stat is None for directories
+        self.entries: List[Tuple[str, str, Optional[os.stat_result]]] = []
+        self.total_bytes = 0
+
+    def scan(self, max_entries: Optional[int], max_bytes: Optional[int]) -> None:
+        stack = [(self.path, self.name)]
+        while stack:
+            directory, arcdir = stack.pop()
+            self.entries.append((directory, arcdir + "/", None))
+            try:
+                with os.scandir(directory) as it:
+                    children = sorted(it, key=lambda entry: entry.name)
+            except OSError as e:
+                debug("Archive skipped unreadable directory", path=directory, error=str(e))
+                continue
+            subdirs = []
+            for entry in children:
+                arcname = f"{arcdir}/{entry.name}"
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        subdirs.append((entry.path, arcname))
+                        continue
+                    if not entry.is_file() or (
+                        entry.name.startswith(".") and entry.name.endswith(".upload")
+                    ):
+                        continue
+                    st = entry.stat()
+                except OSError:
+                    continue
+                self.entries.append((entry.path, arcname, st))
+                self.total_bytes += st.st_size
+                if max_bytes is not None and self.total_bytes > max_bytes:
+                    raise ArchiveLimitError(
+                        f"Directory holds more than {format_size(max_bytes)} of files"
+                    )
+            if max_entries is not None and len(self.entries) + len(subdirs) > max_entries:
+                raise ArchiveLimitError(
+                    f"Directory holds more than {max_entries} files and folders"
+                )
+            stack.extend(reversed(subdirs))
+
+    def write(self, sink: ArchiveSink) -> None:
+        if self.fmt == "zip":
+            self._write_zip(sink)
+        elif self.fmt == "tar.gz":
+            with gzip.GzipFile(
+                filename="", mode="wb", fileobj=sink, compresslevel=ARCHIVE_COMPRESS_LEVEL
+            ) as compressed:
+                self._write_tar(compressed)
+        else:
+            self._write_tar(sink)
+        sink.flush()
+
+    def _write_zip(self, sink: ArchiveSink) -> None:
+        with zipfile.ZipFile(sink, "w", zipfile.ZIP_DEFLATED) as zf:
+            for fs_path, arcname, st in self.entries:
+                if st is None:
+                    info = zipfile.ZipInfo.from_file(
+                        fs_path, arcname, strict_timestamps=False
+                    )
+                    zf.writestr(info, b"", zipfile.ZIP_STORED)
+                    continue
+                try:
+                    src = open(fs_path, "rb")
+                except OSError as e:
+                    debug("Archive skipped unreadable file", path=fs_path, error=str(e))
+                    continue
+                with src:
+                    info = zipfile.ZipInfo.from_file(
+                        fs_path, arcname, strict_timestamps=False
+                    )
+                    ext = os.path.splitext(arcname)[1].lower()
+                    if ext in ARCHIVE_STORED_EXTENSIONS:
+                        info.compress_type = zipfile.ZIP_STORED
+                    else:
+                        info.compress_type = zipfile.ZIP_DEFLATED
+                    with zf.open(info, "w") as dst:
+                        shutil.copyfileobj(src, dst, ARCHIVE_CHUNK_SIZE)
+
+    def _write_tar(self, fileobj: BinaryIO) -> None:
+        with tarfile.open(
+            fileobj=fileobj, mode="w|", format=tarfile.PAX_FORMAT
+        ) as tf:
+            for fs_path, arcname, st in self.entries:
+                info = tarfile.TarInfo(arcname.rstrip("/"))
+                if st is None:
+                    info.type = tarfile.DIRTYPE
+                    info.mode = 0o755
+                    try:
+                        info.mtime = int(os.stat(fs_path).st_mtime)
+                    except OSError:
+                        info.mtime = int(time.time())
+                    tf.addfile(info)
+                    continue
+                try:
+                    src = open(fs_path, "rb")
+                except OSError as e:
+                    debug("Archive skipped unreadable file", path=fs_path, error=str(e))
+                    continue
+                with src:
+                    # Size comes from the open file: the header must match the data.
+                    info.size = os.fstat(src.fileno()).st_size
+                    info.mode = st.st_mode & 0o777
+                    info.mtime = int(st.st_mtime)
+                    tf.addfile(info, src)
+
+
+class CLIStyle:
+    """CLI tool unified style config"""
+
+    COLORS = {
+        "TITLE": 7,
+        "SUB_TITLE": 2,
+        "CONTENT": 3,
+        "EXAMPLE": 7,
+        "WARNING": 4,
+        "ERROR": 2,
+        "SUCCESS": 3,
+    }
+
+    @staticmethod
+    def color(text: str = "", color: int = None) -> str:
+        """Unified color processing function"""
+        if color is None:
+            color = CLIStyle.COLORS["CONTENT"]
+        color_table = {
+            0: "{}",
+            1: "\033[1;30m{}\033[0m",
+            2: "\033[1;31m{}\033[0m",
+            3: "\033[1;32m{}\033[0m",
+            4: "\033[1;33m{}\033[0m",
+            5: "\033[1;34m{}\033[0m",
+            6: "\033[1;35m{}\033[0m",
+            7: "\033[1;36m{}\033[0m",
+            8: "\033[1;37m{}\033[0m",
+        }
+        return color_table[color].format(text)
+
+
+def debug(*args, file: Optional[str] = None, append: bool = True, **kwargs) -> None:
+    """Print debug information with source file and line number."""
+    if not DEBUG_MODE:
+        return
+
+    frame = inspect.currentframe().f_back
+    info = inspect.getframeinfo(frame)
+
+    file_name = os.path.basename(info.filename)
     output = f"{CLIStyle.color(file_name, CLIStyle.COLORS['SUCCESS'])}: {CLIStyle.color(str(info.lineno), CLIStyle.COLORS['WARNING'])} {CLIStyle.color('|', CLIStyle.COLORS['TITLE'])} "
 
     for i, arg in enumerate(args):
@@ -457,15 +1809,191 @@ def debug(*args, file: Optional[str] = None, append: bool = True, **kwargs) -> N
         print(output, end="")
 
 
-def access_log(
-    handler: "EnhancedHTTPRequestHandler",
-    action: str,
-    status: str,
-    path: Optional[str] = None,
-) -> None:
-    """Log upload/delete/modify/view/download to stdout: IP, time, action, status (and optional path)."""
-    ip = get_request_ip(handler)
-    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime())
+def format_size(size: int) -> str:
+    """Format byte count to human readable string"""
+    if size < 1024:
+        return f"{size} B"
+    elif size < 1024 * 1024:
+        return f"{size / 1024:.1f} KB"
+    elif size < 1024 * 1024 * 1024:
+        return f"{size / (1024 * 1024):.1f} MB"
+    else:
+        return f"{size / (1024 * 1024 * 1024):.2f} GB"
+
+
+def format_transfer(nbytes: int, duration: Optional[float] = None) -> str:
+    """Format transferred bytes with elapsed time and throughput."""
+    text = format_size(nbytes)
+    if duration is not None:
+        text += f" in {duration:.2f}s"
+        if duration > 0:
+            text += f" ({format_size(int(nbytes / duration))}/s)"
+    return text
+
+
+@dataclass
+class AccessRecord:
+    """One access log entry as captured on the request thread."""
+
+    timestamp: float
+    client_address: Optional[tuple]
+    headers: Optional[email.message.Message]
+    method: Optional[str]
+    action: str
+    status: str
+    path: Optional[str]
+    nbytes: Optional[int]
+    duration: Optional[float]
+    _ip: Optional[str] = field(default=None, repr=False)
+
+    @property
+    def ip(self) -> str:
+        # Resolved off the request thread, once, by whichever consumer gets here first.
+        if self._ip is None:
+            self._ip = resolve_client_ip(self.client_address, self.headers)
+        return self._ip
+
+
+class AccessLogConsumer:
+    """One access log sink: a bounded queue drained in batches by its own thread.
+
+    The thread takes whatever has queued up, up to ACCESS_LOG_BATCH_SIZE
+    records, and hands it to emit() as one write. When the queue is full the
+    record is dropped and counted instead of blocking the request; the next
+    batch is told how many were lost.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        emit,
+        max_queue: int = ACCESS_LOG_QUEUE_SIZE,
+        batch_size: int = ACCESS_LOG_BATCH_SIZE,
+    ) -> None:
+        self.name = name
+        self.emit = emit
+        self.batch_size = batch_size
+        self.dropped = 0
+        self.written = 0
+        self._queue: "queue.Queue[object]" = queue.Queue(maxsize=max_queue)
+        self._lock = threading.Lock()
+        self._unreported = 0
+        self._thread: Optional[threading.Thread] = None
+
+    def submit(self, record: AccessRecord) -> None:
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until everything queued before this call has been written."""
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        try:
+            self._queue.put(done, timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "written": self.written,
+            "dropped": self.dropped,
+        }
+
+    def _ensure_thread(self) -> None:
+        if self._thread is None:
+            with self._lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(
+                        target=self._run, name=f"hftp-log-{self.name}", daemon=True
+                    )
+                    self._thread.start()
+
+    def _run(self) -> None:
+        while True:
+            batch = [self._queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in batch if isinstance(item, AccessRecord)]
+            with self._lock:
+                lost, self._unreported = self._unreported, 0
+            if records or lost:
+                try:
+                    self.emit(records, lost)
+                except Exception as e:
+                    debug("Access log write failed", sink=self.name, error=str(e))
+                self.written += len(records)
+            for item in batch:
+                if isinstance(item, threading.Event):
+                    item.set()
+
+
+class AccessLog:
+    """Fan access records out to the colored console and an optional NDJSON file.
+
+    access_log() only builds an AccessRecord and queues it on each consumer,
+    so neither a slow terminal nor a slow disk holds up request handling, and
+    one stalled sink does not hold up the other.
+    """
+
+    def __init__(self) -> None:
+        self.consumers = [AccessLogConsumer("console", self._emit_console)]
+        self._ndjson: Optional[io.TextIOBase] = None
+
+    def open_ndjson(self, path: str) -> None:
+        """Also append every record as one JSON object per line to path."""
+        self._ndjson = open(path, "a", encoding="utf-8")
+        self.consumers.append(AccessLogConsumer("ndjson", self._emit_ndjson))
+
+    def submit(self, record: AccessRecord) -> None:
+        for consumer in self.consumers:
+            consumer.submit(record)
+
+    def flush(self, timeout: Optional[float] = None) -> None:
+        for consumer in self.consumers:
+            consumer.flush(timeout)
+
+    def stats(self) -> dict:
+        return {consumer.name: consumer.stats() for consumer in self.consumers}
+
+    @staticmethod
+    def _emit_console(records: List[AccessRecord], lost: int) -> None:
+        lines = [format_access_line(record) for record in records]
+        if lost:
+            lines.append(
+                CLIStyle.color(
+                    f"{lost} access log records dropped (console too slow)",
+                    CLIStyle.COLORS["WARNING"],
+                )
+            )
+        sys.stdout.write("\n".join(lines) + "\n")
+        sys.stdout.flush()
+
+    def _emit_ndjson(self, records: List[AccessRecord], lost: int) -> None:
+        lines = [json.dumps(access_record_json(record)) for record in records]
+        if lost:
+            lines.append(json.dumps({"ts": time.time(), "dropped": lost}))
+        self._ndjson.write("\n".join(lines) + "\n")
+        self._ndjson.flush()
+
+
+ACCESS_LOG = AccessLog()
+
+
+def format_access_line(record: AccessRecord) -> str:
+    """Colored console line: time, IP, action, status (and optional path, transfer stats)."""
+    ts = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(record.timestamp))
+    status = record.status
     try:
         status_int = int(status)
     except (TypeError, ValueError):
@@ -488,19 +2016,186 @@ def access_log(
         "delete": CLIStyle.COLORS["ERROR"],
         "view": CLIStyle.COLORS["TITLE"],
         "download": 5,
+        "archive": 5,
         "paste": CLIStyle.COLORS["SUB_TITLE"],
     }
-    action_color = action_color_map.get(action, CLIStyle.COLORS["CONTENT"])
+    action_color = action_color_map.get(record.action, CLIStyle.COLORS["CONTENT"])
 
     parts = [
         CLIStyle.color(ts, 1),
-        CLIStyle.color(ip, 6),
-        CLIStyle.color(action, action_color),
+        CLIStyle.color(record.ip, 6),
+        CLIStyle.color(record.action, action_color),
         CLIStyle.color(status, status_color),
     ]
-    if path:
-        parts.append(CLIStyle.color(path, CLIStyle.COLORS["SUB_TITLE"]))
-    print(" ".join(parts), flush=True)
+    if record.path:
+        parts.append(CLIStyle.color(record.path, CLIStyle.COLORS["SUB_TITLE"]))
+    if record.nbytes is not None:
+        parts.append(
+            CLIStyle.color(
+                format_transfer(record.nbytes, record.duration),
+                CLIStyle.COLORS["CONTENT"],
+            )
+        )
+    return " ".join(parts)
+
+
+def access_record_json(record: AccessRecord) -> dict:
+    """NDJSON form of a record; status is an int when it is an HTTP code."""
+    status: object = record.status
+    try:
+        status = int(record.status)
+    except (TypeError, ValueError):
+        pass
+    return {
+        "ts": record.timestamp,
+        "ip": record.ip,
+        "method": record.method,
+        "action": record.action,
+        "status": status,
+        "path": record.path,
+        "bytes": record.nbytes,
+        "duration_ms": None
+        if record.duration is None
+        else round(record.duration * 1000, 3),
+    }
+
+
+def access_log(
+    handler: "EnhancedHTTPRequestHandler",
+    action: str,
+    status: str,
+    path: Optional[str] = None,
+    nbytes: Optional[int] = None,
+    duration: Optional[float] = None,
+) -> None:
+    """Queue an upload/delete/modify/view/download record for ACCESS_LOG to write."""
+    deferred = getattr(handler, "deferred_logs", None)
+    if deferred is not None:
+        # Buffered handlers log once their response has actually been delivered.
+        deferred.append((action, status, path, nbytes, duration))
+        return
+    ACCESS_LOG.submit(
+        AccessRecord(
+            time.time(),
+            handler.client_address,
+            getattr(handler, "headers", None),
+            getattr(handler, "command", None),
+            action,
+            str(status),
+            path,
+            nbytes,
+            duration,
+        )
+    )
+
+
+def make_etag(st: os.stat_result, weak: bool = False, variant: str = "") -> str:
+    """Build an entity tag from inode, size and nanosecond mtime."""
+    tag = f"{st.st_ino:x}-{st.st_size:x}-{st.st_mtime_ns:x}{variant}"
+    return f'W/"{tag}"' if weak else f'"{tag}"'
+
+
+def choose_encoding(accept_encoding: str, allow_br: bool = True) -> Optional[str]:
+    """Pick "br" (when brotli is installed) or "gzip" from an Accept-Encoding header."""
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.partition(";")
+        weight = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    weight = float(value)
+                except ValueError:
+                    weight = 0.0
+        if coding.strip():
+            weights[coding.strip().lower()] = weight
+    wildcard = weights.get("*", 0.0)
+    if allow_br and brotli is not None and weights.get("br", wildcard) > 0:
+        return "br"
+    if weights.get("gzip", wildcard) > 0:
+        return "gzip"
+    return None
+
+
+def compress_body(data: bytes, encoding: str, static: bool = False) -> bytes:
+    """Compress a response body; static assets get the slow, dense settings."""
+    if encoding == "br":
+        return brotli.compress(data, quality=11 if static else 5)
+    return gzip.compress(data, compresslevel=9 if static else 6, mtime=0)
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """Weak comparison of an If-None-Match header against an entity tag."""
+    opaque = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == opaque:
+            return True
+    return False
+
+
+def parse_http_date(value: str) -> Optional[int]:
+    """Parse an HTTP date header into a POSIX timestamp, or None if malformed."""
+    try:
+        parsed = email.utils.parsedate_to_datetime(value)
+    except (TypeError, ValueError, IndexError, OverflowError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=datetime.timezone.utc)
+    return int(parsed.timestamp())
+
+
+def count_range_specs(header: str) -> int:
+    """Number of non-empty specs in a Range header, before any coalescing."""
+    return sum(1 for part in header.partition("=")[2].split(",") if part.strip())
+
+
+def parse_byte_ranges(header: str, file_size: int) -> List[Tuple[int, int]]:
+    """Parse a Range header into sorted, coalesced inclusive (start, end) pairs.
+
+    Supports "a-b", open-ended "a-" and suffix "-n" specs. Unsatisfiable specs
+    are dropped, so an empty list means 416; malformed headers raise ValueError.
+    """
+    unit, _, spec = header.partition("=")
+    if unit.strip().lower() != "bytes" or not spec.strip():
+        raise ValueError("Unsupported range unit")
+
+    ranges: List[Tuple[int, int]] = []
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        start_str, sep, end_str = part.partition("-")
+        start_str, end_str = start_str.strip(), end_str.strip()
+        if not sep or not (start_str or end_str):
+            raise ValueError("Invalid range spec")
+        if not start_str:
+            suffix = int(end_str)
+            if suffix <= 0 or file_size == 0:
+                continue
+            ranges.append((max(0, file_size - suffix), file_size - 1))
+            continue
+        start = int(start_str)
+        end = int(end_str) if end_str else file_size - 1
+        if start < 0 or end < start:
+            raise ValueError("Invalid range spec")
+        if start >= file_size:
+            continue
+        ranges.append((start, min(end, file_size - 1)))
+
+    ranges.sort()
+    merged: List[Tuple[int, int]] = []
+    for start, end in ranges:
+        if merged and start <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
 
 
 def _extract_ip(value: str) -> Optional[str]:
@@ -528,11 +2223,17 @@ def _extract_ip(value: str) -> Optional[str]:
 
 
 def get_request_ip(handler: http.server.BaseHTTPRequestHandler) -> str:
+    return resolve_client_ip(handler.client_address, getattr(handler, "headers", None))
+
+
+def resolve_client_ip(
+    client_address: Optional[tuple], headers: Optional[email.message.Message]
+) -> str:
     local_ips = LOCAL_IPS or set()
 
     fallback = "?"
-    if handler.client_address:
-        candidate = _extract_ip(handler.client_address[0])
+    if client_address:
+        candidate = _extract_ip(client_address[0])
         if candidate:
             fallback = candidate
             if candidate not in local_ips:
@@ -546,7 +2247,7 @@ def get_request_ip(handler: http.server.BaseHTTPRequestHandler) -> str:
 
     candidates: List[str] = []
     try:
-        xff = handler.headers.get("X-Forwarded-For")
+        xff = headers.get("X-Forwarded-For")
         if xff:
             candidates.extend([p.strip() for p in xff.split(",") if p.strip()])
     except Exception:
@@ -559,14 +2260,14 @@ def get_request_ip(handler: http.server.BaseHTTPRequestHandler) -> str:
         "X-Client-IP",
     ):
         try:
-            v = handler.headers.get(header_name)
+            v = headers.get(header_name)
             if v:
                 candidates.append(v)
         except Exception:
             pass
 
     try:
-        forwarded = handler.headers.get("Forwarded")
+        forwarded = headers.get("Forwarded")
         if forwarded:
             for m in re.finditer(r"for=([^;,\s]+)", forwarded, flags=re.IGNORECASE):
                 candidates.append(m.group(1))
@@ -615,11 +2316,15 @@ def emergency_exit():
             SERVER_INSTANCE.socket.close()
         except Exception:
             pass
+    # Let queued access log lines reach the console before the final message.
+    ACCESS_LOG.flush(timeout=0.5)
     try:
         print(CLIStyle.color("Server stopped", CLIStyle.COLORS["SUCCESS"]))
     except Exception:
         # Avoid reentrant stdout errors during signal/shutdown
         pass
+    # Batched uploads were acknowledged before their fsync; give them a moment.
+    UPLOAD_COORDINATOR.flush(timeout=1.0)
     # os._exit bypasses cleanup but guarantees termination on all platforms
     os._exit(0)
 
@@ -672,10 +2377,16 @@ def confirm_action(prompt: str) -> bool:
 def signal_handler(sig, frame):
     """Handle interrupt signals for graceful shutdown."""
     print(CLIStyle.color("\nShutting down server...", CLIStyle.COLORS["WARNING"]))
-    threading.Thread(target=force_exit_after, args=(1,), daemon=True).start()
+    global SERVER_INSTANCE, EXIT_EVENT
+    drain_timeout = getattr(SERVER_INSTANCE, "drain_timeout", 0)
+    if EXIT_EVENT.is_set():
+        # Second interrupt while draining: stop right away.
+        drain_timeout = 0
+    threading.Thread(
+        target=force_exit_after, args=(drain_timeout + 1,), daemon=True
+    ).start()
 
     try:
-        global SERVER_INSTANCE, EXIT_EVENT
         EXIT_EVENT.set()
         if SERVER_INSTANCE:
             debug("Signal handler shutting down server")
@@ -683,6 +2394,9 @@ def signal_handler(sig, frame):
     except Exception as e:
         debug("Error in signal handler", error=str(e))
 
+    if drain_timeout > 0:
+        # The main loop notices EXIT_EVENT and drains the worker pool.
+        return
     emergency_exit()
 
 
@@ -839,301 +2553,44 @@ class ColoredArgumentParser(argparse.ArgumentParser):
         return formatter.format_help()
 
 
-class EnhancedHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
-    """Enhanced HTTP request handler with file upload and download support"""
+class StaticAsset:
+    """A page stylesheet or script served under a content-hashed URL.
 
-    def do_GET(self) -> None:
-        """Handle GET requests with preview and Range support."""
-        parsed = urlparse(self.path)
-        query = parse_qs(parsed.query)
-        if parsed.path == "/favicon.ico":
-            try:
-                self.send_response(200)
-                self.send_header("Content-Type", "image/x-icon")
-                self.send_header("Content-Length", str(len(FAVICON_ICO_BYTES)))
-                self.end_headers()
-                self.wfile.write(FAVICON_ICO_BYTES)
-            except (BrokenPipeError, ConnectionResetError):
-                # Client may cancel favicon request; avoid noisy stack traces.
-                pass
-            return
-        if parsed.path == PASTEBIN_ENDPOINT:
-            self._serve_pastebin(query)
-            return
-        path = self._translate_path_for_read(parsed.path)
+    Compressed variants are built on first request and kept for the life
+    of the process.
+    """
 
-        if os.path.isfile(path):
-            if query.get("preview", ["0"])[0] == "1":
-                access_log(self, "view", "200", path)
-                if is_text_file(path):
-                    self.serve_text_preview(path)
-                elif is_image_file(path):
-                    self.serve_image_preview(path)
-                elif is_video_file(path):
-                    self.serve_video_preview(path)
-                else:
-                    self._serve_ranged(path)
-            else:
-                self._serve_ranged(path, log_action="download")
-        elif os.path.isdir(path):
-            if not parsed.path.endswith("/"):
-                location = parsed.path + "/"
-                if parsed.query:
-                    location += "?" + parsed.query
-                self.send_response(301)
-                self.send_header("Location", location)
-                self.end_headers()
-                return
+    CONTENT_TYPES = {
+        ".css": "text/css; charset=utf-8",
+        ".js": "text/javascript; charset=utf-8",
+    }
 
-            self.path = parsed.path
-            f = self.list_directory(path)
-            if f:
-                try:
-                    shutil.copyfileobj(f, self.wfile)
-                except (BrokenPipeError, ConnectionResetError):
-                    pass
-                finally:
-                    f.close()
-        else:
-            self.path = parsed.path
-            super().do_GET()
-
-    def _serve_pastebin(self, query: dict) -> None:
-        """Return the current temporary pastebin state."""
-        snapshot = PASTEBIN.snapshot()
-        raw_mode = query.get("raw", ["0"])[0].lower() in ("1", "true", "yes", "text")
-
-        if raw_mode:
-            payload = snapshot["text"].encode("utf-8")
-            content_type = "text/plain; charset=utf-8"
-        else:
-            payload = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
-            content_type = "application/json; charset=utf-8"
-
-        self.send_response(200)
-        self.send_header("Content-Type", content_type)
-        self.send_header("Content-Length", str(len(payload)))
-        self.end_headers()
-        self.wfile.write(payload)
-
-    def _read_limited_request_body(self, max_bytes: int) -> Optional[bytes]:
-        """Read a regular or chunked request body with a size limit."""
-        transfer_encoding = self.headers.get("Transfer-Encoding", "").lower()
-        if "chunked" not in transfer_encoding:
-            length = int(self.headers.get("Content-Length", 0))
-            if length > max_bytes:
-                access_log(self, "paste", "413")
-                self.send_error(413, "Paste is too large")
-                return None
-            return self.rfile.read(length)
-
-        data = bytearray()
-        try:
-            while True:
-                line = self.rfile.readline(128)
-                if not line:
-                    raise ValueError("Invalid chunked body")
-
-                size_text = line.split(b";", 1)[0].strip()
-                chunk_size = int(size_text, 16)
-                if chunk_size == 0:
-                    self._discard_chunked_trailers()
-                    return bytes(data)
-
-                if len(data) + chunk_size > max_bytes:
-                    access_log(self, "paste", "413")
-                    self.send_error(413, "Paste is too large")
-                    return None
-
-                data.extend(self.rfile.read(chunk_size))
-                self.rfile.read(2)
-        except ValueError:
-            access_log(self, "paste", "400")
-            self.send_error(400, "Invalid chunked request body")
-            return None
-
-    def _discard_chunked_trailers(self) -> None:
-        """Consume optional HTTP chunked trailers."""
-        while True:
-            line = self.rfile.readline(65536)
-            if line in (b"\r\n", b"\n", b""):
-                return
-
-    def _handle_pastebin_post(self) -> None:
-        """Update or clear the shared temporary pastebin text."""
-        raw = self._read_limited_request_body(MAX_PASTEBIN_BYTES)
-        if raw is None:
-            return
-
-        content_type = self.headers.get("Content-Type", "")
-        text = ""
-        action = "save"
-
-        if "application/json" in content_type:
-            try:
-                data = json.loads(raw.decode("utf-8", errors="replace") or "{}")
-                text = str(data.get("text", ""))
-                action = str(data.get("action", "save"))
-            except json.JSONDecodeError:
-                access_log(self, "paste", "400")
-                self.send_error(400, "Invalid JSON")
-                return
-        elif "application/x-www-form-urlencoded" in content_type:
-            data = parse_qs(raw.decode("utf-8", errors="replace"))
-            text = data.get("text", [""])[0]
-            action = data.get("action", ["save"])[0]
-        else:
-            text = raw.decode("utf-8", errors="replace")
-
-        updated_by = get_request_ip(self)
-        if action == "clear":
-            snapshot = PASTEBIN.clear(updated_by)
-        else:
-            if len(text.encode("utf-8")) > MAX_PASTEBIN_BYTES:
-                access_log(self, "paste", "413")
-                self.send_error(413, "Paste is too large")
-                return
-            snapshot = PASTEBIN.update(text, updated_by)
-
-        access_log(self, "paste", "200", f"{snapshot['size']} bytes")
-        payload = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(payload)))
-        self.end_headers()
-        self.wfile.write(payload)
-
-    def _handle_pastebin_put(self) -> None:
-        """Overwrite the shared temporary pastebin text with the raw request body."""
-        raw = self._read_limited_request_body(MAX_PASTEBIN_BYTES)
-        if raw is None:
-            return
-
-        text = raw.decode("utf-8", errors="replace")
-        snapshot = PASTEBIN.update(text, get_request_ip(self))
-        access_log(self, "paste", "200", f"{snapshot['size']} bytes")
-        payload = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-Type", "application/json; charset=utf-8")
-        self.send_header("Content-Length", str(len(payload)))
-        self.end_headers()
-        self.wfile.write(payload)
-
-    def _serve_ranged(self, filepath: str, log_action: Optional[str] = None) -> None:
-        """Serve a file with HTTP Range request support. log_action: 'download' or None (no log)."""
-        try:
-            file_size = os.path.getsize(filepath)
-        except OSError:
-            if log_action:
-                access_log(self, log_action, "404", filepath)
-            self.send_error(404, "File not found")
-            return
-
-        mime_type, _ = mimetypes.guess_type(filepath)
-        if not mime_type:
-            mime_type = "application/octet-stream"
-        if mime_type.startswith("text/") and "charset" not in mime_type:
-            mime_type += "; charset=utf-8"
-
-        range_header = self.headers.get("Range")
-        if not range_header:
-            self.send_response(200)
-            if log_action:
-                access_log(self, log_action, "200", filepath)
-            self.send_header("Content-Type", mime_type)
-            self.send_header("Content-Length", str(file_size))
-            self.send_header("Accept-Ranges", "bytes")
-            self.end_headers()
-            try:
-                with open(filepath, "rb") as f:
-                    shutil.copyfileobj(f, self.wfile)
-            except (BrokenPipeError, ConnectionResetError):
-                pass
-            return
-
-        try:
-            spec = range_header.replace("bytes=", "")
-            start_str, end_str = spec.split("-", 1)
-            start = int(start_str) if start_str else 0
-            end = int(end_str) if end_str else file_size - 1
-        except (ValueError, AttributeError):
-            if log_action:
-                access_log(self, log_action, "416", filepath)
-            self.send_error(416, "Range Not Satisfiable")
-            return
-
-        end = min(end, file_size - 1)
-        if start < 0 or start > end or start >= file_size:
-            if log_action:
-                access_log(self, log_action, "416", filepath)
-            self.send_response(416)
-            self.send_header("Content-Range", f"bytes */{file_size}")
-            self.end_headers()
-            return
-
-        length = end - start + 1
-        self.send_response(206)
-        if log_action:
-            access_log(self, log_action, "206", filepath)
-        self.send_header("Content-Type", mime_type)
-        self.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
-        self.send_header("Content-Length", str(length))
-        self.send_header("Accept-Ranges", "bytes")
-        self.end_headers()
-
-        try:
-            with open(filepath, "rb") as f:
-                f.seek(start)
-                remaining = length
-                chunk = 64 * 1024
-                while remaining > 0:
-                    data = f.read(min(chunk, remaining))
-                    if not data:
-                        break
-                    self.wfile.write(data)
-                    remaining -= len(data)
-        except (BrokenPipeError, ConnectionResetError):
-            pass
+    def __init__(self, name: str, text: str) -> None:
+        self.name = name
+        self.body = text.encode("utf-8")
+        self.digest = hashlib.sha1(self.body).hexdigest()[:12]
+        stem, ext = os.path.splitext(name)
+        self.content_type = self.CONTENT_TYPES[ext]
+        self.url = f"{STATIC_ENDPOINT}/{stem}.{self.digest}{ext}"
+        self._encoded: Dict[str, bytes] = {}
+
+    def encoded(self, encoding: Optional[str]) -> bytes:
+        if encoding is None:
+            return self.body
+        data = self._encoded.get(encoding)
+        if data is None:
+            data = self._encoded[encoding] = compress_body(
+                self.body, encoding, static=True
+            )
+        return data
 
-    def serve_text_preview(self, filepath: str) -> None:
-        """Serve a text file with syntax highlighting preview"""
-        try:
-            with open(filepath, "r", encoding="utf-8", errors="replace") as f:
-                content = f.read()
-        except Exception as e:
-            self.send_error(500, f"Cannot read file: {str(e)}")
-            return
 
-        filename = os.path.basename(filepath)
-        file_size = self._format_size(os.path.getsize(filepath))
-        language = get_syntax_language(filepath)
-        line_count = content.count("\n") + 1
-        escaped_content = html.escape(content)
+# Page stylesheets and scripts. They are served from STATIC_ENDPOINT under
+# content-hashed names, so browsers cache them once instead of receiving
+# them inline with every page.
 
-        html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="utf-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>{html.escape(filename)} - Preview</title>
-<script>
-(function() {{
-    const t = localStorage.getItem('hftp-theme') || 'light';
-    document.documentElement.setAttribute('data-theme', t);
-}})();
-</script>
-<link rel="stylesheet" id="hljs-theme" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css">
-<script>
-(function() {{
-    const t = localStorage.getItem('hftp-theme');
-    if (t === 'dark') {{
-        document.getElementById('hljs-theme').href =
-            'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github-dark.min.css';
-    }}
-}})();
-</script>
-<style>
-:root {{
+LISTING_CSS = """
+:root {
     --bg-primary: #ffffff;
     --bg-secondary: #f6f8fa;
     --bg-tertiary: #eaeef2;
@@ -1142,9 +2599,14 @@ class EnhancedHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     --text-secondary: #656d76;
     --accent-blue: #0969da;
     --accent-green: #1a7f37;
+    --accent-yellow: #9a6700;
+    --accent-purple: #8250df;
+    --accent-red: #cf222e;
     --hover-bg: rgba(208, 215, 222, 0.32);
-}}
-[data-theme="dark"] {{
+    --header-bg: #e8f1fb;
+    --header-border: #8fbbe8;
+}
+[data-theme="dark"] {
     --bg-primary: #0d1117;
     --bg-secondary: #161b22;
     --bg-tertiary: #21262d;
@@ -1153,62 +2615,261 @@ class EnhancedHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     --text-secondary: #8b949e;
     --accent-blue: #58a6ff;
     --accent-green: #3fb950;
+    --accent-yellow: #d29922;
+    --accent-purple: #a371f7;
+    --accent-red: #f85149;
     --hover-bg: rgba(48, 54, 61, 0.5);
-}}
-* {{ box-sizing: border-box; margin: 0; padding: 0; }}
-html {{ font-size: 18px; }}
-body {{
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
+    --header-bg: #1b2a3a;
+    --header-border: #3974a8;
+}
+* { box-sizing: border-box; margin: 0; padding: 0; }
+html { font-size: 18px; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
     background: var(--bg-primary);
     color: var(--text-primary);
     line-height: 1.6;
+    min-height: 100vh;
     transition: background 0.3s, color 0.3s;
-}}
-.container {{
-    max-width: 1600px;
+}
+.container {
+    max-width: 1400px;
     margin: 0 auto;
     padding: 1.5rem;
-}}
-.toolbar {{
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 8px 8px 0 0;
-    padding: 0.75rem 1rem;
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    flex-wrap: wrap;
-    gap: 0.75rem;
-}}
-.file-info {{
+}
+header {
+    background: var(--header-bg);
+    border: 1px solid var(--header-border);
+    border-radius: 8px;
+    padding: 1rem 1.25rem;
+    margin-bottom: 1rem;
+    position: sticky;
+    top: 0.75rem;
+    z-index: 10;
     display: flex;
-    align-items: center;
-    gap: 1rem;
+    justify-content: space-between;
+    align-items: flex-start;
     flex-wrap: wrap;
-}}
-.file-info h1 {{
-    font-size: 1rem;
+    gap: 1rem;
+}
+.header-left {
+    flex: 1;
+}
+header h1 {
+    font-size: 1.25rem;
     font-weight: 600;
+    color: var(--text-primary);
     display: flex;
     align-items: center;
     gap: 0.5rem;
-}}
-.file-meta {{
+}
+.breadcrumb {
+    margin-top: 0.5rem;
+    font-size: 0.875rem;
+    color: var(--text-secondary);
+}
+.breadcrumb a {
+    color: var(--accent-blue);
+    text-decoration: none;
+}
+.breadcrumb a:hover { text-decoration: underline; }
+.archive-links {
+    margin-top: 0.25rem;
+    font-size: 0.75rem;
+    color: var(--text-muted);
+}
+.archive-links a {
+    color: var(--text-secondary);
+    text-decoration: none;
+}
+.archive-links a:hover { text-decoration: underline; }
+
+/* Theme Toggle */
+.theme-toggle {
     display: flex;
-    gap: 1rem;
-    font-size: 0.8rem;
+    align-items: center;
+    gap: 0.5rem;
+    padding: 0.5rem 0.75rem;
+    background: var(--bg-tertiary);
+    border: 1px solid var(--border-color);
+    border-radius: 6px;
+    cursor: pointer;
+    font-size: 0.875rem;
+    color: var(--text-primary);
+    transition: all 0.2s;
+}
+.theme-toggle:hover { background: var(--hover-bg); }
+.theme-toggle .icon { font-size: 1rem; }
+
+/* Upload Section */
+.upload-section {
+    background: var(--bg-secondary);
+    border: 1px solid var(--border-color);
+    border-radius: 8px;
+    padding: 1.25rem;
+    margin-bottom: 1rem;
+}
+.upload-title {
+    font-size: 0.9rem;
+    font-weight: 600;
+    margin-bottom: 0.75rem;
+    display: flex;
+    align-items: center;
+    gap: 0.5rem;
+}
+.upload-title .icon { color: var(--accent-green); }
+.upload-zone {
+    border: 2px dashed var(--border-color);
+    border-radius: 8px;
+    padding: 2rem;
+    text-align: center;
+    transition: all 0.2s;
+    cursor: pointer;
+}
+.upload-zone:hover, .upload-zone.dragover {
+    border-color: var(--accent-blue);
+    background: var(--hover-bg);
+}
+.upload-zone input[type="file"] { display: none; }
+.upload-zone p {
     color: var(--text-secondary);
-}}
-.file-meta span {{
+    font-size: 0.9rem;
+    margin-bottom: 0.75rem;
+}
+.upload-zone .btn {
+    display: inline-block;
+    padding: 0.5rem 1rem;
+    background: var(--accent-green);
+    color: #fff;
+    border: none;
+    border-radius: 6px;
+    font-size: 0.9rem;
+    font-weight: 500;
+    cursor: pointer;
+    transition: opacity 0.2s;
+}
+.upload-zone .btn:hover { opacity: 0.9; }
+
+/* Pastebin Section */
+.paste-section {
+    background: var(--bg-secondary);
+    border: 1px solid var(--border-color);
+    border-radius: 8px;
+    padding: 1.25rem;
+    margin-bottom: 1rem;
+}
+.paste-section.collapsed .paste-header {
+    margin-bottom: 0;
+}
+.paste-section.collapsed .paste-body {
+    display: none;
+}
+.paste-header {
     display: flex;
     align-items: center;
-    gap: 0.25rem;
-}}
-.toolbar-actions {{
+    justify-content: space-between;
+    gap: 0.75rem;
+    margin-bottom: 0.75rem;
+    flex-wrap: wrap;
+}
+.paste-header-left {
+    display: flex;
+    align-items: center;
+    gap: 0.75rem;
+    flex-wrap: wrap;
+}
+.paste-title {
+    font-size: 0.9rem;
+    font-weight: 600;
+}
+.paste-meta {
+    display: inline-flex;
+    align-items: center;
+    gap: 0.35rem;
+    flex-wrap: wrap;
+    color: var(--text-secondary);
+    font-size: 0.78rem;
+}
+.paste-meta-highlight {
+    display: inline-flex;
+    align-items: center;
+    padding: 0.1rem 0.35rem;
+    border-radius: 3px;
+    font-weight: 600;
+    letter-spacing: 0.03em;
+    line-height: 1;
+    opacity: 0.9;
+}
+.paste-meta-time {
+    color: var(--accent-yellow);
+    border: 1px solid var(--accent-yellow);
+}
+.paste-meta-ip {
+    color: var(--accent-purple);
+    border: 1px solid var(--accent-purple);
+}
+.paste-meta-size {
+    color: var(--accent-blue);
+    font-weight: 600;
+}
+.paste-cli {
+    display: flex;
+    flex-direction: column;
+    gap: 6px;
+    margin-top: 0.75rem;
+}
+.paste-command-row {
+    display: flex;
+    align-items: center;
+    background: var(--bg-secondary);
+    border: 1px solid var(--border-color);
+    border-radius: 6px;
+    overflow: hidden;
+}
+.paste-command-row code {
+    flex: 1;
+    padding: 6px 10px;
+    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
+    font-size: 0.8em;
+    white-space: nowrap;
+    overflow-x: auto;
+    background: transparent;
+}
+.paste-command-row button {
+    flex-shrink: 0;
+    padding: 4px 8px;
+    background: transparent;
+    border: none;
+    border-left: 1px solid var(--border-color);
+    cursor: pointer;
+    color: var(--text-secondary);
+    font-size: 0.75em;
+}
+.paste-editor {
+    width: 100%;
+    min-height: 10rem;
+    resize: vertical;
+    padding: 0.75rem;
+    border: 1px solid var(--border-color);
+    border-radius: 6px;
+    background: var(--bg-primary);
+    color: var(--text-primary);
+    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
+    font-size: 0.86rem;
+    line-height: 1.5;
+}
+.paste-editor:focus {
+    outline: 2px solid var(--accent-blue);
+    outline-offset: 1px;
+}
+.paste-actions {
     display: flex;
+    align-items: center;
     gap: 0.5rem;
-}}
-.btn {{
+    margin-top: 0.75rem;
+    flex-wrap: wrap;
+}
+.paste-btn {
     padding: 0.4rem 0.75rem;
     font-size: 0.8rem;
     font-weight: 500;
@@ -1217,2270 +2878,3393 @@ body {{
     background: var(--bg-tertiary);
     color: var(--text-primary);
     cursor: pointer;
-    text-decoration: none;
-    display: inline-flex;
-    align-items: center;
-    gap: 0.25rem;
     transition: all 0.15s;
-}}
-.btn:hover {{
+}
+.paste-btn:hover {
     background: var(--hover-bg);
-}}
-.btn-primary {{
+    border-color: var(--accent-blue);
+}
+.paste-btn.primary {
     background: var(--accent-green);
     border-color: var(--accent-green);
     color: #fff;
-}}
-.btn-primary:hover {{
-    opacity: 0.9;
-}}
-.code-container {{
-    border: 1px solid var(--border-color);
-    border-top: none;
-    border-radius: 0 0 8px 8px;
-    overflow: hidden;
-}}
-.code-wrapper {{
-    display: flex;
-    overflow-x: auto;
-}}
-.line-numbers {{
-    background: var(--bg-tertiary);
-    padding: 1rem 0;
-    text-align: right;
-    user-select: none;
-    border-right: 1px solid var(--border-color);
-    flex-shrink: 0;
-}}
-.line-numbers span {{
-    display: block;
-    padding: 0 0.75rem;
-    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
-    font-size: 0.85rem;
-    line-height: 1.6;
+}
+.paste-btn.danger {
+    color: var(--accent-red);
+}
+.paste-status {
     color: var(--text-secondary);
-}}
-pre {{
-    margin: 0;
-    padding: 1rem;
-    background: var(--bg-secondary);
-    overflow-x: auto;
-    flex: 1;
-}}
-pre code {{
-    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
-    font-size: 0.85rem;
-    line-height: 1.6;
-    background: transparent !important;
-}}
-.hljs {{ background: transparent !important; }}
+    font-size: 0.78rem;
+    min-height: 1.2rem;
+}
 
-/* Toast */
-.toast {{
-    position: fixed;
-    bottom: 1.5rem;
-    right: 1.5rem;
-    padding: 0.75rem 1.25rem;
-    background: var(--accent-green);
-    color: #fff;
-    border-radius: 6px;
-    font-size: 0.9rem;
-    opacity: 0;
-    transform: translateY(20px);
-    transition: all 0.3s;
-    z-index: 1000;
-}}
-.toast.show {{
-    opacity: 1;
-    transform: translateY(0);
-}}
-
-@media (max-width: 768px) {{
-    html {{ font-size: 16px; }}
-    .toolbar {{
-        flex-direction: column;
-        align-items: flex-start;
-    }}
-    .file-meta {{
-        flex-wrap: wrap;
-    }}
-}}
-</style>
-</head>
-<body>
-<div class="container">
-    <div class="toolbar">
-        <div class="file-info">
-            <h1>📄 {html.escape(filename)}</h1>
-            <div class="file-meta">
-                <span>📏 {file_size}</span>
-                <span>📝 {line_count} lines</span>
-                <span>💻 {language}</span>
-            </div>
-        </div>
-        <div class="toolbar-actions">
-            <a href="./" class="btn">← Back</a>
-            <button class="btn" onclick="toggleTheme()"><span id="themeIcon">🌙</span></button>
-            <button class="btn" onclick="copyContent()">📋 Copy</button>
-            <a href="{quote(os.path.basename(filepath))}" class="btn btn-primary" download>⬇️ Download</a>
-        </div>
-    </div>
-    <div class="code-container">
-        <div class="code-wrapper">
-            <div class="line-numbers" id="lineNumbers"></div>
-            <pre><code class="language-{language}" id="codeContent">{escaped_content}</code></pre>
-        </div>
-    </div>
-</div>
-<div class="toast" id="toast">Copied to clipboard!</div>
-
-<script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"></script>
-<script>
-document.addEventListener('DOMContentLoaded', function() {{
-    initTheme();
-    hljs.highlightAll();
-    
-    const code = document.getElementById('codeContent');
-    const lineNumbers = document.getElementById('lineNumbers');
-    const lines = code.textContent.split('\\n');
-    
-    for (let i = 1; i <= lines.length; i++) {{
-        const span = document.createElement('span');
-        span.textContent = i;
-        lineNumbers.appendChild(span);
-    }}
-}});
-
-function copyContent() {{
-    const code = document.getElementById('codeContent');
-    navigator.clipboard.writeText(code.textContent).then(function() {{
-        const toast = document.getElementById('toast');
-        toast.classList.add('show');
-        setTimeout(() => toast.classList.remove('show'), 2000);
-    }});
-}}
-
-function initTheme() {{
-    const saved = localStorage.getItem('hftp-theme');
-    const theme = saved || 'light';
-    applyTheme(theme);
-}}
-
-function toggleTheme() {{
-    const current = document.documentElement.getAttribute('data-theme') || 'light';
-    const next = current === 'dark' ? 'light' : 'dark';
-    applyTheme(next);
-    localStorage.setItem('hftp-theme', next);
-}}
-
-function applyTheme(theme) {{
-    document.documentElement.setAttribute('data-theme', theme);
-    document.getElementById('themeIcon').textContent = theme === 'dark' ? '☀️' : '🌙';
-    const hljsTheme = document.getElementById('hljs-theme');
-    hljsTheme.href = theme === 'dark' 
-        ? 'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github-dark.min.css'
-        : 'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css';
-}}
-</script>
-</body>
-</html>'''
-
-        encoded = html_content.encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(encoded)))
-        self.end_headers()
-        self.wfile.write(encoded)
-
-    def serve_image_preview(self, filepath: str) -> None:
-        """Serve an image file with an inline preview page."""
-        filename = os.path.basename(filepath)
-        file_size = self._format_size(os.path.getsize(filepath))
-        ext = os.path.splitext(filename)[1].lower()
-        img_url = quote(filename)
-
-        html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="utf-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>{html.escape(filename)} - Preview</title>
-<script>(function(){{const t=localStorage.getItem('hftp-theme')||'light';document.documentElement.setAttribute('data-theme',t);}})();</script>
-<style>
-:root {{
-    --bg-primary: #ffffff;
-    --bg-secondary: #f6f8fa;
-    --bg-tertiary: #eaeef2;
-    --border-color: #d0d7de;
-    --text-primary: #1f2328;
-    --text-secondary: #656d76;
-    --accent-green: #1a7f37;
-    --hover-bg: rgba(208, 215, 222, 0.32);
-    --checker-a: #c8c8c8;
-    --checker-b: #f0f0f0;
-}}
-[data-theme="dark"] {{
-    --bg-primary: #0d1117;
-    --bg-secondary: #161b22;
-    --bg-tertiary: #21262d;
-    --border-color: #30363d;
-    --text-primary: #c9d1d9;
-    --text-secondary: #8b949e;
-    --accent-green: #3fb950;
-    --hover-bg: rgba(48, 54, 61, 0.5);
-    --checker-a: #3a3a3a;
-    --checker-b: #2a2a2a;
-}}
-* {{ box-sizing: border-box; margin: 0; padding: 0; }}
-html {{ font-size: 18px; }}
-body {{
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
-    background: var(--bg-primary);
-    color: var(--text-primary);
-    min-height: 100vh;
-    display: flex;
-    flex-direction: column;
-    transition: background 0.3s, color 0.3s;
-}}
-.container {{
-    max-width: 1400px;
-    margin: 0 auto;
-    padding: 1.5rem;
-    flex: 1;
-    display: flex;
-    flex-direction: column;
-    gap: 1rem;
-}}
-.toolbar {{
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 8px;
-    padding: 0.75rem 1rem;
+/* Progress Bar */
+.progress-container {
+    display: none;
+    margin-top: 1rem;
+}
+.progress-container.active { display: block; }
+.progress-info {
     display: flex;
     justify-content: space-between;
-    align-items: center;
-    flex-wrap: wrap;
-    gap: 0.75rem;
-}}
-.file-info {{ display: flex; align-items: center; gap: 1rem; flex-wrap: wrap; }}
-.file-info h1 {{ font-size: 1rem; font-weight: 600; }}
-.file-meta {{
-    display: flex;
-    gap: 1rem;
     font-size: 0.8rem;
     color: var(--text-secondary);
-}}
-.toolbar-actions {{ display: flex; gap: 0.5rem; align-items: center; }}
-.btn {{
-    padding: 0.4rem 0.75rem;
-    font-size: 0.8rem;
-    font-weight: 500;
-    border: 1px solid var(--border-color);
-    border-radius: 6px;
+    margin-bottom: 0.5rem;
+}
+.progress-bar {
+    height: 0.5rem;
     background: var(--bg-tertiary);
-    color: var(--text-primary);
-    cursor: pointer;
-    text-decoration: none;
-    display: inline-flex;
-    align-items: center;
-    gap: 0.25rem;
-    transition: all 0.15s;
-    user-select: none;
-}}
-.btn:hover {{ background: var(--hover-bg); }}
-.btn-primary {{
-    background: var(--accent-green);
-    border-color: var(--accent-green);
-    color: #fff;
-}}
-.btn-primary:hover {{ opacity: 0.9; }}
-.zoom-controls {{
-    display: flex;
-    align-items: center;
-    gap: 0.25rem;
+    border-radius: 4px;
+    overflow: hidden;
+}
+.progress-fill {
+    height: 100%;
+    background: linear-gradient(90deg, var(--accent-blue), var(--accent-green));
+    width: 0%;
+    transition: width 0.3s;
+    border-radius: 4px;
+}
+.progress-stats {
+    display: grid;
+    grid-template-columns: repeat(4, 1fr);
+    gap: 0.75rem;
+    margin-top: 0.75rem;
+}
+.stat-item {
     background: var(--bg-tertiary);
-    border: 1px solid var(--border-color);
+    padding: 0.75rem;
     border-radius: 6px;
-    padding: 0.2rem 0.4rem;
-}}
-.zoom-btn {{
-    width: 1.6rem;
-    height: 1.6rem;
-    display: flex;
-    align-items: center;
-    justify-content: center;
-    font-size: 1rem;
-    font-weight: 600;
-    border: none;
-    border-radius: 4px;
-    background: transparent;
-    color: var(--text-primary);
-    cursor: pointer;
-    transition: background 0.15s;
-    line-height: 1;
-}}
-.zoom-btn:hover {{ background: var(--hover-bg); }}
-.zoom-label {{
-    font-size: 0.75rem;
-    min-width: 3rem;
     text-align: center;
+}
+.stat-label {
+    font-size: 0.7rem;
     color: var(--text-secondary);
-    font-variant-numeric: tabular-nums;
-}}
-.image-container {{
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+}
+.stat-value {
+    font-size: 1rem;
+    font-weight: 600;
+    margin-top: 0.25rem;
+    color: var(--accent-blue);
+}
+
+/* File List */
+.file-list {
+    background: var(--bg-secondary);
     border: 1px solid var(--border-color);
     border-radius: 8px;
     overflow: hidden;
-    display: flex;
-    justify-content: center;
+}
+.file-list-header {
+    display: grid;
+    grid-template-columns: 1fr 6rem 11rem 12rem;
+    padding: 0.75rem 1rem;
+    background: var(--bg-tertiary);
+    font-size: 0.75rem;
+    font-weight: 600;
+    color: var(--text-secondary);
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+    border-bottom: 1px solid var(--border-color);
+}
+.file-list-header-cell {
+    display: inline-flex;
     align-items: center;
-    background-image: linear-gradient(45deg, var(--checker-a) 25%, transparent 25%),
-                      linear-gradient(-45deg, var(--checker-a) 25%, transparent 25%),
-                      linear-gradient(45deg, transparent 75%, var(--checker-a) 75%),
-                      linear-gradient(-45deg, transparent 75%, var(--checker-a) 75%);
-    background-size: 20px 20px;
-    background-position: 0 0, 0 10px, 10px -10px, -10px 0px;
-    background-color: var(--checker-b);
-    min-height: 200px;
-    height: 80vh;
-    cursor: grab;
-    position: relative;
-}}
-.image-container.dragging {{ cursor: grabbing; }}
-.image-container img {{
-    max-width: 100%;
-    max-height: 100%;
-    object-fit: contain;
-    display: block;
-    transform-origin: center center;
-    transition: transform 0.05s ease-out;
+    gap: 0.3rem;
+    background: transparent;
+    border: none;
+    padding: 0;
+    margin: 0;
+    font: inherit;
+    color: inherit;
+    cursor: pointer;
+    text-align: left;
+}
+.file-list-header-cell .sort-indicator {
+    font-size: 0.7rem;
+}
+.file-list-header-cell.active {
+    color: var(--accent-blue);
+}
+.file-list-header {
+    display: grid;
+    grid-template-columns: 1fr 6rem 11rem 12rem;
+    padding: 0.75rem 1rem;
+    background: var(--bg-tertiary);
+    font-size: 0.75rem;
+    font-weight: 600;
+    color: var(--text-secondary);
+    text-transform: uppercase;
+    letter-spacing: 0.5px;
+    border-bottom: 1px solid var(--border-color);
+}
+.file-item {
+    display: grid;
+    grid-template-columns: 1fr 6rem 11rem 12rem;
+    padding: 0.75rem 1rem;
+    border-bottom: 1px solid var(--border-color);
+    transition: background 0.15s;
+}
+.file-item:last-child { border-bottom: none; }
+.file-item:hover { background: var(--hover-bg); }
+.file-name {
+    display: inline-flex;
+    align-items: center;
+    gap: 0.4rem;
+}
+.file-name a:not(.preview-badge) {
+    color: var(--accent-blue);
+    text-decoration: none;
+    font-weight: 500;
+    font-size: 0.95rem;
+}
+.file-name a:not(.preview-badge):hover { text-decoration: underline; }
+.file-thumb {
+    width: 2rem;
+    height: 2rem;
+    object-fit: cover;
+    border-radius: 4px;
+    flex-shrink: 0;
+    background: var(--bg-tertiary);
+}
+.file-size, .file-date {
+    color: var(--text-secondary);
+    font-size: 0.85rem;
+    display: flex;
+    align-items: center;
+}
+.preview-badge {
+    font-size: 0.6rem;
+    font-weight: 600;
+    letter-spacing: 0.03em;
+    color: var(--accent-green);
+    border: 1px solid var(--accent-green);
+    padding: 0.1rem 0.35rem;
+    border-radius: 3px;
+    margin-left: 0.4rem;
+    text-decoration: none;
+    vertical-align: middle;
+    display: inline-block;
+    line-height: 1;
+    opacity: 0.85;
+    transition: all 0.15s;
+}
+.preview-badge:hover {
+    background: var(--accent-green);
+    color: #fff;
+    opacity: 1;
+}
+.new-badge {
+    font-size: 0.6rem;
+    font-weight: 600;
+    letter-spacing: 0.03em;
+    color: var(--accent-red);
+    border: 1px solid var(--accent-red);
+    padding: 0.1rem 0.35rem;
+    border-radius: 3px;
+    margin-left: 0.4rem;
+    vertical-align: middle;
+    display: inline-block;
+    line-height: 1;
+    opacity: 0.85;
     pointer-events: none;
-    user-select: none;
-    -webkit-user-drag: none;
-}}
-@media (max-width: 768px) {{
-    html {{ font-size: 16px; }}
-    .toolbar {{ flex-direction: column; align-items: flex-start; }}
-}}
-</style>
-</head>
-<body>
-<div class="container">
-    <div class="toolbar">
-        <div class="file-info">
-            <h1>🖼️ {html.escape(filename)}</h1>
-            <div class="file-meta">
-                <span>📏 {file_size}</span>
-                <span>🎨 {ext.lstrip(".").upper()}</span>
-            </div>
-        </div>
-        <div class="toolbar-actions">
-            <div class="zoom-controls">
-                <button class="zoom-btn" onclick="zoomBy(1/1.25)" title="Zoom out">−</button>
-                <span class="zoom-label" id="zoomLabel">100%</span>
-                <button class="zoom-btn" onclick="zoomBy(1.25)" title="Zoom in">+</button>
-                <button class="zoom-btn" onclick="resetZoom()" title="Reset (double-click image)">⟲</button>
-            </div>
-            <a href="./" class="btn">← Back</a>
-            <button class="btn" onclick="toggleTheme()"><span id="themeIcon">🌙</span></button>
-            <a href="{img_url}" class="btn btn-primary" download>⬇️ Download</a>
-        </div>
-    </div>
-    <div class="image-container" id="imgContainer">
-        <img src="{img_url}" alt="{html.escape(filename)}" id="previewImg"
-             onload="onImageLoad(this)">
-    </div>
-</div>
-<script>
-let scale = 1, tx = 0, ty = 0;
-let dragging = false, lastX = 0, lastY = 0;
-let pinchDist = 0;
-const MIN_SCALE = 0.05, MAX_SCALE = 20;
+}
+.folder-badge {
+    font-size: 0.6rem;
+    font-weight: 600;
+    letter-spacing: 0.03em;
+    color: var(--accent-yellow);
+    border: 1px solid var(--accent-yellow);
+    padding: 0.1rem 0.35rem;
+    border-radius: 3px;
+    margin-left: 0.4rem;
+    vertical-align: middle;
+    display: inline-block;
+    line-height: 1;
+    opacity: 0.85;
+    pointer-events: none;
+}
+.file-actions {
+    display: flex;
+    align-items: center;
+    gap: 0.4rem;
+    padding-right: 0.5rem;
+}
+.action-btn {
+    padding: 0.25rem 0.5rem;
+    font-size: 0.75rem;
+    border: 1px solid var(--border-color);
+    border-radius: 4px;
+    background: var(--bg-tertiary);
+    color: var(--text-primary);
+    cursor: pointer;
+    text-decoration: none;
+    transition: all 0.15s;
+    display: inline-flex;
+    align-items: center;
+    gap: 0.2rem;
+}
+.action-btn:hover {
+    background: var(--hover-bg);
+    border-color: var(--accent-blue);
+}
+.action-btn.delete {
+    color: var(--accent-red);
+}
+.action-btn.delete:hover {
+    background: var(--accent-red);
+    color: #fff;
+    border-color: var(--accent-red);
+}
 
-const img = document.getElementById('previewImg');
-const container = document.getElementById('imgContainer');
-const zoomLabel = document.getElementById('zoomLabel');
+/* Modal */
+.modal-overlay {
+    display: none;
+    position: fixed;
+    top: 0;
+    left: 0;
+    right: 0;
+    bottom: 0;
+    background: rgba(0,0,0,0.5);
+    z-index: 1000;
+    justify-content: center;
+    align-items: center;
+}
+.modal-overlay.show { display: flex; }
+.modal {
+    background: var(--bg-secondary);
+    border: 1px solid var(--border-color);
+    border-radius: 8px;
+    padding: 1.5rem;
+    max-width: 400px;
+    width: 90%;
+}
+.modal h3 {
+    margin-bottom: 1rem;
+    color: var(--accent-red);
+}
+.modal p {
+    margin-bottom: 1rem;
+    color: var(--text-secondary);
+    word-break: break-all;
+}
+.modal-actions {
+    display: flex;
+    gap: 0.5rem;
+    justify-content: flex-end;
+}
+.modal-btn {
+    padding: 0.5rem 1rem;
+    border-radius: 6px;
+    border: 1px solid var(--border-color);
+    cursor: pointer;
+    font-size: 0.85rem;
+    font-weight: 500;
+}
+.modal-btn.cancel {
+    background: var(--bg-tertiary);
+    color: var(--text-primary);
+}
+.modal-btn.confirm {
+    background: var(--accent-red);
+    color: #fff;
+    border-color: var(--accent-red);
+}
+.modal-btn:hover { opacity: 0.9; }
 
-function applyTransform(animate) {{
-    img.style.transition = animate ? 'transform 0.2s ease-out' : 'none';
-    img.style.transform = `translate(${{tx}}px, ${{ty}}px) scale(${{scale}})`;
-    zoomLabel.textContent = Math.round(scale * 100) + '%';
-}}
+/* Empty State */
+.empty-state {
+    padding: 3rem;
+    text-align: center;
+    color: var(--text-secondary);
+}
 
-function zoomAt(cx, cy, factor) {{
-    const newScale = Math.max(MIN_SCALE, Math.min(MAX_SCALE, scale * factor));
-    const ratio = newScale / scale;
-    tx = cx - ratio * (cx - tx);
-    ty = cy - ratio * (cy - ty);
-    scale = newScale;
-    applyTransform(false);
-}}
+/* Footer */
+footer {
+    margin-top: 1.5rem;
+    padding: 1rem;
+    text-align: center;
+    font-size: 0.75rem;
+    color: var(--text-secondary);
+}
 
-function zoomBy(factor) {{
-    zoomAt(0, 0, factor);
-    applyTransform(true);
-}}
+/* Responsive */
+@media (max-width: 768px) {
+    html { font-size: 16px; }
+    .file-item {
+        grid-template-columns: 1fr;
+        gap: 0.25rem;
+    }
+    .file-size, .file-date {
+        font-size: 0.8rem;
+        padding-left: 1.85rem;
+    }
+    .file-actions {
+        padding-left: 1.85rem;
+        margin-top: 0.25rem;
+    }
+    .progress-stats {
+        grid-template-columns: repeat(2, 1fr);
+    }
+}
+"""
 
-function resetZoom() {{
-    scale = 1; tx = 0; ty = 0;
-    applyTransform(true);
-}}
+LISTING_JS = """
+var uploadZone = document.getElementById('uploadZone');
+var fileInput = document.getElementById('fileInput');
+var progressContainer = document.getElementById('progressContainer');
 
-container.addEventListener('wheel', (e) => {{
-    e.preventDefault();
-    const rect = container.getBoundingClientRect();
-    const cx = e.clientX - rect.left - rect.width / 2;
-    const cy = e.clientY - rect.top - rect.height / 2;
-    zoomAt(cx, cy, e.deltaY < 0 ? 1.12 : 1 / 1.12);
-}}, {{ passive: false }});
+function formatBytes(bytes) {
+    if (bytes === 0) return '0 B';
+    var k = 1024;
+    var sizes = ['B', 'KB', 'MB', 'GB'];
+    var i = Math.floor(Math.log(bytes) / Math.log(k));
+    return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
+}
 
-container.addEventListener('mousedown', (e) => {{
-    dragging = true;
-    lastX = e.clientX; lastY = e.clientY;
-    container.classList.add('dragging');
-}});
+function formatTime(seconds) {
+    if (!isFinite(seconds) || seconds < 0) return '-';
+    if (seconds < 60) return Math.round(seconds) + 's';
+    if (seconds < 3600) return Math.round(seconds / 60) + 'm ' + Math.round(seconds % 60) + 's';
+    return Math.floor(seconds / 3600) + 'h ' + Math.round((seconds % 3600) / 60) + 'm';
+}
 
-document.addEventListener('mousemove', (e) => {{
-    if (!dragging) return;
-    tx += e.clientX - lastX;
-    ty += e.clientY - lastY;
-    lastX = e.clientX; lastY = e.clientY;
-    applyTransform(false);
-}});
+function updatePasteStatus(message, isError) {
+    var status = document.getElementById('pasteStatus');
+    if (!status) return;
+    status.textContent = message || '';
+    status.style.color = isError ? 'var(--accent-red)' : 'var(--text-secondary)';
+}
 
-document.addEventListener('mouseup', () => {{
-    dragging = false;
-    container.classList.remove('dragging');
-}});
+function togglePastebin() {
+    var section = document.getElementById('pasteSection');
+    var toggle = document.getElementById('pasteToggle');
+    if (!section || !toggle) return;
+    var collapsed = section.classList.toggle('collapsed');
+    toggle.textContent = collapsed ? 'Expand' : 'Collapse';
+}
 
-container.addEventListener('dblclick', resetZoom);
+function formatPasteTime(timestamp) {
+    if (!timestamp || timestamp <= 0) return 'never';
+    var dt = new Date(timestamp * 1000);
+    var y = dt.getFullYear();
+    var m = String(dt.getMonth() + 1).padStart(2, '0');
+    var d = String(dt.getDate()).padStart(2, '0');
+    var h = String(dt.getHours()).padStart(2, '0');
+    var min = String(dt.getMinutes()).padStart(2, '0');
+    var s = String(dt.getSeconds()).padStart(2, '0');
+    return y + '/' + m + '/' + d + ' ' + h + ':' + min + ':' + s;
+}
 
-container.addEventListener('touchstart', (e) => {{
-    if (e.touches.length === 2) {{
-        pinchDist = Math.hypot(
-            e.touches[0].clientX - e.touches[1].clientX,
-            e.touches[0].clientY - e.touches[1].clientY
-        );
-    }} else if (e.touches.length === 1) {{
-        dragging = true;
-        lastX = e.touches[0].clientX;
-        lastY = e.touches[0].clientY;
-    }}
-}}, {{ passive: true }});
+function updatePasteMeta(data) {
+    var updatedAt = document.getElementById('pasteUpdatedAt');
+    var updatedBy = document.getElementById('pasteUpdatedBy');
+    var pasteSize = document.getElementById('pasteSize');
+    if (updatedAt) updatedAt.textContent = formatPasteTime(data.updated_at);
+    if (updatedBy) updatedBy.textContent = data.updated_by || '-';
+    if (pasteSize) pasteSize.textContent = formatBytes(data.size || 0);
+}
 
-container.addEventListener('touchmove', (e) => {{
-    e.preventDefault();
-    if (e.touches.length === 2) {{
-        const dist = Math.hypot(
-            e.touches[0].clientX - e.touches[1].clientX,
-            e.touches[0].clientY - e.touches[1].clientY
-        );
-        const rect = container.getBoundingClientRect();
-        const cx = (e.touches[0].clientX + e.touches[1].clientX) / 2 - rect.left - rect.width / 2;
-        const cy = (e.touches[0].clientY + e.touches[1].clientY) / 2 - rect.top - rect.height / 2;
-        zoomAt(cx, cy, dist / pinchDist);
-        pinchDist = dist;
-    }} else if (e.touches.length === 1 && dragging) {{
-        tx += e.touches[0].clientX - lastX;
-        ty += e.touches[0].clientY - lastY;
-        lastX = e.touches[0].clientX;
-        lastY = e.touches[0].clientY;
-        applyTransform(false);
-    }}
-}}, {{ passive: false }});
+function applyPasteState(data, message) {
+    var text = document.getElementById('pasteText');
+    if (text) {
+        text.value = data.text || '';
+    }
+    updatePasteMeta(data);
+    if (message) {
+        updatePasteStatus(message, false);
+    }
+}
 
-container.addEventListener('touchend', () => {{ dragging = false; }});
+function loadPaste(showStatus) {
+    fetch('/__pastebin', { cache: 'no-store' })
+        .then(function(response) {
+            if (!response.ok) throw new Error(response.statusText || response.status);
+            return response.json();
+        })
+        .then(function(data) {
+            applyPasteState(data, showStatus ? 'Refreshed' : '');
+        })
+        .catch(function(err) {
+            updatePasteStatus('Refresh failed: ' + err.message, true);
+        });
+}
 
-function onImageLoad(img) {{
-    const meta = document.querySelector('.file-meta');
-    const span = document.createElement('span');
-    span.textContent = '📐 ' + img.naturalWidth + ' × ' + img.naturalHeight;
-    meta.appendChild(span);
-}}
+function savePaste() {
+    var text = document.getElementById('pasteText');
+    if (!text) return;
+    updatePasteStatus('Saving...', false);
+    fetch('/__pastebin', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ text: text.value })
+    })
+        .then(function(response) {
+            if (!response.ok) throw new Error(response.statusText || response.status);
+            return response.json();
+        })
+        .then(function(data) {
+            applyPasteState(data, 'Saved');
+        })
+        .catch(function(err) {
+            updatePasteStatus('Save failed: ' + err.message, true);
+        });
+}
 
-function initTheme() {{
-    const saved = localStorage.getItem('hftp-theme') || 'light';
-    applyTheme(saved);
-}}
+function clearPaste() {
+    if (!confirm('Clear shared text?')) return;
+    fetch('/__pastebin', {
+        method: 'POST',
+        headers: { 'Content-Type': 'application/json' },
+        body: JSON.stringify({ action: 'clear' })
+    })
+        .then(function(response) {
+            if (!response.ok) throw new Error(response.statusText || response.status);
+            return response.json();
+        })
+        .then(function(data) {
+            applyPasteState(data, 'Cleared');
+        })
+        .catch(function(err) {
+            updatePasteStatus('Clear failed: ' + err.message, true);
+        });
+}
 
-function toggleTheme() {{
-    const current = document.documentElement.getAttribute('data-theme') || 'light';
-    const next = current === 'dark' ? 'light' : 'dark';
-    applyTheme(next);
-    localStorage.setItem('hftp-theme', next);
-}}
+function copyPaste() {
+    var text = document.getElementById('pasteText');
+    if (!text) return;
+    var finish = function() { updatePasteStatus('Copied', false); };
+    if (navigator.clipboard && navigator.clipboard.writeText) {
+        navigator.clipboard.writeText(text.value).then(finish).catch(function() {
+            fallbackCopy(text.value, finish);
+        });
+    } else {
+        fallbackCopy(text.value, finish);
+    }
+}
 
-function applyTheme(theme) {{
-    document.documentElement.setAttribute('data-theme', theme);
-    document.getElementById('themeIcon').textContent = theme === 'dark' ? '☀️' : '🌙';
-}}
+var currentSortKey = 'name';
+var currentSortDir = 'asc';
 
-initTheme();
-setupSorting();
-</script>
-</body>
-</html>'''
+var listingBody = document.getElementById('fileListBody');
+var listingCursor = listingBody ? (listingBody.getAttribute('data-cursor') || null) : null;
+var listingPageSize = listingBody ? parseInt(listingBody.getAttribute('data-page-size') || '500', 10) : 500;
+var listingLoading = false;
 
-        encoded = html_content.encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(encoded)))
-        self.end_headers()
-        self.wfile.write(encoded)
+function listingComplete() {
+    return listingCursor === null;
+}
 
-    def serve_video_preview(self, filepath: str) -> None:
-        """Serve a browser-native video player preview page."""
-        filename = os.path.basename(filepath)
-        file_size = self._format_size(os.path.getsize(filepath))
-        ext = os.path.splitext(filename)[1].lower()
-        mime_type = VIDEO_MIME_TYPES.get(ext, "video/mp4")
-        video_url = quote(filename)
+function formatListingSize(size) {
+    if (size < 1024) return size + ' B';
+    if (size < 1024 * 1024) return (size / 1024).toFixed(1) + ' KB';
+    if (size < 1024 * 1024 * 1024) return (size / (1024 * 1024)).toFixed(1) + ' MB';
+    return (size / (1024 * 1024 * 1024)).toFixed(2) + ' GB';
+}
 
-        html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="utf-8">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>{html.escape(filename)} - Preview</title>
-<script>(function(){{const t=localStorage.getItem('hftp-theme')||'light';document.documentElement.setAttribute('data-theme',t);}})();</script>
-<style>
-:root {{
-    --bg-primary: #ffffff;
-    --bg-secondary: #f6f8fa;
-    --bg-tertiary: #eaeef2;
-    --border-color: #d0d7de;
-    --text-primary: #1f2328;
-    --text-secondary: #656d76;
-    --accent-green: #1a7f37;
-    --hover-bg: rgba(208, 215, 222, 0.32);
-}}
-[data-theme="dark"] {{
-    --bg-primary: #0d1117;
-    --bg-secondary: #161b22;
-    --bg-tertiary: #21262d;
-    --border-color: #30363d;
-    --text-primary: #c9d1d9;
-    --text-secondary: #8b949e;
-    --accent-green: #3fb950;
-    --hover-bg: rgba(48, 54, 61, 0.5);
-}}
-* {{ box-sizing: border-box; margin: 0; padding: 0; }}
-html {{ font-size: 18px; }}
-body {{
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
-    background: var(--bg-primary);
-    color: var(--text-primary);
-    min-height: 100vh;
-    display: flex;
-    flex-direction: column;
-    transition: background 0.3s, color 0.3s;
-}}
-.container {{
-    max-width: 1400px;
-    margin: 0 auto;
-    padding: 1.5rem;
-    flex: 1;
-    display: flex;
-    flex-direction: column;
-    gap: 1rem;
-}}
-.toolbar {{
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 8px;
-    padding: 0.75rem 1rem;
-    display: flex;
-    justify-content: space-between;
-    align-items: center;
-    flex-wrap: wrap;
-    gap: 0.75rem;
-}}
-.file-info {{ display: flex; align-items: center; gap: 1rem; flex-wrap: wrap; }}
-.file-info h1 {{ font-size: 1rem; font-weight: 600; }}
-.file-meta {{
-    display: flex;
-    gap: 1rem;
-    font-size: 0.8rem;
-    color: var(--text-secondary);
-}}
-.toolbar-actions {{ display: flex; gap: 0.5rem; }}
-.btn {{
-    padding: 0.4rem 0.75rem;
-    font-size: 0.8rem;
-    font-weight: 500;
-    border: 1px solid var(--border-color);
-    border-radius: 6px;
-    background: var(--bg-tertiary);
-    color: var(--text-primary);
-    cursor: pointer;
-    text-decoration: none;
-    display: inline-flex;
-    align-items: center;
-    gap: 0.25rem;
-    transition: all 0.15s;
-}}
-.btn:hover {{ background: var(--hover-bg); }}
-.btn-primary {{
-    background: var(--accent-green);
-    border-color: var(--accent-green);
-    color: #fff;
-}}
-.btn-primary:hover {{ opacity: 0.9; }}
-.video-container {{
-    border: 1px solid var(--border-color);
-    border-radius: 8px;
-    overflow: hidden;
-    background: #000;
-    display: flex;
-    justify-content: center;
-    align-items: center;
-}}
-video {{
-    width: 100%;
-    max-height: 80vh;
-    display: block;
-    outline: none;
-}}
-@media (max-width: 768px) {{
-    html {{ font-size: 16px; }}
-    .toolbar {{ flex-direction: column; align-items: flex-start; }}
-}}
-</style>
-</head>
-<body>
-<div class="container">
-    <div class="toolbar">
-        <div class="file-info">
-            <h1>🎬 {html.escape(filename)}</h1>
-            <div class="file-meta">
-                <span>📏 {file_size}</span>
-                <span>🎞️ {ext.lstrip(".").upper()}</span>
-                <span id="durInfo"></span>
-            </div>
-        </div>
-        <div class="toolbar-actions">
-            <a href="./" class="btn">← Back</a>
-            <button class="btn" onclick="toggleTheme()"><span id="themeIcon">🌙</span></button>
-            <a href="{video_url}" class="btn btn-primary" download>⬇️ Download</a>
-        </div>
-    </div>
-    <div class="video-container">
-        <video controls preload="metadata" id="videoPlayer">
-            <source src="{video_url}" type="{mime_type}">
-        </video>
-    </div>
-</div>
-<script>
-function initTheme() {{
-    const saved = localStorage.getItem('hftp-theme') || 'light';
-    applyTheme(saved);
-}}
+function formatListingDate(mtime) {
+    if (!mtime) return '-';
+    var d = new Date(mtime * 1000);
+    var pad = function(v) { return String(v).padStart(2, '0'); };
+    return d.getFullYear() + '-' + pad(d.getMonth() + 1) + '-' + pad(d.getDate()) +
+        ' ' + pad(d.getHours()) + ':' + pad(d.getMinutes());
+}
 
-function toggleTheme() {{
-    const current = document.documentElement.getAttribute('data-theme') || 'light';
-    const next = current === 'dark' ? 'light' : 'dark';
-    applyTheme(next);
-    localStorage.setItem('hftp-theme', next);
-}}
+function createListingElement(tag, className, text) {
+    var el = document.createElement(tag);
+    if (className) el.className = className;
+    if (text !== undefined) el.textContent = text;
+    return el;
+}
 
-function applyTheme(theme) {{
-    document.documentElement.setAttribute('data-theme', theme);
-    document.getElementById('themeIcon').textContent = theme === 'dark' ? '☀️' : '🌙';
-}}
+function createListingRow(entry) {
+    var row = createListingElement('div', 'file-item');
+    row.setAttribute('data-name', entry.name);
+    row.setAttribute('data-size', entry.is_dir ? '0' : String(entry.size));
+    row.setAttribute('data-mtime', String(entry.mtime));
+    row.setAttribute('data-type', entry.is_dir ? 'dir' : 'file');
+
+    var nameCell = createListingElement('div', 'file-name');
+    if (entry.thumb) {
+        var thumb = createListingElement('img', 'file-thumb');
+        thumb.src = entry.thumb;
+        thumb.loading = 'lazy';
+        thumb.alt = '';
+        nameCell.appendChild(thumb);
+    }
+    var link = createListingElement('a', '', entry.name);
+    link.href = entry.url;
+    nameCell.appendChild(link);
+    if (entry.is_dir) {
+        nameCell.appendChild(createListingElement('span', 'folder-badge', 'DIR'));
+    } else {
+        link.target = '_blank';
+        link.rel = 'noopener noreferrer';
+        if (entry.previewable) {
+            var view = createListingElement('a', 'preview-badge', 'VIEW');
+            view.href = entry.url + '?preview=1';
+            nameCell.appendChild(view);
+        }
+        if (entry.is_new) {
+            nameCell.appendChild(createListingElement('span', 'new-badge', 'NEW'));
+        }
+    }
+    row.appendChild(nameCell);
+    row.appendChild(createListingElement('div', 'file-size', entry.is_dir ? '-' : formatListingSize(entry.size)));
+    row.appendChild(createListingElement('div', 'file-date', formatListingDate(entry.mtime)));
+
+    var actions = createListingElement('div', 'file-actions');
+    if (!entry.is_dir) {
+        var download = createListingElement('a', 'action-btn', 'Download');
+        download.href = entry.url;
+        download.setAttribute('download', '');
+        actions.appendChild(download);
+    }
+    var del = createListingElement('button', 'action-btn delete', 'Delete');
+    del.addEventListener('click', function() {
+        confirmDelete(entry.url, entry.is_dir, entry.name + (entry.is_dir ? '/' : ''));
+    });
+    actions.appendChild(del);
+    row.appendChild(actions);
+    return row;
+}
 
-document.getElementById('videoPlayer').addEventListener('loadedmetadata', function() {{
-    const dur = this.duration;
-    if (isFinite(dur)) {{
-        const h = Math.floor(dur / 3600);
-        const m = Math.floor((dur % 3600) / 60);
-        const s = Math.floor(dur % 60);
-        const parts = h > 0 ? [h, m, s] : [m, s];
-        const fmt = parts.map((v, i) => (i > 0 ? String(v).padStart(2, '0') : v)).join(':');
-        document.getElementById('durInfo').textContent = '⏱ ' + fmt;
-    }}
-    const w = this.videoWidth, h = this.videoHeight;
-    if (w && h) {{
-        document.querySelector('.file-meta').innerHTML +=
-            '<span>📐 ' + w + ' × ' + h + '</span>';
-    }}
-}});
+function loadMoreRows(reset) {
+    if (!listingBody || listingLoading || (!reset && listingComplete())) return;
+    listingLoading = true;
+    var cursor = reset ? '' : listingCursor;
+    var url = '?format=json&sort=' + encodeURIComponent(currentSortKey) +
+        '&order=' + encodeURIComponent(currentSortDir) +
+        '&cursor=' + encodeURIComponent(cursor) + '&limit=' + listingPageSize;
+    fetch(url, { cache: 'no-store' }).then(function(response) {
+        if (!response.ok) throw new Error(response.statusText);
+        return response.json();
+    }).then(function(data) {
+        if (reset) {
+            var rows = listingBody.querySelectorAll('.file-item:not([data-up="1"])');
+            for (var i = 0; i < rows.length; i += 1) {
+                rows[i].remove();
+            }
+        }
+        var fragment = document.createDocumentFragment();
+        for (var j = 0; j < data.entries.length; j += 1) {
+            fragment.appendChild(createListingRow(data.entries[j]));
+        }
+        listingBody.appendChild(fragment);
+        listingCursor = data.next_cursor;
+        listingLoading = false;
+        updateSortIndicators();
+        var sentinel = document.getElementById('listingSentinel');
+        if (sentinel && sentinel.getBoundingClientRect().top < window.innerHeight + 600) {
+            loadMoreRows(false);
+        }
+    }).catch(function() {
+        listingLoading = false;
+    });
+}
 
-initTheme();
-</script>
-</body>
-</html>'''
+function setupListingLoader() {
+    var sentinel = document.getElementById('listingSentinel');
+    if (!sentinel || listingComplete() || !('IntersectionObserver' in window)) return;
+    var observer = new IntersectionObserver(function(observed) {
+        if (observed[0].isIntersecting) loadMoreRows(false);
+    }, { rootMargin: '600px' });
+    observer.observe(sentinel);
+}
 
-        encoded = html_content.encode("utf-8")
-        self.send_response(200)
-        self.send_header("Content-type", "text/html; charset=utf-8")
-        self.send_header("Content-Length", str(len(encoded)))
-        self.end_headers()
-        self.wfile.write(encoded)
+function applySort() {
+    if (!listingComplete()) {
+        // Only part of the directory is loaded: let the server sort and restart paging.
+        loadMoreRows(true);
+        return;
+    }
+    var container = document.getElementById('fileListBody');
+    if (!container) return;
+    var nodeList = container.getElementsByClassName('file-item');
+    if (!nodeList || nodeList.length === 0) return;
 
-    def do_PUT(self) -> None:
-        """Handle PUT requests for pastebin updates or file uploads."""
-        parsed = urlparse(self.path)
-        if parsed.path == PASTEBIN_ENDPOINT:
-            self._handle_pastebin_put()
-            return
+    var upItem = null;
+    var items = [];
+    for (var idx = 0; idx < nodeList.length; idx += 1) {
+        var el = nodeList[idx];
+        if (el.getAttribute('data-up') === '1') {
+            upItem = el;
+        } else {
+            items.push(el);
+        }
+    }
 
-        path = self.translate_path(self.path)
-        if path.endswith("/"):
-            access_log(self, "upload", "400")
-            self.send_error(400, "Cannot PUT to directory")
-            return
+    items.sort(function(a, b) {
+        var typeA = a.getAttribute('data-type') || 'file';
+        var typeB = b.getAttribute('data-type') || 'file';
 
-        action = "upload"
-        try:
-            length = int(self.headers["Content-Length"])
-            result = UPLOAD_COORDINATOR.write_stream(path, self.rfile, length)
-            action = "modify" if result.existed else "upload"
+        if (typeA !== typeB) {
+            return typeA === 'dir' ? -1 : 1;
+        }
 
-            NEW_FILE_TRACKER.register(path)
-            self.send_response(201)
-            self.end_headers()
-            access_log(self, action, "201", path)
-            debug("File uploaded via PUT", path=path)
-        except Exception as e:
-            access_log(self, action, "500", path)
-            debug("PUT error", error=str(e))
-            self.send_error(500, str(e))
+        if (currentSortKey === 'name') {
+            var nameA = (a.getAttribute('data-name') || '').toLowerCase();
+            var nameB = (b.getAttribute('data-name') || '').toLowerCase();
+            if (nameA < nameB) return currentSortDir === 'asc' ? -1 : 1;
+            if (nameA > nameB) return currentSortDir === 'asc' ? 1 : -1;
+            return 0;
+        }
 
-    def translate_path(self, path: str) -> str:
-        """Convert URL path to filesystem path, constrained to server root."""
-        path = unquote(path)
-        path = path.lstrip("/")
-        root = self.server.root_dir
-        joined = os.path.join(root, path)
-        resolved = os.path.realpath(joined)
+        if (currentSortKey === 'size') {
+            var sizeA = parseFloat(a.getAttribute('data-size') || '0');
+            var sizeB = parseFloat(b.getAttribute('data-size') || '0');
+            if (sizeA === sizeB) return 0;
+            return currentSortDir === 'asc' ? sizeA - sizeB : sizeB - sizeA;
+        }
 
-        if resolved == root:
-            return resolved
+        if (currentSortKey === 'mtime') {
+            var mA = parseFloat(a.getAttribute('data-mtime') || '0');
+            var mB = parseFloat(b.getAttribute('data-mtime') || '0');
+            if (mA === mB) return 0;
+            return currentSortDir === 'asc' ? mA - mB : mB - mA;
+        }
 
-        try:
-            common = os.path.commonpath([resolved, root])
-        except ValueError:
-            common = None
+        return 0;
+    });
 
-        if common == root:
-            return resolved
+    container.innerHTML = '';
+    if (upItem) {
+        container.appendChild(upItem);
+    }
+    for (var i = 0; i < items.length; i += 1) {
+        container.appendChild(items[i]);
+    }
 
-        current = joined
-        while True:
-            if os.path.islink(current):
-                return resolved
-            parent = os.path.dirname(current)
-            if parent == current or not parent.startswith(root):
-                break
-            current = parent
+    updateSortIndicators();
+}
 
-        return root
+function updateSortIndicators() {
+    var headers = document.getElementsByClassName('file-list-header-cell');
+    for (var j = 0; j < headers.length; j += 1) {
+        var btn = headers[j];
+        var key = btn.getAttribute('data-sort-key');
+        var indicator = btn.querySelector('.sort-indicator');
+        if (key === currentSortKey) {
+            btn.classList.add('active');
+            if (indicator) {
+                indicator.textContent = currentSortDir === 'asc' ? '▲' : '▼';
+            }
+        } else {
+            btn.classList.remove('active');
+            if (indicator) {
+                indicator.textContent = '';
+            }
+        }
+    }
+}
 
-    def _translate_path_for_read(self, url_path: str) -> str:
-        """
-        Convert URL path to filesystem path for read-only operations.
+function setupSorting() {
+    var headers = document.getElementsByClassName('file-list-header-cell');
+    for (var i = 0; i < headers.length; i += 1) {
+        headers[i].addEventListener('click', function() {
+            var key = this.getAttribute('data-sort-key');
+            if (!key) return;
+            if (currentSortKey === key) {
+                currentSortDir = currentSortDir === 'asc' ? 'desc' : 'asc';
+            } else {
+                currentSortKey = key;
+                currentSortDir = 'asc';
+            }
+            applySort();
+        });
+    }
+    if (listingComplete()) {
+        applySort();
+    } else {
+        updateSortIndicators();
+    }
+}
 
-        This translation blocks '..' traversal but intentionally does not resolve symlinks.
-        It enables serving symlink entries that point outside the server root while keeping
-        URL-path traversal constrained to the root.
-        """
-        path = unquote(url_path)
-        path = path.split("?", 1)[0].split("#", 1)[0]
-        path = path.lstrip("/")
-        root = self.server.root_dir
-
-        normalized = os.path.normpath(path)
-        if normalized in (".", ""):
-            return root
-        if normalized.startswith("..") or os.path.isabs(normalized):
-            return root
-        return os.path.join(root, normalized)
+var activeUpload = false;
+var queuedUploads = [];
 
-    def _fs_path_to_url_path(self, fs_path: str, trailing_slash: bool = False) -> str:
-        """Convert filesystem path under root to URL path (avoids symlink duplication)."""
-        root = self.server.root_dir
-        try:
-            rel = os.path.relpath(fs_path, root)
-        except ValueError:
-            return "/"
-        if rel == "." or rel.startswith(".."):
-            return "/"
-        parts = rel.replace(os.sep, "/").split("/")
-        parts = [p for p in parts if p]
-        url = "/" + "/".join(quote(p) for p in parts)
-        if trailing_slash and os.path.isdir(fs_path):
-            url += "/"
-        return url
+function updateBatchProgress(label, percent, loaded, totalSize, speed, remaining) {
+    progressContainer.classList.add('active');
+    document.getElementById('fileName').textContent = label;
+    document.getElementById('progressFill').style.width = percent + '%';
+    document.getElementById('progressPercent').textContent = percent + '%';
+    document.getElementById('uploadedSize').textContent = formatBytes(loaded);
+    document.getElementById('totalSize').textContent = formatBytes(totalSize);
+    document.getElementById('uploadSpeed').textContent = speed;
+    document.getElementById('timeRemaining').textContent = remaining;
+}
 
-    def log_message(self, format, *args):
-        """Override to reduce console noise"""
-        if DEBUG_MODE:
-            super().log_message(format, *args)
+function uploadBatch(files, basePath, onProgress) {
+    return new Promise(function(resolve, reject) {
+        const xhr = new XMLHttpRequest();
+        const formData = new FormData();
+        files.forEach(function(file) {
+            formData.append('file', file, file.name);
+        });
 
-    def list_directory(self, path: str) -> Optional[io.BytesIO]:
-        """Generate directory listing HTML page"""
-        try:
-            file_list = os.listdir(path)
-        except OSError:
-            self.send_error(404, "No permission to list directory")
-            return None
+        let lastLoaded = 0;
+        let lastTime = Date.now();
+        let smoothedSpeed = 0;
+        let speedText = '-';
+        let remainingText = '-';
 
-        entries: list[tuple[str, bool]] = []
-        for name in file_list:
-            fullname = os.path.join(path, name)
-            is_dir = os.path.isdir(fullname)
-            entries.append((name, is_dir))
+        xhr.upload.addEventListener('progress', function(e) {
+            if (e.lengthComputable) {
+                const percent = Math.round((e.loaded / e.total) * 100);
+                const now = Date.now();
+                const timeDiff = (now - lastTime) / 1000;
+                if (timeDiff >= 0.25) {
+                    const byteDiff = e.loaded - lastLoaded;
+                    const measuredSpeed = byteDiff / timeDiff;
+                    if (measuredSpeed > 0) {
+                        smoothedSpeed = smoothedSpeed > 0
+                            ? smoothedSpeed * 0.7 + measuredSpeed * 0.3
+                            : measuredSpeed;
+                        speedText = formatBytes(smoothedSpeed) + '/s';
+                    }
+                    lastLoaded = e.loaded;
+                    lastTime = now;
+                }
+                remainingText = smoothedSpeed > 0
+                    ? formatTime((e.total - e.loaded) / smoothedSpeed)
+                    : '-';
+                onProgress(e.loaded, e.total, speedText, remainingText);
+            }
+        });
 
-        entries.sort(key=lambda item: item[0].lower())
+        xhr.addEventListener('load', function() {
+            if (xhr.status >= 200 && xhr.status < 300) {
+                resolve();
+            } else {
+                reject(new Error(xhr.status + ' ' + (xhr.statusText || 'upload failed')));
+            }
+        });
 
-        displaypath = unquote(self.path)
-        enc = sys.getfilesystemencoding()
-        title = f"{PORTAL_NAME} - Directory: {displaypath}"
-        paste_snapshot = PASTEBIN.snapshot()
-        paste_text = html.escape(paste_snapshot["text"])
-        paste_size = self._format_size(paste_snapshot["size"])
-        paste_updated = self._format_paste_time(paste_snapshot["updated_at"])
-        paste_updated_by = html.escape(paste_snapshot["updated_by"] or "-")
+        xhr.addEventListener('error', function() {
+            reject(new Error('network error'));
+        });
 
-        html_content = f'''<!DOCTYPE html>
-<html lang="en">
-<head>
-<meta charset="{enc}">
-<meta name="viewport" content="width=device-width, initial-scale=1.0">
-<title>{title}</title>
-<script>(function(){{const t=localStorage.getItem('hftp-theme')||'light';document.documentElement.setAttribute('data-theme',t);}})();</script>
-<style>
-:root {{
-    --bg-primary: #ffffff;
-    --bg-secondary: #f6f8fa;
-    --bg-tertiary: #eaeef2;
-    --border-color: #d0d7de;
-    --text-primary: #1f2328;
-    --text-secondary: #656d76;
-    --accent-blue: #0969da;
-    --accent-green: #1a7f37;
-    --accent-yellow: #9a6700;
-    --accent-purple: #8250df;
-    --accent-red: #cf222e;
-    --hover-bg: rgba(208, 215, 222, 0.32);
-    --header-bg: #e8f1fb;
-    --header-border: #8fbbe8;
-}}
-[data-theme="dark"] {{
-    --bg-primary: #0d1117;
-    --bg-secondary: #161b22;
-    --bg-tertiary: #21262d;
-    --border-color: #30363d;
-    --text-primary: #c9d1d9;
-    --text-secondary: #8b949e;
-    --accent-blue: #58a6ff;
-    --accent-green: #3fb950;
-    --accent-yellow: #d29922;
-    --accent-purple: #a371f7;
-    --accent-red: #f85149;
-    --hover-bg: rgba(48, 54, 61, 0.5);
-    --header-bg: #1b2a3a;
-    --header-border: #3974a8;
-}}
-* {{ box-sizing: border-box; margin: 0; padding: 0; }}
-html {{ font-size: 18px; }}
-body {{
-    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', 'Noto Sans', Helvetica, Arial, sans-serif;
-    background: var(--bg-primary);
-    color: var(--text-primary);
-    line-height: 1.6;
-    min-height: 100vh;
-    transition: background 0.3s, color 0.3s;
-}}
-.container {{
-    max-width: 1400px;
-    margin: 0 auto;
-    padding: 1.5rem;
-}}
-header {{
-    background: var(--header-bg);
-    border: 1px solid var(--header-border);
-    border-radius: 8px;
-    padding: 1rem 1.25rem;
-    margin-bottom: 1rem;
-    position: sticky;
-    top: 0.75rem;
-    z-index: 10;
-    display: flex;
-    justify-content: space-between;
-    align-items: flex-start;
-    flex-wrap: wrap;
-    gap: 1rem;
-}}
-.header-left {{
-    flex: 1;
-}}
-header h1 {{
-    font-size: 1.25rem;
-    font-weight: 600;
-    color: var(--text-primary);
-    display: flex;
-    align-items: center;
-    gap: 0.5rem;
-}}
-.breadcrumb {{
-    margin-top: 0.5rem;
-    font-size: 0.875rem;
-    color: var(--text-secondary);
-}}
-.breadcrumb a {{
-    color: var(--accent-blue);
-    text-decoration: none;
-}}
-.breadcrumb a:hover {{ text-decoration: underline; }}
+        xhr.open('POST', basePath, true);
+        xhr.send(formData);
+    });
+}
 
-/* Theme Toggle */
-.theme-toggle {{
-    display: flex;
-    align-items: center;
-    gap: 0.5rem;
-    padding: 0.5rem 0.75rem;
-    background: var(--bg-tertiary);
-    border: 1px solid var(--border-color);
-    border-radius: 6px;
-    cursor: pointer;
-    font-size: 0.875rem;
-    color: var(--text-primary);
-    transition: all 0.2s;
-}}
-.theme-toggle:hover {{ background: var(--hover-bg); }}
-.theme-toggle .icon {{ font-size: 1rem; }}
+function uploadFiles(files) {
+    if (!files || files.length === 0) return;
+    const validFiles = files.filter(function(file) {
+        return file && typeof file.name === 'string';
+    });
+    if (validFiles.length === 0) return;
+    queuedUploads.push(validFiles);
+    if (activeUpload) return;
+    uploadNextBatch();
+}
 
-/* Upload Section */
-.upload-section {{
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 8px;
-    padding: 1.25rem;
-    margin-bottom: 1rem;
-}}
-.upload-title {{
-    font-size: 0.9rem;
-    font-weight: 600;
-    margin-bottom: 0.75rem;
-    display: flex;
-    align-items: center;
-    gap: 0.5rem;
-}}
-.upload-title .icon {{ color: var(--accent-green); }}
-.upload-zone {{
-    border: 2px dashed var(--border-color);
-    border-radius: 8px;
-    padding: 2rem;
-    text-align: center;
-    transition: all 0.2s;
-    cursor: pointer;
-}}
-.upload-zone:hover, .upload-zone.dragover {{
-    border-color: var(--accent-blue);
-    background: var(--hover-bg);
-}}
-.upload-zone input[type="file"] {{ display: none; }}
-.upload-zone p {{
-    color: var(--text-secondary);
-    font-size: 0.9rem;
-    margin-bottom: 0.75rem;
-}}
-.upload-zone .btn {{
-    display: inline-block;
-    padding: 0.5rem 1rem;
-    background: var(--accent-green);
-    color: #fff;
-    border: none;
-    border-radius: 6px;
-    font-size: 0.9rem;
-    font-weight: 500;
-    cursor: pointer;
-    transition: opacity 0.2s;
-}}
-.upload-zone .btn:hover {{ opacity: 0.9; }}
+function uploadNextBatch() {
+    const files = queuedUploads.shift();
+    if (!files || files.length === 0) {
+        activeUpload = false;
+        return;
+    }
 
-/* Pastebin Section */
-.paste-section {{
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 8px;
-    padding: 1.25rem;
-    margin-bottom: 1rem;
-}}
-.paste-section.collapsed .paste-header {{
-    margin-bottom: 0;
-}}
-.paste-section.collapsed .paste-body {{
-    display: none;
-}}
-.paste-header {{
+    activeUpload = true;
+    const basePath = (window.location.pathname || '/').replace(/\\/$/, '') + '/';
+    const total = files.length;
+    const totalSize = files.reduce(function(size, file) {
+        return size + file.size;
+    }, 0);
+    const label = total > 1 ? 'Uploading ' + total + ' files' : files[0].name;
+    updateBatchProgress(label, 0, 0, totalSize, '-', '-');
+    uploadBatch(files, basePath, function(loaded, requestSize, speed, remaining) {
+        const uploadedSize = requestSize > 0
+            ? Math.min(totalSize, Math.round((loaded / requestSize) * totalSize))
+            : 0;
+        const percent = totalSize > 0 ? Math.round((uploadedSize / totalSize) * 100) : 100;
+        updateBatchProgress(label, percent, uploadedSize, totalSize, speed, remaining);
+    })
+        .then(function() {
+            updateBatchProgress(label, 100, totalSize, totalSize, '-', '0s');
+            document.getElementById('progressPercent').textContent = 'Complete!';
+            if (queuedUploads.length > 0) {
+                uploadNextBatch();
+            } else {
+                activeUpload = false;
+                setTimeout(function() { location.reload(); }, 800);
+            }
+        })
+        .catch(function(err) {
+            activeUpload = false;
+            queuedUploads = [];
+            document.getElementById('progressPercent').textContent = 'Failed';
+            document.getElementById('uploadSpeed').textContent = '-';
+            document.getElementById('timeRemaining').textContent = 'Select files to retry';
+            alert('Upload failed: ' + err.message);
+        });
+}
+
+uploadZone.addEventListener('dragover', function(e) {
+    e.preventDefault();
+    uploadZone.classList.add('dragover');
+});
+
+uploadZone.addEventListener('dragleave', function(e) {
+    e.preventDefault();
+    uploadZone.classList.remove('dragover');
+});
+
+uploadZone.addEventListener('drop', function(e) {
+    e.preventDefault();
+    uploadZone.classList.remove('dragover');
+    const files = e.dataTransfer.files;
+    if (files.length > 0) uploadFiles(Array.from(files));
+});
+
+document.addEventListener('paste', function(e) {
+    if (!e.clipboardData || !e.clipboardData.items) {
+        return;
+    }
+    var items = e.clipboardData.items;
+    var files = [];
+    var ts = Date.now();
+    for (var i = 0; i < items.length; i += 1) {
+        var item = items[i];
+        if (item.kind === 'file') {
+            var file = item.getAsFile();
+            if (file) {
+                var name = file.name || '';
+                var dotIndex = name.lastIndexOf('.');
+                var base = dotIndex > 0 ? name.slice(0, dotIndex) : name;
+                var ext = dotIndex > 0 ? name.slice(dotIndex) : '';
+
+                if (base === 'image' && (ext === '.png' || ext === '.jpg' || ext === '.jpeg')) {
+                    var newName = base + '-' + ts + '-' + i + ext;
+                    if (typeof File === 'function') {
+                        files.push(new File([file], newName, { type: file.type }));
+                    } else {
+                        file.name = newName;
+                        files.push(file);
+                    }
+                } else {
+                    files.push(file);
+                }
+            }
+        }
+    }
+    if (files.length > 0) {
+        e.preventDefault();
+        uploadFiles(files);
+    }
+});
+
+fileInput.addEventListener('change', function(e) {
+    const files = e.target.files;
+    if (files && files.length > 0) uploadFiles(Array.from(files));
+    e.target.value = '';
+});
+
+// Theme toggle
+function initTheme() {
+    const saved = localStorage.getItem('hftp-theme');
+    const theme = saved || 'light';
+    document.documentElement.setAttribute('data-theme', theme);
+    updateThemeButton(theme);
+}
+
+function toggleTheme() {
+    const current = document.documentElement.getAttribute('data-theme') || 'light';
+    const next = current === 'dark' ? 'light' : 'dark';
+    document.documentElement.setAttribute('data-theme', next);
+    localStorage.setItem('hftp-theme', next);
+    updateThemeButton(next);
+}
+
+function updateThemeButton(theme) {
+    document.getElementById('themeText').textContent = theme === 'dark' ? 'Light theme' : 'Dark theme';
+}
+
+initTheme();
+setupSorting();
+setupListingLoader();
+loadPaste(false);
+
+// Delete functionality
+let deleteTarget = '';
+let deleteIsDir = false;
+
+function confirmDelete(deleteUrl, isDir, displayName) {
+    deleteTarget = deleteUrl;
+    deleteIsDir = isDir;
+    document.getElementById('deleteFileName').textContent = displayName || deleteUrl;
+    document.getElementById('deleteDirWarning').textContent = isDir 
+        ? 'This will delete the folder and all its contents!' 
+        : '';
+    document.getElementById('deleteModal').classList.add('show');
+}
+
+function closeDeleteModal() {
+    document.getElementById('deleteModal').classList.remove('show');
+    deleteTarget = '';
+    deleteIsDir = false;
+}
+
+function executeDelete() {
+    if (!deleteTarget) return;
+    
+    const xhr = new XMLHttpRequest();
+    xhr.open('DELETE', deleteTarget, true);
+    
+    xhr.onload = function() {
+        if (xhr.status === 200 || xhr.status === 204) {
+            location.reload();
+        } else {
+            alert('Delete failed: ' + xhr.statusText);
+            closeDeleteModal();
+        }
+    };
+    
+    xhr.onerror = function() {
+        alert('Delete error occurred');
+        closeDeleteModal();
+    };
+    
+    xhr.send();
+}
+
+document.getElementById('deleteModal').addEventListener('click', function(e) {
+    if (e.target === this) closeDeleteModal();
+});
+
+function initUploadCliExamples() {
+    const base = window.location.origin.replace(/\\/+$/, '');
+    const path = (window.location.pathname || '/').replace(/\\/+$/, '') + '/file.txt';
+    const target = base + path;
+
+    window.__hftpCmds = {
+        curlPut: `curl ${target} -T file.txt`,
+        curlPutBinary: `curl ${target} -X PUT --data-binary @file.txt`,
+        wgetPut: `wget ${target} --method=PUT --body-file=file.txt`
+    };
+
+    const el1 = document.getElementById('cmdCurlPut');
+    const el2 = document.getElementById('cmdCurlPutBinary');
+    const el3 = document.getElementById('cmdWgetPut');
+    if (el1) el1.textContent = window.__hftpCmds.curlPut;
+    if (el2) el2.textContent = window.__hftpCmds.curlPutBinary;
+    if (el3) el3.textContent = window.__hftpCmds.wgetPut;
+}
+
+function initPasteCliExamples() {
+    const base = window.location.origin.replace(/\\/+$/, '');
+    const endpoint = base + '/__pastebin';
+    const rawEndpoint = endpoint + '?raw=1';
+
+    window.__hftpPasteCmds = {
+        curlGet: `curl -sS '${rawEndpoint}'`,
+        curlPut: `curl '${endpoint}' -T paste.txt`,
+        curlPipe: `echo 'STH' | curl -sS -X PUT --data-binary @- '${endpoint}'`,
+        wgetGet: `wget -qO- '${rawEndpoint}'`,
+        wgetPut: `wget -O- '${endpoint}' --method=PUT --body-file=paste.txt`,
+        wgetPipe: `echo 'STH' | sh -c 'wget --method=PUT --body-data="$(cat)" -O- "$1"' sh '${endpoint}'`
+    };
+
+    const el1 = document.getElementById('cmdPasteCurlGet');
+    const el2 = document.getElementById('cmdPasteCurlPut');
+    const el3 = document.getElementById('cmdPasteCurlPipe');
+    const el4 = document.getElementById('cmdPasteWgetGet');
+    const el5 = document.getElementById('cmdPasteWgetPut');
+    const el6 = document.getElementById('cmdPasteWgetPipe');
+    if (el1) el1.textContent = window.__hftpPasteCmds.curlGet;
+    if (el2) el2.textContent = window.__hftpPasteCmds.curlPut;
+    if (el3) el3.textContent = window.__hftpPasteCmds.curlPipe;
+    if (el4) el4.textContent = window.__hftpPasteCmds.wgetGet;
+    if (el5) el5.textContent = window.__hftpPasteCmds.wgetPut;
+    if (el6) el6.textContent = window.__hftpPasteCmds.wgetPipe;
+}
+
+function copyCmd(btn, text) {
+    const finish = () => {
+        const orig = btn.textContent;
+        btn.textContent = '✓';
+        btn.style.color = 'var(--accent-green)';
+        setTimeout(() => { btn.textContent = orig; btn.style.color = ''; }, 1500);
+    };
+    if (navigator.clipboard && navigator.clipboard.writeText) {
+        navigator.clipboard.writeText(text).then(finish).catch(() => fallbackCopy(text, finish));
+    } else {
+        fallbackCopy(text, finish);
+    }
+}
+
+function fallbackCopy(text, cb) {
+    const ta = document.createElement('textarea');
+    ta.value = text;
+    ta.style.cssText = 'position:fixed;opacity:0';
+    document.body.appendChild(ta);
+    ta.select();
+    document.execCommand('copy');
+    document.body.removeChild(ta);
+    cb();
+}
+
+// Initialize dynamic upload CLI examples on load
+initUploadCliExamples();
+initPasteCliExamples();
+"""
+
+TEXT_PREVIEW_CSS = """
+:root {
+    --bg-primary: #ffffff;
+    --bg-secondary: #f6f8fa;
+    --bg-tertiary: #eaeef2;
+    --border-color: #d0d7de;
+    --text-primary: #1f2328;
+    --text-secondary: #656d76;
+    --accent-blue: #0969da;
+    --accent-green: #1a7f37;
+    --hover-bg: rgba(208, 215, 222, 0.32);
+}
+[data-theme="dark"] {
+    --bg-primary: #0d1117;
+    --bg-secondary: #161b22;
+    --bg-tertiary: #21262d;
+    --border-color: #30363d;
+    --text-primary: #c9d1d9;
+    --text-secondary: #8b949e;
+    --accent-blue: #58a6ff;
+    --accent-green: #3fb950;
+    --hover-bg: rgba(48, 54, 61, 0.5);
+}
+* { box-sizing: border-box; margin: 0; padding: 0; }
+html { font-size: 18px; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
+    background: var(--bg-primary);
+    color: var(--text-primary);
+    line-height: 1.6;
+    transition: background 0.3s, color 0.3s;
+}
+.container {
+    max-width: 1600px;
+    margin: 0 auto;
+    padding: 1.5rem;
+}
+.toolbar {
+    background: var(--bg-secondary);
+    border: 1px solid var(--border-color);
+    border-radius: 8px 8px 0 0;
+    padding: 0.75rem 1rem;
     display: flex;
-    align-items: center;
     justify-content: space-between;
-    gap: 0.75rem;
-    margin-bottom: 0.75rem;
-    flex-wrap: wrap;
-}}
-.paste-header-left {{
-    display: flex;
     align-items: center;
-    gap: 0.75rem;
     flex-wrap: wrap;
-}}
-.paste-title {{
-    font-size: 0.9rem;
-    font-weight: 600;
-}}
-.paste-meta {{
-    display: inline-flex;
+    gap: 0.75rem;
+}
+.file-info {
+    display: flex;
     align-items: center;
-    gap: 0.35rem;
+    gap: 1rem;
     flex-wrap: wrap;
-    color: var(--text-secondary);
-    font-size: 0.78rem;
-}}
-.paste-meta-highlight {{
-    display: inline-flex;
-    align-items: center;
-    padding: 0.1rem 0.35rem;
-    border-radius: 3px;
-    font-weight: 600;
-    letter-spacing: 0.03em;
-    line-height: 1;
-    opacity: 0.9;
-}}
-.paste-meta-time {{
-    color: var(--accent-yellow);
-    border: 1px solid var(--accent-yellow);
-}}
-.paste-meta-ip {{
-    color: var(--accent-purple);
-    border: 1px solid var(--accent-purple);
-}}
-.paste-meta-size {{
-    color: var(--accent-blue);
+}
+.file-info h1 {
+    font-size: 1rem;
     font-weight: 600;
-}}
-.paste-cli {{
-    display: flex;
-    flex-direction: column;
-    gap: 6px;
-    margin-top: 0.75rem;
-}}
-.paste-command-row {{
-    display: flex;
-    align-items: center;
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 6px;
-    overflow: hidden;
-}}
-.paste-command-row code {{
-    flex: 1;
-    padding: 6px 10px;
-    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
-    font-size: 0.8em;
-    white-space: nowrap;
-    overflow-x: auto;
-    background: transparent;
-}}
-.paste-command-row button {{
-    flex-shrink: 0;
-    padding: 4px 8px;
-    background: transparent;
-    border: none;
-    border-left: 1px solid var(--border-color);
-    cursor: pointer;
-    color: var(--text-secondary);
-    font-size: 0.75em;
-}}
-.paste-editor {{
-    width: 100%;
-    min-height: 10rem;
-    resize: vertical;
-    padding: 0.75rem;
-    border: 1px solid var(--border-color);
-    border-radius: 6px;
-    background: var(--bg-primary);
-    color: var(--text-primary);
-    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
-    font-size: 0.86rem;
-    line-height: 1.5;
-}}
-.paste-editor:focus {{
-    outline: 2px solid var(--accent-blue);
-    outline-offset: 1px;
-}}
-.paste-actions {{
     display: flex;
     align-items: center;
     gap: 0.5rem;
-    margin-top: 0.75rem;
-    flex-wrap: wrap;
-}}
-.paste-btn {{
-    padding: 0.4rem 0.75rem;
-    font-size: 0.8rem;
-    font-weight: 500;
-    border: 1px solid var(--border-color);
-    border-radius: 6px;
-    background: var(--bg-tertiary);
-    color: var(--text-primary);
-    cursor: pointer;
-    transition: all 0.15s;
-}}
-.paste-btn:hover {{
-    background: var(--hover-bg);
-    border-color: var(--accent-blue);
-}}
-.paste-btn.primary {{
-    background: var(--accent-green);
-    border-color: var(--accent-green);
-    color: #fff;
-}}
-.paste-btn.danger {{
-    color: var(--accent-red);
-}}
-.paste-status {{
-    color: var(--text-secondary);
-    font-size: 0.78rem;
-    min-height: 1.2rem;
-}}
-
-/* Progress Bar */
-.progress-container {{
-    display: none;
-    margin-top: 1rem;
-}}
-.progress-container.active {{ display: block; }}
-.progress-info {{
+}
+.file-meta {
     display: flex;
-    justify-content: space-between;
-    font-size: 0.8rem;
-    color: var(--text-secondary);
-    margin-bottom: 0.5rem;
-}}
-.progress-bar {{
-    height: 0.5rem;
-    background: var(--bg-tertiary);
-    border-radius: 4px;
-    overflow: hidden;
-}}
-.progress-fill {{
-    height: 100%;
-    background: linear-gradient(90deg, var(--accent-blue), var(--accent-green));
-    width: 0%;
-    transition: width 0.3s;
-    border-radius: 4px;
-}}
-.progress-stats {{
-    display: grid;
-    grid-template-columns: repeat(4, 1fr);
-    gap: 0.75rem;
-    margin-top: 0.75rem;
-}}
-.stat-item {{
-    background: var(--bg-tertiary);
-    padding: 0.75rem;
-    border-radius: 6px;
-    text-align: center;
-}}
-.stat-label {{
-    font-size: 0.7rem;
-    color: var(--text-secondary);
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-}}
-.stat-value {{
-    font-size: 1rem;
-    font-weight: 600;
-    margin-top: 0.25rem;
-    color: var(--accent-blue);
-}}
-
-/* File List */
-.file-list {{
-    background: var(--bg-secondary);
-    border: 1px solid var(--border-color);
-    border-radius: 8px;
-    overflow: hidden;
-}}
-.file-list-header {{
-    display: grid;
-    grid-template-columns: 1fr 6rem 11rem 12rem;
-    padding: 0.75rem 1rem;
-    background: var(--bg-tertiary);
-    font-size: 0.75rem;
-    font-weight: 600;
-    color: var(--text-secondary);
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-    border-bottom: 1px solid var(--border-color);
-}}
-.file-list-header-cell {{
-    display: inline-flex;
-    align-items: center;
-    gap: 0.3rem;
-    background: transparent;
-    border: none;
-    padding: 0;
-    margin: 0;
-    font: inherit;
-    color: inherit;
-    cursor: pointer;
-    text-align: left;
-}}
-.file-list-header-cell .sort-indicator {{
-    font-size: 0.7rem;
-}}
-.file-list-header-cell.active {{
-    color: var(--accent-blue);
-}}
-.file-list-header {{
-    display: grid;
-    grid-template-columns: 1fr 6rem 11rem 12rem;
-    padding: 0.75rem 1rem;
-    background: var(--bg-tertiary);
-    font-size: 0.75rem;
-    font-weight: 600;
-    color: var(--text-secondary);
-    text-transform: uppercase;
-    letter-spacing: 0.5px;
-    border-bottom: 1px solid var(--border-color);
-}}
-.file-item {{
-    display: grid;
-    grid-template-columns: 1fr 6rem 11rem 12rem;
-    padding: 0.75rem 1rem;
-    border-bottom: 1px solid var(--border-color);
-    transition: background 0.15s;
-}}
-.file-item:last-child {{ border-bottom: none; }}
-.file-item:hover {{ background: var(--hover-bg); }}
-.file-name {{
-    display: inline-flex;
-    align-items: center;
-    gap: 0.4rem;
-}}
-.file-name a:not(.preview-badge) {{
-    color: var(--accent-blue);
-    text-decoration: none;
-    font-weight: 500;
-    font-size: 0.95rem;
-}}
-.file-name a:not(.preview-badge):hover {{ text-decoration: underline; }}
-.file-size, .file-date {{
+    gap: 1rem;
+    font-size: 0.8rem;
     color: var(--text-secondary);
-    font-size: 0.85rem;
+}
+.file-meta span {
     display: flex;
     align-items: center;
-}}
-.preview-badge {{
-    font-size: 0.6rem;
-    font-weight: 600;
-    letter-spacing: 0.03em;
-    color: var(--accent-green);
-    border: 1px solid var(--accent-green);
-    padding: 0.1rem 0.35rem;
-    border-radius: 3px;
-    margin-left: 0.4rem;
+    gap: 0.25rem;
+}
+.toolbar-actions {
+    display: flex;
+    gap: 0.5rem;
+}
+.btn {
+    padding: 0.4rem 0.75rem;
+    font-size: 0.8rem;
+    font-weight: 500;
+    border: 1px solid var(--border-color);
+    border-radius: 6px;
+    background: var(--bg-tertiary);
+    color: var(--text-primary);
+    cursor: pointer;
     text-decoration: none;
-    vertical-align: middle;
-    display: inline-block;
-    line-height: 1;
-    opacity: 0.85;
+    display: inline-flex;
+    align-items: center;
+    gap: 0.25rem;
     transition: all 0.15s;
-}}
-.preview-badge:hover {{
+}
+.btn:hover {
+    background: var(--hover-bg);
+}
+.btn-primary {
+    background: var(--accent-green);
+    border-color: var(--accent-green);
+    color: #fff;
+}
+.btn-primary:hover {
+    opacity: 0.9;
+}
+.code-container {
+    border: 1px solid var(--border-color);
+    border-top: none;
+    border-radius: 0 0 8px 8px;
+    overflow: hidden;
+}
+.code-wrapper {
+    display: flex;
+    overflow-x: auto;
+}
+.line-numbers {
+    background: var(--bg-tertiary);
+    padding: 1rem 0;
+    text-align: right;
+    user-select: none;
+    border-right: 1px solid var(--border-color);
+    flex-shrink: 0;
+}
+.line-numbers span {
+    display: block;
+    padding: 0 0.75rem;
+    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
+    font-size: 0.85rem;
+    line-height: 1.6;
+    color: var(--text-secondary);
+}
+pre {
+    margin: 0;
+    padding: 1rem;
+    background: var(--bg-secondary);
+    overflow-x: auto;
+    flex: 1;
+}
+pre code {
+    font-family: 'SF Mono', 'Fira Code', Consolas, monospace;
+    font-size: 0.85rem;
+    line-height: 1.6;
+    background: transparent !important;
+}
+.hljs { background: transparent !important; }
+.preview-status {
+    padding: 0.5rem 1rem;
+    font-size: 0.8rem;
+    color: var(--text-secondary);
+    text-align: center;
+}
+.preview-status:empty {
+    display: none;
+}
+
+/* Toast */
+.toast {
+    position: fixed;
+    bottom: 1.5rem;
+    right: 1.5rem;
+    padding: 0.75rem 1.25rem;
     background: var(--accent-green);
     color: #fff;
+    border-radius: 6px;
+    font-size: 0.9rem;
+    opacity: 0;
+    transform: translateY(20px);
+    transition: all 0.3s;
+    z-index: 1000;
+}
+.toast.show {
     opacity: 1;
-}}
-.new-badge {{
-    font-size: 0.6rem;
-    font-weight: 600;
-    letter-spacing: 0.03em;
-    color: var(--accent-red);
-    border: 1px solid var(--accent-red);
-    padding: 0.1rem 0.35rem;
-    border-radius: 3px;
-    margin-left: 0.4rem;
-    vertical-align: middle;
-    display: inline-block;
-    line-height: 1;
-    opacity: 0.85;
-    pointer-events: none;
-}}
-.folder-badge {{
-    font-size: 0.6rem;
-    font-weight: 600;
-    letter-spacing: 0.03em;
-    color: var(--accent-yellow);
-    border: 1px solid var(--accent-yellow);
-    padding: 0.1rem 0.35rem;
-    border-radius: 3px;
-    margin-left: 0.4rem;
-    vertical-align: middle;
-    display: inline-block;
-    line-height: 1;
-    opacity: 0.85;
-    pointer-events: none;
-}}
-.file-actions {{
+    transform: translateY(0);
+}
+
+@media (max-width: 768px) {
+    html { font-size: 16px; }
+    .toolbar {
+        flex-direction: column;
+        align-items: flex-start;
+    }
+    .file-meta {
+        flex-wrap: wrap;
+    }
+}
+"""
+
+TEXT_PREVIEW_JS = """
+// Lines [0, next) are complete; a trailing unterminated line, when shown,
+// makes end = next + 1 and is replaced by the next window.
+preview.first = 0;
+preview.end = preview.rendered;
+preview.loading = false;
+preview.tail = false;
+preview.timer = null;
+preview.partial = null;
+preview.chunks = [];
+preview.kept = 0;
+const TAIL_POLL_MS = 2000;
+const TAIL_KEEP_LINES = 20000;
+
+document.addEventListener('DOMContentLoaded', function() {
+    initTheme();
+    hljs.highlightAll();
+    appendLineNumbers(0, preview.rendered);
+    updatePreviewStatus();
+    window.addEventListener('scroll', maybeLoadMore, { passive: true });
+    maybeLoadMore();
+});
+
+function appendLineNumbers(first, count) {
+    const lineNumbers = document.getElementById('lineNumbers');
+    const spans = [];
+    for (let i = first + 1; i <= first + count; i++) {
+        const span = document.createElement('span');
+        span.textContent = i;
+        lineNumbers.appendChild(span);
+        spans.push(span);
+    }
+    return spans;
+}
+
+function renderChunk(text) {
+    const span = document.createElement('span');
+    if (window.hljs && hljs.getLanguage(preview.language) && preview.language !== 'plaintext') {
+        span.innerHTML = hljs.highlight(text, { language: preview.language, ignoreIllegals: true }).value;
+    } else {
+        span.textContent = text;
+    }
+    document.getElementById('codeContent').appendChild(span);
+    return span;
+}
+
+function appendWindow(data) {
+    if (preview.partial) {
+        preview.partial.forEach(function(el) { el.remove(); });
+        preview.partial = null;
+    }
+    const lines = data.lines.slice();
+    const partialText = data.partial && lines.length ? lines.pop() : null;
+    if (lines.length) {
+        const els = [renderChunk(lines.join('\\n') + '\\n')];
+        preview.chunks.push({ els: els.concat(appendLineNumbers(preview.next, lines.length)), count: lines.length });
+        preview.next += lines.length;
+        preview.kept += lines.length;
+    }
+    if (partialText !== null) {
+        preview.partial = [renderChunk(partialText)].concat(appendLineNumbers(preview.next, 1));
+    }
+    preview.end = preview.next + (partialText !== null ? 1 : 0);
+    preview.total = data.total;
+    updatePreviewStatus();
+}
+
+function resetContent(start) {
+    document.getElementById('codeContent').innerHTML = '';
+    document.getElementById('lineNumbers').innerHTML = '';
+    preview.chunks = [];
+    preview.partial = null;
+    preview.kept = 0;
+    preview.first = start;
+    preview.next = start;
+    preview.end = start;
+}
+
+function fetchWindow(params) {
+    preview.loading = true;
+    return fetch(location.pathname + '?preview=1&format=json&' + params, { cache: 'no-store' })
+        .then(function(response) {
+            if (!response.ok) throw new Error('HTTP ' + response.status);
+            return response.json();
+        })
+        .finally(function() { preview.loading = false; });
+}
+
+function nearBottom(margin) {
+    return window.innerHeight + window.scrollY >= document.body.scrollHeight - margin;
+}
+
+function maybeLoadMore() {
+    if (preview.tail || preview.loading || preview.end >= preview.total || !nearBottom(800)) return;
+    fetchWindow('start=' + preview.next + '&count=' + preview.window).then(function(data) {
+        appendWindow(data);
+        maybeLoadMore();
+    }).catch(showPreviewError);
+}
+
+function toggleTail() {
+    if (preview.tail) {
+        stopTail();
+        return;
+    }
+    preview.tail = true;
+    document.getElementById('tailBtn').classList.add('btn-primary');
+    loadTail();
+    preview.timer = setInterval(pollTail, TAIL_POLL_MS);
+}
+
+function stopTail() {
+    preview.tail = false;
+    clearInterval(preview.timer);
+    preview.timer = null;
+    document.getElementById('tailBtn').classList.remove('btn-primary');
+    updatePreviewStatus();
+}
+
+function loadTail() {
+    fetchWindow('tail=' + preview.window).then(function(data) {
+        resetContent(data.start);
+        appendWindow(data);
+        window.scrollTo(0, document.body.scrollHeight);
+    }).catch(showPreviewError);
+}
+
+function pollTail() {
+    if (preview.loading) return;
+    fetchWindow('start=' + preview.next + '&count=' + preview.window).then(function(data) {
+        if (!preview.tail) return;
+        if (data.total < preview.next) {
+            // Truncated or rotated: start over from the new end.
+            loadTail();
+            return;
+        }
+        const follow = nearBottom(40);
+        appendWindow(data);
+        while (preview.kept > TAIL_KEEP_LINES && preview.chunks.length > 1) {
+            const chunk = preview.chunks.shift();
+            chunk.els.forEach(function(el) { el.remove(); });
+            preview.kept -= chunk.count;
+            preview.first += chunk.count;
+        }
+        if (follow) window.scrollTo(0, document.body.scrollHeight);
+    }).catch(showPreviewError);
+}
+
+function updatePreviewStatus() {
+    document.getElementById('lineCount').textContent = '📝 ' + preview.total + ' lines';
+    const status = document.getElementById('previewStatus');
+    if (preview.tail) {
+        status.textContent = 'Following appended lines…';
+    } else if (preview.end < preview.total) {
+        status.textContent = 'Showing lines ' + (preview.first + 1) + '–' + preview.end + ' of ' + preview.total + ' · scroll for more';
+    } else {
+        status.textContent = '';
+    }
+}
+
+function showPreviewError(error) {
+    document.getElementById('previewStatus').textContent = 'Failed to load lines: ' + error.message;
+}
+
+function copyContent() {
+    const code = document.getElementById('codeContent');
+    navigator.clipboard.writeText(code.textContent).then(function() {
+        const toast = document.getElementById('toast');
+        toast.classList.add('show');
+        setTimeout(() => toast.classList.remove('show'), 2000);
+    });
+}
+
+function initTheme() {
+    const saved = localStorage.getItem('hftp-theme');
+    const theme = saved || 'light';
+    applyTheme(theme);
+}
+
+function toggleTheme() {
+    const current = document.documentElement.getAttribute('data-theme') || 'light';
+    const next = current === 'dark' ? 'light' : 'dark';
+    applyTheme(next);
+    localStorage.setItem('hftp-theme', next);
+}
+
+function applyTheme(theme) {
+    document.documentElement.setAttribute('data-theme', theme);
+    document.getElementById('themeIcon').textContent = theme === 'dark' ? '☀️' : '🌙';
+    const hljsTheme = document.getElementById('hljs-theme');
+    hljsTheme.href = theme === 'dark' 
+        ? 'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github-dark.min.css'
+        : 'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css';
+}
+"""
+
+IMAGE_PREVIEW_CSS = """
+:root {
+    --bg-primary: #ffffff;
+    --bg-secondary: #f6f8fa;
+    --bg-tertiary: #eaeef2;
+    --border-color: #d0d7de;
+    --text-primary: #1f2328;
+    --text-secondary: #656d76;
+    --accent-green: #1a7f37;
+    --hover-bg: rgba(208, 215, 222, 0.32);
+    --checker-a: #c8c8c8;
+    --checker-b: #f0f0f0;
+}
+[data-theme="dark"] {
+    --bg-primary: #0d1117;
+    --bg-secondary: #161b22;
+    --bg-tertiary: #21262d;
+    --border-color: #30363d;
+    --text-primary: #c9d1d9;
+    --text-secondary: #8b949e;
+    --accent-green: #3fb950;
+    --hover-bg: rgba(48, 54, 61, 0.5);
+    --checker-a: #3a3a3a;
+    --checker-b: #2a2a2a;
+}
+* { box-sizing: border-box; margin: 0; padding: 0; }
+html { font-size: 18px; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
+    background: var(--bg-primary);
+    color: var(--text-primary);
+    min-height: 100vh;
+    display: flex;
+    flex-direction: column;
+    transition: background 0.3s, color 0.3s;
+}
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+    padding: 1.5rem;
+    flex: 1;
+    display: flex;
+    flex-direction: column;
+    gap: 1rem;
+}
+.toolbar {
+    background: var(--bg-secondary);
+    border: 1px solid var(--border-color);
+    border-radius: 8px;
+    padding: 0.75rem 1rem;
     display: flex;
+    justify-content: space-between;
     align-items: center;
-    gap: 0.4rem;
-    padding-right: 0.5rem;
-}}
-.action-btn {{
-    padding: 0.25rem 0.5rem;
-    font-size: 0.75rem;
+    flex-wrap: wrap;
+    gap: 0.75rem;
+}
+.file-info { display: flex; align-items: center; gap: 1rem; flex-wrap: wrap; }
+.file-info h1 { font-size: 1rem; font-weight: 600; }
+.file-meta {
+    display: flex;
+    gap: 1rem;
+    font-size: 0.8rem;
+    color: var(--text-secondary);
+}
+.toolbar-actions { display: flex; gap: 0.5rem; align-items: center; }
+.btn {
+    padding: 0.4rem 0.75rem;
+    font-size: 0.8rem;
+    font-weight: 500;
     border: 1px solid var(--border-color);
-    border-radius: 4px;
+    border-radius: 6px;
     background: var(--bg-tertiary);
     color: var(--text-primary);
     cursor: pointer;
     text-decoration: none;
-    transition: all 0.15s;
     display: inline-flex;
     align-items: center;
-    gap: 0.2rem;
-}}
-.action-btn:hover {{
-    background: var(--hover-bg);
-    border-color: var(--accent-blue);
-}}
-.action-btn.delete {{
-    color: var(--accent-red);
-}}
-.action-btn.delete:hover {{
-    background: var(--accent-red);
+    gap: 0.25rem;
+    transition: all 0.15s;
+    user-select: none;
+}
+.btn:hover { background: var(--hover-bg); }
+.btn-primary {
+    background: var(--accent-green);
+    border-color: var(--accent-green);
     color: #fff;
-    border-color: var(--accent-red);
-}}
-
-/* Modal */
-.modal-overlay {{
-    display: none;
-    position: fixed;
-    top: 0;
-    left: 0;
-    right: 0;
-    bottom: 0;
-    background: rgba(0,0,0,0.5);
-    z-index: 1000;
-    justify-content: center;
+}
+.btn-primary:hover { opacity: 0.9; }
+.zoom-controls {
+    display: flex;
     align-items: center;
-}}
-.modal-overlay.show {{ display: flex; }}
-.modal {{
-    background: var(--bg-secondary);
+    gap: 0.25rem;
+    background: var(--bg-tertiary);
     border: 1px solid var(--border-color);
-    border-radius: 8px;
-    padding: 1.5rem;
-    max-width: 400px;
-    width: 90%;
-}}
-.modal h3 {{
-    margin-bottom: 1rem;
-    color: var(--accent-red);
-}}
-.modal p {{
-    margin-bottom: 1rem;
+    border-radius: 6px;
+    padding: 0.2rem 0.4rem;
+}
+.zoom-btn {
+    width: 1.6rem;
+    height: 1.6rem;
+    display: flex;
+    align-items: center;
+    justify-content: center;
+    font-size: 1rem;
+    font-weight: 600;
+    border: none;
+    border-radius: 4px;
+    background: transparent;
+    color: var(--text-primary);
+    cursor: pointer;
+    transition: background 0.15s;
+    line-height: 1;
+}
+.zoom-btn:hover { background: var(--hover-bg); }
+.zoom-label {
+    font-size: 0.75rem;
+    min-width: 3rem;
+    text-align: center;
     color: var(--text-secondary);
-    word-break: break-all;
-}}
-.modal-actions {{
+    font-variant-numeric: tabular-nums;
+}
+.image-container {
+    border: 1px solid var(--border-color);
+    border-radius: 8px;
+    overflow: hidden;
     display: flex;
-    gap: 0.5rem;
-    justify-content: flex-end;
-}}
-.modal-btn {{
-    padding: 0.5rem 1rem;
-    border-radius: 6px;
+    justify-content: center;
+    align-items: center;
+    background-image: linear-gradient(45deg, var(--checker-a) 25%, transparent 25%),
+                      linear-gradient(-45deg, var(--checker-a) 25%, transparent 25%),
+                      linear-gradient(45deg, transparent 75%, var(--checker-a) 75%),
+                      linear-gradient(-45deg, transparent 75%, var(--checker-a) 75%);
+    background-size: 20px 20px;
+    background-position: 0 0, 0 10px, 10px -10px, -10px 0px;
+    background-color: var(--checker-b);
+    min-height: 200px;
+    height: 80vh;
+    cursor: grab;
+    position: relative;
+}
+.image-container.dragging { cursor: grabbing; }
+.image-container img {
+    max-width: 100%;
+    max-height: 100%;
+    object-fit: contain;
+    display: block;
+    transform-origin: center center;
+    transition: transform 0.05s ease-out;
+    pointer-events: none;
+    user-select: none;
+    -webkit-user-drag: none;
+}
+@media (max-width: 768px) {
+    html { font-size: 16px; }
+    .toolbar { flex-direction: column; align-items: flex-start; }
+}
+"""
+
+IMAGE_PREVIEW_JS = """
+let scale = 1, tx = 0, ty = 0;
+let dragging = false, lastX = 0, lastY = 0;
+let pinchDist = 0;
+const MIN_SCALE = 0.05, MAX_SCALE = 20;
+
+const img = document.getElementById('previewImg');
+const container = document.getElementById('imgContainer');
+const zoomLabel = document.getElementById('zoomLabel');
+
+function applyTransform(animate) {
+    img.style.transition = animate ? 'transform 0.2s ease-out' : 'none';
+    img.style.transform = `translate(${tx}px, ${ty}px) scale(${scale})`;
+    zoomLabel.textContent = Math.round(scale * 100) + '%';
+}
+
+function zoomAt(cx, cy, factor) {
+    const newScale = Math.max(MIN_SCALE, Math.min(MAX_SCALE, scale * factor));
+    const ratio = newScale / scale;
+    tx = cx - ratio * (cx - tx);
+    ty = cy - ratio * (cy - ty);
+    scale = newScale;
+    applyTransform(false);
+}
+
+function zoomBy(factor) {
+    zoomAt(0, 0, factor);
+    applyTransform(true);
+}
+
+function resetZoom() {
+    scale = 1; tx = 0; ty = 0;
+    applyTransform(true);
+}
+
+container.addEventListener('wheel', (e) => {
+    e.preventDefault();
+    const rect = container.getBoundingClientRect();
+    const cx = e.clientX - rect.left - rect.width / 2;
+    const cy = e.clientY - rect.top - rect.height / 2;
+    zoomAt(cx, cy, e.deltaY < 0 ? 1.12 : 1 / 1.12);
+}, { passive: false });
+
+container.addEventListener('mousedown', (e) => {
+    dragging = true;
+    lastX = e.clientX; lastY = e.clientY;
+    container.classList.add('dragging');
+});
+
+document.addEventListener('mousemove', (e) => {
+    if (!dragging) return;
+    tx += e.clientX - lastX;
+    ty += e.clientY - lastY;
+    lastX = e.clientX; lastY = e.clientY;
+    applyTransform(false);
+});
+
+document.addEventListener('mouseup', () => {
+    dragging = false;
+    container.classList.remove('dragging');
+});
+
+container.addEventListener('dblclick', resetZoom);
+
+container.addEventListener('touchstart', (e) => {
+    if (e.touches.length === 2) {
+        pinchDist = Math.hypot(
+            e.touches[0].clientX - e.touches[1].clientX,
+            e.touches[0].clientY - e.touches[1].clientY
+        );
+    } else if (e.touches.length === 1) {
+        dragging = true;
+        lastX = e.touches[0].clientX;
+        lastY = e.touches[0].clientY;
+    }
+}, { passive: true });
+
+container.addEventListener('touchmove', (e) => {
+    e.preventDefault();
+    if (e.touches.length === 2) {
+        const dist = Math.hypot(
+            e.touches[0].clientX - e.touches[1].clientX,
+            e.touches[0].clientY - e.touches[1].clientY
+        );
+        const rect = container.getBoundingClientRect();
+        const cx = (e.touches[0].clientX + e.touches[1].clientX) / 2 - rect.left - rect.width / 2;
+        const cy = (e.touches[0].clientY + e.touches[1].clientY) / 2 - rect.top - rect.height / 2;
+        zoomAt(cx, cy, dist / pinchDist);
+        pinchDist = dist;
+    } else if (e.touches.length === 1 && dragging) {
+        tx += e.touches[0].clientX - lastX;
+        ty += e.touches[0].clientY - lastY;
+        lastX = e.touches[0].clientX;
+        lastY = e.touches[0].clientY;
+        applyTransform(false);
+    }
+}, { passive: false });
+
+container.addEventListener('touchend', () => { dragging = false; });
+
+function onImageLoad(img) {
+    const meta = document.querySelector('.file-meta');
+    let span = document.getElementById('imgDims');
+    if (!span) {
+        span = document.createElement('span');
+        span.id = 'imgDims';
+        meta.appendChild(span);
+    }
+    const original = img.src.indexOf('?thumb=') === -1;
+    span.textContent = '📐 ' + img.naturalWidth + ' × ' + img.naturalHeight + (original ? '' : ' (preview)');
+}
+
+function showOriginal() {
+    img.src = img.dataset.original;
+    const btn = document.getElementById('originalBtn');
+    if (btn) btn.remove();
+}
+
+function initTheme() {
+    const saved = localStorage.getItem('hftp-theme') || 'light';
+    applyTheme(saved);
+}
+
+function toggleTheme() {
+    const current = document.documentElement.getAttribute('data-theme') || 'light';
+    const next = current === 'dark' ? 'light' : 'dark';
+    applyTheme(next);
+    localStorage.setItem('hftp-theme', next);
+}
+
+function applyTheme(theme) {
+    document.documentElement.setAttribute('data-theme', theme);
+    document.getElementById('themeIcon').textContent = theme === 'dark' ? '☀️' : '🌙';
+}
+
+initTheme();
+setupSorting();
+"""
+
+VIDEO_PREVIEW_CSS = """
+:root {
+    --bg-primary: #ffffff;
+    --bg-secondary: #f6f8fa;
+    --bg-tertiary: #eaeef2;
+    --border-color: #d0d7de;
+    --text-primary: #1f2328;
+    --text-secondary: #656d76;
+    --accent-green: #1a7f37;
+    --hover-bg: rgba(208, 215, 222, 0.32);
+}
+[data-theme="dark"] {
+    --bg-primary: #0d1117;
+    --bg-secondary: #161b22;
+    --bg-tertiary: #21262d;
+    --border-color: #30363d;
+    --text-primary: #c9d1d9;
+    --text-secondary: #8b949e;
+    --accent-green: #3fb950;
+    --hover-bg: rgba(48, 54, 61, 0.5);
+}
+* { box-sizing: border-box; margin: 0; padding: 0; }
+html { font-size: 18px; }
+body {
+    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Helvetica, Arial, sans-serif;
+    background: var(--bg-primary);
+    color: var(--text-primary);
+    min-height: 100vh;
+    display: flex;
+    flex-direction: column;
+    transition: background 0.3s, color 0.3s;
+}
+.container {
+    max-width: 1400px;
+    margin: 0 auto;
+    padding: 1.5rem;
+    flex: 1;
+    display: flex;
+    flex-direction: column;
+    gap: 1rem;
+}
+.toolbar {
+    background: var(--bg-secondary);
     border: 1px solid var(--border-color);
-    cursor: pointer;
-    font-size: 0.85rem;
+    border-radius: 8px;
+    padding: 0.75rem 1rem;
+    display: flex;
+    justify-content: space-between;
+    align-items: center;
+    flex-wrap: wrap;
+    gap: 0.75rem;
+}
+.file-info { display: flex; align-items: center; gap: 1rem; flex-wrap: wrap; }
+.file-info h1 { font-size: 1rem; font-weight: 600; }
+.file-meta {
+    display: flex;
+    gap: 1rem;
+    font-size: 0.8rem;
+    color: var(--text-secondary);
+}
+.toolbar-actions { display: flex; gap: 0.5rem; }
+.btn {
+    padding: 0.4rem 0.75rem;
+    font-size: 0.8rem;
     font-weight: 500;
-}}
-.modal-btn.cancel {{
+    border: 1px solid var(--border-color);
+    border-radius: 6px;
     background: var(--bg-tertiary);
     color: var(--text-primary);
-}}
-.modal-btn.confirm {{
-    background: var(--accent-red);
+    cursor: pointer;
+    text-decoration: none;
+    display: inline-flex;
+    align-items: center;
+    gap: 0.25rem;
+    transition: all 0.15s;
+}
+.btn:hover { background: var(--hover-bg); }
+.btn-primary {
+    background: var(--accent-green);
+    border-color: var(--accent-green);
     color: #fff;
-    border-color: var(--accent-red);
-}}
-.modal-btn:hover {{ opacity: 0.9; }}
+}
+.btn-primary:hover { opacity: 0.9; }
+.video-container {
+    border: 1px solid var(--border-color);
+    border-radius: 8px;
+    overflow: hidden;
+    background: #000;
+    display: flex;
+    justify-content: center;
+    align-items: center;
+}
+video {
+    width: 100%;
+    max-height: 80vh;
+    display: block;
+    outline: none;
+}
+@media (max-width: 768px) {
+    html { font-size: 16px; }
+    .toolbar { flex-direction: column; align-items: flex-start; }
+}
+"""
+
+VIDEO_PREVIEW_JS = """
+function initTheme() {
+    const saved = localStorage.getItem('hftp-theme') || 'light';
+    applyTheme(saved);
+}
+
+function toggleTheme() {
+    const current = document.documentElement.getAttribute('data-theme') || 'light';
+    const next = current === 'dark' ? 'light' : 'dark';
+    applyTheme(next);
+    localStorage.setItem('hftp-theme', next);
+}
+
+function applyTheme(theme) {
+    document.documentElement.setAttribute('data-theme', theme);
+    document.getElementById('themeIcon').textContent = theme === 'dark' ? '☀️' : '🌙';
+}
+
+document.getElementById('videoPlayer').addEventListener('loadedmetadata', function() {
+    const dur = this.duration;
+    if (isFinite(dur)) {
+        const h = Math.floor(dur / 3600);
+        const m = Math.floor((dur % 3600) / 60);
+        const s = Math.floor(dur % 60);
+        const parts = h > 0 ? [h, m, s] : [m, s];
+        const fmt = parts.map((v, i) => (i > 0 ? String(v).padStart(2, '0') : v)).join(':');
+        document.getElementById('durInfo').textContent = '⏱ ' + fmt;
+    }
+    const w = this.videoWidth, h = this.videoHeight;
+    if (w && h) {
+        document.querySelector('.file-meta').innerHTML +=
+            '<span>📐 ' + w + ' × ' + h + '</span>';
+    }
+});
+
+initTheme();
+"""
+
+STATIC_ASSETS = {
+    asset.name: asset
+    for asset in (
+        StaticAsset("listing.css", LISTING_CSS),
+        StaticAsset("listing.js", LISTING_JS),
+        StaticAsset("text-preview.css", TEXT_PREVIEW_CSS),
+        StaticAsset("text-preview.js", TEXT_PREVIEW_JS),
+        StaticAsset("image-preview.css", IMAGE_PREVIEW_CSS),
+        StaticAsset("image-preview.js", IMAGE_PREVIEW_JS),
+        StaticAsset("video-preview.css", VIDEO_PREVIEW_CSS),
+        StaticAsset("video-preview.js", VIDEO_PREVIEW_JS),
+    )
+}
+STATIC_ROUTES = {asset.url: asset for asset in STATIC_ASSETS.values()}
+STATIC_VERSION = hashlib.sha1(
+    "".join(sorted(STATIC_ROUTES)).encode("utf-8")
+).hexdigest()[:8]
+
+class EnhancedHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    """Enhanced HTTP request handler with file upload and download support"""
+
+    def do_GET(self) -> None:
+        """Handle GET requests with preview and Range support."""
+        parsed = urlparse(self.path)
+        query = parse_qs(parsed.query)
+        if parsed.path == "/favicon.ico":
+            try:
+                self.send_response(200)
+                self.send_header("Content-Type", "image/x-icon")
+                self.send_header("Content-Length", str(len(FAVICON_ICO_BYTES)))
+                self.end_headers()
+                self.wfile.write(FAVICON_ICO_BYTES)
+            except (BrokenPipeError, ConnectionResetError):
+                # Client may cancel favicon request; avoid noisy stack traces.
+                pass
+            return
+        if parsed.path == PASTEBIN_ENDPOINT:
+            self._serve_pastebin(query)
+            return
+        if parsed.path == STATUS_ENDPOINT:
+            self._serve_status()
+            return
+        if parsed.path.startswith(STATIC_ENDPOINT + "/"):
+            self._serve_static(parsed.path)
+            return
+        path = self._translate_path_for_read(parsed.path)
+
+        if os.path.isfile(path):
+            if "thumb" in query and is_image_file(path):
+                self._serve_thumbnail(path, query)
+                return
+            if query.get("preview", ["0"])[0] == "1":
+                if query.get("format", [""])[0] == "json" and is_text_file(path):
+                    self._serve_text_window(path, query)
+                    return
+                if is_text_file(path) or is_image_file(path) or is_video_file(path):
+                    etag, mtime = self._file_validators(path, preview=True)
+                    if self._is_not_modified(etag, mtime):
+                        access_log(self, "view", "304", path)
+                        self._send_not_modified(etag, mtime)
+                        return
+                access_log(self, "view", "200", path)
+                if is_text_file(path):
+                    self.serve_text_preview(path)
+                elif is_image_file(path):
+                    self.serve_image_preview(path)
+                elif is_video_file(path):
+                    self.serve_video_preview(path)
+                else:
+                    self._serve_ranged(path)
+            else:
+                self._serve_ranged(path, log_action="download")
+        elif os.path.isdir(path):
+            if not parsed.path.endswith("/"):
+                location = parsed.path + "/"
+                if parsed.query:
+                    location += "?" + parsed.query
+                self.send_response(301)
+                self.send_header("Location", location)
+                self.end_headers()
+                return
+
+            if query.get("format", [""])[0] == "json":
+                self._serve_listing_json(path, query)
+                return
+            if "archive" in query:
+                self._serve_archive(path, query["archive"][0])
+                return
+
+            self.path = parsed.path
+            f = self.list_directory(path)
+            if f:
+                try:
+                    shutil.copyfileobj(f, self.wfile)
+                except (BrokenPipeError, ConnectionResetError):
+                    pass
+                finally:
+                    f.close()
+        else:
+            self.path = parsed.path
+            super().do_GET()
+
+    def _serve_status(self) -> None:
+        """Return connection counters of the running server as JSON."""
+        stats_fn = getattr(self.server, "connection_stats", None)
+        stats = stats_fn() if stats_fn else {}
+        stats["access_log"] = ACCESS_LOG.stats()
+        payload = json.dumps(stats).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _serve_static(self, url_path: str) -> None:
+        """Serve a content-hashed page asset, compressed when the client accepts it."""
+        asset = STATIC_ROUTES.get(url_path)
+        if asset is None:
+            self.send_error(404, "File not found")
+            return
+        encoding = choose_encoding(self.headers.get("Accept-Encoding", ""))
+        etag = f'"{asset.digest}{"-" + encoding if encoding else ""}"'
+        if etag_matches(self.headers.get("If-None-Match", ""), etag):
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        body = asset.encoded(encoding)
+        self.send_response(200)
+        self.send_header("Content-Type", asset.content_type)
+        self.send_header("Content-Length", str(len(body)))
+        if encoding:
+            self.send_header("Content-Encoding", encoding)
+        self.send_header("Vary", "Accept-Encoding")
+        self.send_header("Cache-Control", "public, max-age=31536000, immutable")
+        self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _negotiate_body(self, body: bytes, content_type: str) -> bytes:
+        """Compress a generated body if worthwhile and accepted; sends Vary/Content-Encoding.
+
+        Call after send_response and before the Content-Length header.
+        """
+        encoding = None
+        if len(body) >= COMPRESS_MIN_BYTES and content_type.startswith(
+            COMPRESSIBLE_TYPES
+        ):
+            encoding = choose_encoding(self.headers.get("Accept-Encoding", ""))
+        self.send_header("Vary", "Accept-Encoding")
+        if encoding is None:
+            return body
+        self.send_header("Content-Encoding", encoding)
+        return compress_body(body, encoding)
+
+    def setup(self) -> None:
+        """Apply the server's keep-alive idle timeout to the connection socket."""
+        self.timeout = getattr(self.server, "idle_timeout", None)
+        super().setup()
+
+    def handle(self) -> None:
+        """Serve requests on one connection until it closes or the server drains."""
+        self.close_connection = True
+        self.handle_one_request()
+        while not self.close_connection:
+            self._mark_connection(busy=False)
+            if EXIT_EVENT.is_set() or getattr(self.server, "draining", False):
+                return
+            self.handle_one_request()
+
+    def parse_request(self) -> bool:
+        """Mark the connection busy as soon as a request line arrives."""
+        self._mark_connection(busy=True)
+        return super().parse_request()
+
+    @contextmanager
+    def _body_write_timeout(self) -> Iterator[None]:
+        """Lift the idle timeout while a response body is written.
+
+        Reads of the request line, headers and body stay bounded so a stalled
+        client cannot pin a worker, but a slow and live reader must not have its
+        download cut off. Nested uses restore the timeout they found.
+        """
+        if self.timeout is None:
+            yield
+            return
+        previous = self.connection.gettimeout()
+        self.connection.settimeout(None)
+        try:
+            yield
+        finally:
+            self.connection.settimeout(previous)
+
+    def _mark_connection(self, busy: bool) -> None:
+        mark = getattr(self.server, "mark_connection", None)
+        if mark:
+            mark(self.connection, busy)
+
+    def send_response_only(self, code: int, message: Optional[str] = None) -> None:
+        """Start a response and reset keep-alive framing state."""
+        self._framed = code < 200 or code in (204, 304)
+        self._close_announced = False
+        super().send_response_only(code, message)
+
+    def send_header(self, keyword: str, value: str) -> None:
+        lowered = keyword.lower()
+        if lowered in ("content-length", "transfer-encoding"):
+            self._framed = True
+        elif lowered == "connection" and value.lower() == "close":
+            self._close_announced = True
+        super().send_header(keyword, value)
+
+    def end_headers(self) -> None:
+        """Close HTTP/1.1 connections whose body length the client cannot know."""
+        if self.protocol_version >= "HTTP/1.1":
+            if not getattr(self, "_framed", True):
+                self.close_connection = True
+            if self.close_connection and not getattr(self, "_close_announced", True):
+                super().send_header("Connection", "close")
+                self._close_announced = True
+        super().end_headers()
+
+    def _serve_pastebin(self, query: dict) -> None:
+        """Return the current temporary pastebin state."""
+        snapshot = PASTEBIN.snapshot()
+        raw_mode = query.get("raw", ["0"])[0].lower() in ("1", "true", "yes", "text")
+
+        if raw_mode:
+            payload = snapshot["text"].encode("utf-8")
+            content_type = "text/plain; charset=utf-8"
+        else:
+            payload = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
+            content_type = "application/json; charset=utf-8"
+
+        self.send_response(200)
+        self.send_header("Content-Type", content_type)
+        payload = self._negotiate_body(payload, content_type)
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _read_limited_request_body(self, max_bytes: int) -> Optional[bytes]:
+        """Read a regular or chunked request body with a size limit."""
+        transfer_encoding = self.headers.get("Transfer-Encoding", "").lower()
+        if "chunked" not in transfer_encoding:
+            length = int(self.headers.get("Content-Length", 0))
+            if length > max_bytes:
+                access_log(self, "paste", "413")
+                self.send_error(413, "Paste is too large")
+                return None
+            return self.rfile.read(length)
+
+        data = bytearray()
+        try:
+            while True:
+                line = self.rfile.readline(128)
+                if not line:
+                    raise ValueError("Invalid chunked body")
+
+                size_text = line.split(b";", 1)[0].strip()
+                chunk_size = int(size_text, 16)
+                if chunk_size == 0:
+                    self._discard_chunked_trailers()
+                    return bytes(data)
+
+                if len(data) + chunk_size > max_bytes:
+                    access_log(self, "paste", "413")
+                    self.send_error(413, "Paste is too large")
+                    return None
+
+                data.extend(self.rfile.read(chunk_size))
+                self.rfile.read(2)
+        except ValueError:
+            access_log(self, "paste", "400")
+            self.send_error(400, "Invalid chunked request body")
+            return None
+
+    def _discard_chunked_trailers(self) -> None:
+        """Consume optional HTTP chunked trailers."""
+        while True:
+            line = self.rfile.readline(65536)
+            if line in (b"\r\n", b"\n", b""):
+                return
+
+    def _handle_pastebin_post(self) -> None:
+        """Update or clear the shared temporary pastebin text."""
+        raw = self._read_limited_request_body(MAX_PASTEBIN_BYTES)
+        if raw is None:
+            return
+
+        content_type = self.headers.get("Content-Type", "")
+        text = ""
+        action = "save"
 
-/* Empty State */
-.empty-state {{
-    padding: 3rem;
-    text-align: center;
-    color: var(--text-secondary);
-}}
+        if "application/json" in content_type:
+            try:
+                data = json.loads(raw.decode("utf-8", errors="replace") or "{}")
+                text = str(data.get("text", ""))
+                action = str(data.get("action", "save"))
+            except json.JSONDecodeError:
+                access_log(self, "paste", "400")
+                self.send_error(400, "Invalid JSON")
+                return
+        elif "application/x-www-form-urlencoded" in content_type:
+            data = parse_qs(raw.decode("utf-8", errors="replace"))
+            text = data.get("text", [""])[0]
+            action = data.get("action", ["save"])[0]
+        else:
+            text = raw.decode("utf-8", errors="replace")
 
-/* Footer */
-footer {{
-    margin-top: 1.5rem;
-    padding: 1rem;
-    text-align: center;
-    font-size: 0.75rem;
-    color: var(--text-secondary);
-}}
+        updated_by = get_request_ip(self)
+        if action == "clear":
+            snapshot = PASTEBIN.clear(updated_by)
+        else:
+            if len(text.encode("utf-8")) > MAX_PASTEBIN_BYTES:
+                access_log(self, "paste", "413")
+                self.send_error(413, "Paste is too large")
+                return
+            snapshot = PASTEBIN.update(text, updated_by)
 
-/* Responsive */
-@media (max-width: 768px) {{
-    html {{ font-size: 16px; }}
-    .file-item {{
-        grid-template-columns: 1fr;
-        gap: 0.25rem;
-    }}
-    .file-size, .file-date {{
-        font-size: 0.8rem;
-        padding-left: 1.85rem;
-    }}
-    .file-actions {{
-        padding-left: 1.85rem;
-        margin-top: 0.25rem;
-    }}
-    .progress-stats {{
-        grid-template-columns: repeat(2, 1fr);
-    }}
-}}
-</style>
-</head>
-<body>
-<div class="container">
-    <header>
-        <div class="header-left">
-            <h1>{html.escape(PORTAL_NAME)}</h1>
-            <div class="breadcrumb">{self._generate_breadcrumb(displaypath)}</div>
-        </div>
-        <button class="theme-toggle" onclick="toggleTheme()">
-            <span id="themeText">Dark</span>
-        </button>
-    </header>
+        access_log(self, "paste", "200", f"{snapshot['size']} bytes")
+        payload = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
 
-    <div class="paste-section collapsed" id="pasteSection">
-        <div class="paste-header">
-            <div class="paste-header-left">
-                <div class="paste-title">Temporary Pastebin</div>
-                <div class="paste-meta" id="pasteMeta">
-                    <span>Updated</span>
-                    <span class="paste-meta-highlight paste-meta-time" id="pasteUpdatedAt">{paste_updated}</span>
-                    <span>by</span>
-                    <span class="paste-meta-highlight paste-meta-ip" id="pasteUpdatedBy">{paste_updated_by}</span>
-                    <span>·</span>
-                    <span class="paste-meta-size" id="pasteSize">{paste_size}</span>
-                </div>
-            </div>
-            <button type="button" class="paste-btn" id="pasteToggle" onclick="togglePastebin()">Expand</button>
-        </div>
-        <div class="paste-body">
-            <textarea class="paste-editor" id="pasteText" spellcheck="false" maxlength="{MAX_PASTEBIN_BYTES}">{paste_text}</textarea>
-            <div class="paste-actions">
-                <button type="button" class="paste-btn primary" onclick="savePaste()">Save</button>
-                <button type="button" class="paste-btn" onclick="loadPaste(true)">Refresh</button>
-                <button type="button" class="paste-btn" onclick="copyPaste()">Copy</button>
-                <button type="button" class="paste-btn danger" onclick="clearPaste()">Clear</button>
-                <span class="paste-status" id="pasteStatus"></span>
-            </div>
-            <div class="paste-cli">
-                <div class="paste-command-row">
-                    <code id="cmdPasteCurlGet"></code>
-                    <button onclick="copyCmd(this, window.__hftpPasteCmds.curlGet)" title="Copy">⎘</button>
-                </div>
-                <div class="paste-command-row">
-                    <code id="cmdPasteCurlPut"></code>
-                    <button onclick="copyCmd(this, window.__hftpPasteCmds.curlPut)" title="Copy">⎘</button>
-                </div>
-                <div class="paste-command-row">
-                    <code id="cmdPasteCurlPipe"></code>
-                    <button onclick="copyCmd(this, window.__hftpPasteCmds.curlPipe)" title="Copy">⎘</button>
-                </div>
-                <div class="paste-command-row">
-                    <code id="cmdPasteWgetGet"></code>
-                    <button onclick="copyCmd(this, window.__hftpPasteCmds.wgetGet)" title="Copy">⎘</button>
-                </div>
-                <div class="paste-command-row">
-                    <code id="cmdPasteWgetPut"></code>
-                    <button onclick="copyCmd(this, window.__hftpPasteCmds.wgetPut)" title="Copy">⎘</button>
-                </div>
-                <div class="paste-command-row">
-                    <code id="cmdPasteWgetPipe"></code>
-                    <button onclick="copyCmd(this, window.__hftpPasteCmds.wgetPipe)" title="Copy">⎘</button>
-                </div>
-            </div>
-        </div>
-    </div>
+    def _handle_pastebin_put(self) -> None:
+        """Overwrite the shared temporary pastebin text with the raw request body."""
+        raw = self._read_limited_request_body(MAX_PASTEBIN_BYTES)
+        if raw is None:
+            return
 
-    <div class="upload-section">
-        <div class="upload-title">Upload File</div>
-        <div class="upload-zone" id="uploadZone">
-            <input type="file" id="fileInput" name="file" multiple>
-            <p>Drag & drop, click to browse, or press Ctrl+V to paste from clipboard</p>
-            <button type="button" class="btn" onclick="document.getElementById('fileInput').click()">Select File(s)</button>
-        </div>
-        <div style="display:flex;flex-direction:column;gap:6px;margin-top:4px;">
-            <div style="display:flex;align-items:center;background:var(--bg-secondary);border:1px solid var(--border-color);border-radius:6px;overflow:hidden;">
-                <code id="cmdCurlPut" style="flex:1;padding:6px 10px;font-family:'SF Mono','Fira Code',Consolas,monospace;font-size:0.8em;white-space:nowrap;overflow-x:auto;background:transparent;"></code>
-                <button onclick="copyCmd(this, window.__hftpCmds.curlPut)" style="flex-shrink:0;padding:4px 8px;background:transparent;border:none;border-left:1px solid var(--border-color);cursor:pointer;color:var(--text-muted);font-size:0.75em;" title="Copy">⎘</button>
-            </div>
-            <div style="display:flex;align-items:center;background:var(--bg-secondary);border:1px solid var(--border-color);border-radius:6px;overflow:hidden;">
-                <code id="cmdCurlPutBinary" style="flex:1;padding:6px 10px;font-family:'SF Mono','Fira Code',Consolas,monospace;font-size:0.8em;white-space:nowrap;overflow-x:auto;background:transparent;"></code>
-                <button onclick="copyCmd(this, window.__hftpCmds.curlPutBinary)" style="flex-shrink:0;padding:4px 8px;background:transparent;border:none;border-left:1px solid var(--border-color);cursor:pointer;color:var(--text-muted);font-size:0.75em;" title="Copy">⎘</button>
-            </div>
-            <div style="display:flex;align-items:center;background:var(--bg-secondary);border:1px solid var(--border-color);border-radius:6px;overflow:hidden;">
-                <code id="cmdWgetPut" style="flex:1;padding:6px 10px;font-family:'SF Mono','Fira Code',Consolas,monospace;font-size:0.8em;white-space:nowrap;overflow-x:auto;background:transparent;"></code>
-                <button onclick="copyCmd(this, window.__hftpCmds.wgetPut)" style="flex-shrink:0;padding:4px 8px;background:transparent;border:none;border-left:1px solid var(--border-color);cursor:pointer;color:var(--text-muted);font-size:0.75em;" title="Copy">⎘</button>
-            </div>
-        </div>
-        <div class="progress-container" id="progressContainer">
-            <div class="progress-info">
-                <span id="fileName">-</span>
-                <span id="progressPercent">0%</span>
-            </div>
-            <div class="progress-bar">
-                <div class="progress-fill" id="progressFill"></div>
-            </div>
-            <div class="progress-stats">
-                <div class="stat-item">
-                    <div class="stat-label">Total Size</div>
-                    <div class="stat-value" id="totalSize">-</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Uploaded</div>
-                    <div class="stat-value" id="uploadedSize">-</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Speed</div>
-                    <div class="stat-value" id="uploadSpeed">-</div>
-                </div>
-                <div class="stat-item">
-                    <div class="stat-label">Remaining</div>
-                    <div class="stat-value" id="timeRemaining">-</div>
-                </div>
-            </div>
-        </div>
-    </div>
+        text = raw.decode("utf-8", errors="replace")
+        snapshot = PASTEBIN.update(text, get_request_ip(self))
+        access_log(self, "paste", "200", f"{snapshot['size']} bytes")
+        payload = json.dumps(snapshot, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
 
-        <div class="file-list">
-        <div class="file-list-header">
-            <button type="button" class="file-list-header-cell sortable" data-sort-key="name">
-                <span>Name</span><span class="sort-indicator" data-key="name"></span>
-            </button>
-            <button type="button" class="file-list-header-cell sortable" data-sort-key="size">
-                <span>Size</span><span class="sort-indicator" data-key="size"></span>
-            </button>
-            <button type="button" class="file-list-header-cell sortable" data-sort-key="mtime">
-                <span>Modified</span><span class="sort-indicator" data-key="mtime"></span>
-            </button>
-            <span>Actions</span>
-        </div>
-        <div id="fileListBody">
-'''
+    def _serve_ranged(self, filepath: str, log_action: Optional[str] = None) -> None:
+        """Serve a file with HTTP Range request support. log_action: 'download' or None (no log)."""
+        try:
+            st = os.stat(filepath)
+        except OSError:
+            if log_action:
+                access_log(self, log_action, "404", filepath)
+            self.send_error(404, "File not found")
+            return
+        file_size = st.st_size
+        etag = make_etag(st)
 
-        root = self.server.root_dir
-        if os.path.normpath(path.rstrip(os.sep)) != os.path.normpath(
-            root.rstrip(os.sep)
+        if self._is_not_modified(etag, st.st_mtime):
+            if log_action:
+                access_log(self, log_action, "304", filepath)
+            self._send_not_modified(etag, st.st_mtime)
+            return
+
+        mime_type, _ = mimetypes.guess_type(filepath)
+        if not mime_type:
+            mime_type = "application/octet-stream"
+        if mime_type.startswith("text/") and "charset" not in mime_type:
+            mime_type += "; charset=utf-8"
+
+        range_header = self.headers.get("Range")
+        if range_header and (
+            not self._if_range_allows(etag, st.st_mtime)
+            or count_range_specs(range_header) > MAX_RANGES
         ):
-            try:
-                parent_fs = os.path.dirname(path)
-                parent_rel = os.path.relpath(parent_fs, root)
-                if parent_rel.startswith("..") or parent_rel == "..":
-                    parent_url = "/"
-                else:
-                    parent_url = self._fs_path_to_url_path(
-                        parent_fs, trailing_slash=True
-                    )
-            except ValueError:
-                parent_url = "/"
-            html_content += f"""
-        <div class="file-item" data-name=".." data-size="0" data-mtime="0" data-type="dir" data-up="1">
-            <div class="file-name">
-                <a href="{parent_url}">..</a>
-                <span class="folder-badge">DIR</span>
-            </div>
-            <div class="file-size">-</div>
-            <div class="file-date">-</div>
-            <div class="file-actions"></div>
-        </div>
-"""
+            # Failed If-Range, or too many ranges to be worth honouring: send it all.
+            range_header = None
+        if not range_header:
+            self.send_response(200)
+            self.send_header("Content-Type", mime_type)
+            self.send_header("Content-Length", str(file_size))
+            self.send_header("Accept-Ranges", "bytes")
+            self._send_validators(etag, st.st_mtime)
+            self.end_headers()
+            sent, elapsed = self._send_file_range(filepath, 0, file_size)
+            if log_action:
+                access_log(self, log_action, "200", filepath, sent, elapsed)
+            return
+
+        try:
+            ranges = parse_byte_ranges(range_header, file_size)
+        except ValueError:
+            if log_action:
+                access_log(self, log_action, "416", filepath)
+            self.send_error(416, "Range Not Satisfiable")
+            return
 
-        has_entries = False
-        for name, is_dir in entries:
-            fullname = os.path.join(path, name)
-            try:
-                mtime_ts = os.path.getmtime(fullname)
-                mtime = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime_ts))
-            except OSError:
-                mtime_ts = 0.0
-                mtime = "-"
+        if not ranges:
+            if log_action:
+                access_log(self, log_action, "416", filepath)
+            self.send_response(416)
+            self.send_header("Content-Range", f"bytes */{file_size}")
+            self.end_headers()
+            return
 
-            if is_dir:
-                dir_url = self._fs_path_to_url_path(fullname, trailing_slash=True)
-                escaped_name = html.escape(name).replace("'", "\\'")
-                dir_url_attr = dir_url.replace("\\", "\\\\").replace("'", "\\'")
-                html_content += f'''
-        <div class="file-item" data-name="{html.escape(name)}" data-size="0" data-mtime="{mtime_ts}" data-type="dir">
-            <div class="file-name">
-                <a href="{dir_url}">{html.escape(name)}</a>
-                <span class="folder-badge">DIR</span>
-            </div>
-            <div class="file-size">-</div>
-            <div class="file-date">{mtime}</div>
-            <div class="file-actions">
-                <button class="action-btn delete" onclick="confirmDelete('{dir_url_attr}', true, '{escaped_name}/')">Delete</button>
-            </div>
-        </div>
-'''
-            else:
-                try:
-                    size = os.path.getsize(fullname)
-                    size_str = self._format_size(size)
-                except OSError:
-                    size = 0
-                    size_str = "-"
+        if len(ranges) > 1:
+            self._serve_multipart_ranges(
+                filepath, mime_type, st, etag, ranges, log_action
+            )
+            return
 
-                icon, icon_class = self._get_file_icon(name)
-                is_previewable = (
-                    is_text_file(fullname)
-                    or is_image_file(fullname)
-                    or is_video_file(fullname)
-                )
-                file_url = self._fs_path_to_url_path(fullname, trailing_slash=False)
-                preview_badge = (
-                    f'<a class="preview-badge" href="{file_url}?preview=1">VIEW</a>'
-                    if is_previewable
-                    else ""
-                )
-                new_badge = (
-                    '<span class="new-badge">NEW</span>'
-                    if NEW_FILE_TRACKER.is_new(fullname)
-                    else ""
-                )
-                escaped_name = html.escape(name).replace("'", "\\'")
-                file_url_attr = file_url.replace("\\", "\\\\").replace("'", "\\'")
+        start, end = ranges[0]
+        length = end - start + 1
+        self.send_response(206)
+        self.send_header("Content-Type", mime_type)
+        self.send_header("Content-Range", f"bytes {start}-{end}/{file_size}")
+        self.send_header("Content-Length", str(length))
+        self.send_header("Accept-Ranges", "bytes")
+        self._send_validators(etag, st.st_mtime)
+        self.end_headers()
+        sent, elapsed = self._send_file_range(filepath, start, length)
+        if log_action:
+            access_log(self, log_action, "206", filepath, sent, elapsed)
+
+    def _serve_multipart_ranges(
+        self,
+        filepath: str,
+        mime_type: str,
+        st: os.stat_result,
+        etag: str,
+        ranges: List[Tuple[int, int]],
+        log_action: Optional[str],
+    ) -> None:
+        """Stream several ranges as a multipart/byteranges 206 response."""
+        boundary = secrets.token_hex(16)
+        part_headers = [
+            (
+                f"\r\n--{boundary}\r\n"
+                f"Content-Type: {mime_type}\r\n"
+                f"Content-Range: bytes {start}-{end}/{st.st_size}\r\n\r\n"
+            ).encode("latin-1")
+            for start, end in ranges
+        ]
+        closing = f"\r\n--{boundary}--\r\n".encode("latin-1")
+        content_length = (
+            sum(len(header) for header in part_headers)
+            + sum(end - start + 1 for start, end in ranges)
+            + len(closing)
+        )
 
-                html_content += f'''
-        <div class="file-item" data-name="{html.escape(name)}" data-size="{size}" data-mtime="{mtime_ts}" data-type="file">
-            <div class="file-name">
-                <a href="{file_url}" target="_blank" rel="noopener noreferrer">{html.escape(name)}</a>{preview_badge}{new_badge}
-            </div>
-            <div class="file-size">{size_str}</div>
-            <div class="file-date">{mtime}</div>
-            <div class="file-actions">
-                <a href="{file_url}" class="action-btn" download>Download</a>
-                <button class="action-btn delete" onclick="confirmDelete('{file_url_attr}', false, '{escaped_name}')">Delete</button>
-            </div>
-        </div>
-'''
+        self.send_response(206)
+        self.send_header(
+            "Content-Type", f"multipart/byteranges; boundary={boundary}"
+        )
+        self.send_header("Content-Length", str(content_length))
+        self.send_header("Accept-Ranges", "bytes")
+        self._send_validators(etag, st.st_mtime)
+        self.end_headers()
 
-            has_entries = True
+        started = time.perf_counter()
+        sent = 0
+        with self._body_write_timeout():
+            try:
+                for header, (start, end) in zip(part_headers, ranges):
+                    self.wfile.write(header)
+                    length = end - start + 1
+                    written, _ = self._send_file_range(filepath, start, length)
+                    sent += written
+                    if written < length:
+                        break
+                else:
+                    self.wfile.write(closing)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+        if log_action:
+            access_log(
+                self, log_action, "206", filepath, sent, time.perf_counter() - started
+            )
 
-        if not has_entries:
-            html_content += """
-        <div class="empty-state">
-            <p>📭 This directory is empty</p>
-        </div>
-"""
+    def _file_validators(
+        self, filepath: str, preview: bool = False
+    ) -> Tuple[str, float]:
+        """Return (ETag, mtime) for a file; preview pages get a distinct weak tag."""
+        st = os.stat(filepath)
+        if preview:
+            return make_etag(st, weak=True, variant=f"-preview-{STATIC_VERSION}"), st.st_mtime
+        return make_etag(st), st.st_mtime
 
-        html_content += """
-    </div>
-</div>
-<footer>""" + html.escape(PORTAL_NAME) + """</footer>
-</div>
+    def _listing_validators(self, listing: "DirectoryListing") -> Tuple[str, float]:
+        """Return a weak (ETag, mtime) pair covering a directory page and its entries.
 
-<div class="modal-overlay" id="deleteModal">
-    <div class="modal">
-        <h3>⚠️ Confirm Delete</h3>
-        <p>Are you sure you want to delete <strong id="deleteFileName"></strong>?</p>
-        <p style="font-size: 0.8rem; color: var(--accent-red);" id="deleteDirWarning"></p>
-        <div class="modal-actions">
-            <button class="modal-btn cancel" onclick="closeDeleteModal()">Cancel</button>
-            <button class="modal-btn confirm" onclick="executeDelete()">Delete</button>
-        </div>
-    </div>
-</div>
+        The listing also embeds the pastebin, so its revision is part of the tag.
+        """
+        updated_at = PASTEBIN.snapshot()["updated_at"]
+        etag = f'W/"{listing.digest}-{int(updated_at * 1000):x}-{STATIC_VERSION}"'
+        return etag, max(listing.last_modified, updated_at)
+
+    def _send_validators(self, etag: str, mtime: float) -> None:
+        """Emit ETag and Last-Modified headers."""
+        self.send_header("ETag", etag)
+        self.send_header("Last-Modified", self.date_time_string(int(mtime)))
+
+    def _is_not_modified(self, etag: str, mtime: float) -> bool:
+        """Evaluate If-None-Match (preferred) or If-Modified-Since."""
+        if_none_match = self.headers.get("If-None-Match")
+        if if_none_match is not None:
+            return etag_matches(if_none_match, etag)
+        if_modified_since = self.headers.get("If-Modified-Since")
+        if if_modified_since:
+            since = parse_http_date(if_modified_since)
+            return since is not None and int(mtime) <= since
+        return False
 
-<script>
-var uploadZone = document.getElementById('uploadZone');
-var fileInput = document.getElementById('fileInput');
-var progressContainer = document.getElementById('progressContainer');
+    def _if_range_allows(self, etag: str, mtime: float) -> bool:
+        """Return True if a Range request may be honoured under its If-Range header."""
+        if_range = self.headers.get("If-Range")
+        if not if_range:
+            return True
+        if_range = if_range.strip()
+        if if_range.startswith('"') or if_range.startswith("W/"):
+            return not etag.startswith("W/") and if_range == etag
+        since = parse_http_date(if_range)
+        return since is not None and since == int(mtime)
+
+    def _send_not_modified(self, etag: str, mtime: float) -> None:
+        """Send a bodiless 304 response carrying the current validators."""
+        self.send_response(304)
+        self._send_validators(etag, mtime)
+        self.end_headers()
 
-function formatBytes(bytes) {
-    if (bytes === 0) return '0 B';
-    var k = 1024;
-    var sizes = ['B', 'KB', 'MB', 'GB'];
-    var i = Math.floor(Math.log(bytes) / Math.log(k));
-    return parseFloat((bytes / Math.pow(k, i)).toFixed(2)) + ' ' + sizes[i];
-}
+    def _can_sendfile(self) -> bool:
+        """Return True when the connection is a plain kernel socket usable with sendfile.
 
-function formatTime(seconds) {
-    if (!isFinite(seconds) || seconds < 0) return '-';
-    if (seconds < 60) return Math.round(seconds) + 's';
-    if (seconds < 3600) return Math.round(seconds / 60) + 'm ' + Math.round(seconds % 60) + 's';
-    return Math.floor(seconds / 3600) + 'h ' + Math.round((seconds % 3600) / 60) + 'm';
-}
+        TLS sockets (ssl.SSLSocket) and wrapped connections must see plaintext in
+        userspace, so they take the bounded read/write path instead.
+        """
+        return hasattr(os, "sendfile") and type(self.connection) is socket.socket
+
+    def _send_file_range(
+        self, filepath: str, offset: int, count: int
+    ) -> Tuple[int, float]:
+        """Send count bytes of a file starting at offset; return (bytes sent, seconds)."""
+        started = time.perf_counter()
+        sent = 0
+        try:
+            with open(filepath, "rb") as f, self._body_write_timeout():
+                if self._can_sendfile():
+                    self.wfile.flush()
+                    while sent < count:
+                        chunk = min(SENDFILE_CHUNK_SIZE, count - sent)
+                        written = self.connection.sendfile(f, offset + sent, chunk)
+                        if not written:
+                            break
+                        sent += written
+                else:
+                    f.seek(offset)
+                    while sent < count:
+                        data = f.read(min(DOWNLOAD_CHUNK_SIZE, count - sent))
+                        if not data:
+                            break
+                        self.wfile.write(data)
+                        sent += len(data)
+        except (BrokenPipeError, ConnectionResetError) as e:
+            # Client gone mid-body: the response is truncated, so the connection
+            # cannot carry another request.
+            self.close_connection = True
+            if sent < count:
+                debug("Truncated file transfer", path=filepath, sent=sent, expected=count, error=str(e))
+        return sent, time.perf_counter() - started
+
+    def _serve_thumbnail(self, filepath: str, query: dict) -> None:
+        """Serve a downscaled image: ?thumb=<edge>, rounded up to one of THUMBNAIL_SIZES.
+
+        Falls back to the original when Pillow is missing or the format is not
+        supported. A ?v= matching the file's mtime makes the response immutable.
+        """
+        try:
+            requested = int(query["thumb"][0])
+        except ValueError:
+            self.send_error(400, "Invalid thumbnail size")
+            return
+        if not has_thumbnail(filepath):
+            self._serve_ranged(filepath)
+            return
 
-function updatePasteStatus(message, isError) {
-    var status = document.getElementById('pasteStatus');
-    if (!status) return;
-    status.textContent = message || '';
-    status.style.color = isError ? 'var(--accent-red)' : 'var(--text-secondary)';
-}
+        edge = next((size for size in THUMBNAIL_SIZES if size >= requested), THUMBNAIL_SIZES[-1])
+        fmt = "webp" if "image/webp" in self.headers.get("Accept", "") and THUMBNAILS.webp else "jpeg"
+        st = os.stat(filepath)
+        etag = make_etag(st, weak=True, variant=f"-thumb{edge}-{fmt}")
+        if self._is_not_modified(etag, st.st_mtime):
+            self._send_not_modified(etag, st.st_mtime)
+            return
 
-function togglePastebin() {
-    var section = document.getElementById('pasteSection');
-    var toggle = document.getElementById('pasteToggle');
-    if (!section || !toggle) return;
-    var collapsed = section.classList.toggle('collapsed');
-    toggle.textContent = collapsed ? 'Expand' : 'Collapse';
-}
+        data = THUMBNAILS.get(filepath, st, edge, fmt)
+        if data is None:
+            self._serve_ranged(filepath)
+            return
+        versioned = query.get("v", [""])[0] == str(int(st.st_mtime))
+        self.send_response(200)
+        self.send_header("Content-Type", f"image/{fmt}")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Vary", "Accept")
+        self.send_header(
+            "Cache-Control",
+            "public, max-age=31536000, immutable" if versioned else "no-cache",
+        )
+        self._send_validators(etag, st.st_mtime)
+        self.end_headers()
+        self.wfile.write(data)
 
-function formatPasteTime(timestamp) {
-    if (!timestamp || timestamp <= 0) return 'never';
-    var dt = new Date(timestamp * 1000);
-    var y = dt.getFullYear();
-    var m = String(dt.getMonth() + 1).padStart(2, '0');
-    var d = String(dt.getDate()).padStart(2, '0');
-    var h = String(dt.getHours()).padStart(2, '0');
-    var min = String(dt.getMinutes()).padStart(2, '0');
-    var s = String(dt.getSeconds()).padStart(2, '0');
-    return y + '/' + m + '/' + d + ' ' + h + ':' + min + ':' + s;
-}
+    def _serve_text_window(self, filepath: str, query: dict) -> None:
+        """Return a window of lines as JSON: ?start=N&count=M, or ?tail=M for the last M."""
+        try:
+            start = max(0, int(query.get("start", ["0"])[0]))
+            count = int(query.get("count", [str(PREVIEW_WINDOW_LINES)])[0])
+            tail = query.get("tail", [None])[0]
+            if tail is not None:
+                count = int(tail)
+        except ValueError:
+            self.send_error(400, "Invalid line window")
+            return
+        count = max(1, min(count, PREVIEW_MAX_WINDOW_LINES))
 
-function updatePasteMeta(data) {
-    var updatedAt = document.getElementById('pasteUpdatedAt');
-    var updatedBy = document.getElementById('pasteUpdatedBy');
-    var pasteSize = document.getElementById('pasteSize');
-    if (updatedAt) updatedAt.textContent = formatPasteTime(data.updated_at);
-    if (updatedBy) updatedBy.textContent = data.updated_by || '-';
-    if (pasteSize) pasteSize.textContent = formatBytes(data.size || 0);
-}
+        try:
+            with open(filepath, "rb") as f:
+                index = LINE_INDEX_CACHE.get(filepath, f)
+                total = index.lines
+                if tail is not None:
+                    start = max(0, total - count)
+                lines, partial = index.read_lines(
+                    f, start, count, PREVIEW_MAX_WINDOW_BYTES
+                )
+        except OSError as e:
+            self.send_error(500, f"Cannot read file: {str(e)}")
+            return
 
-function applyPasteState(data, message) {
-    var text = document.getElementById('pasteText');
-    if (text) {
-        text.value = data.text || '';
-    }
-    updatePasteMeta(data);
-    if (message) {
-        updatePasteStatus(message, false);
-    }
-}
+        payload = json.dumps(
+            {
+                "start": start,
+                "lines": lines,
+                "total": total,
+                "size": index.size,
+                "partial": partial and start + len(lines) == total,
+                "eof": start + len(lines) >= total,
+            }
+        ).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        payload = self._negotiate_body(payload, "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(payload)
 
-function loadPaste(showStatus) {
-    fetch('/__pastebin', { cache: 'no-store' })
-        .then(function(response) {
-            if (!response.ok) throw new Error(response.statusText || response.status);
-            return response.json();
-        })
-        .then(function(data) {
-            applyPasteState(data, showStatus ? 'Refreshed' : '');
-        })
-        .catch(function(err) {
-            updatePasteStatus('Refresh failed: ' + err.message, true);
-        });
-}
+    def serve_text_preview(self, filepath: str) -> None:
+        """Serve the first window of a text file; further lines load on scroll."""
+        try:
+            with open(filepath, "rb") as f:
+                index = LINE_INDEX_CACHE.get(filepath, f)
+                lines, partial = index.read_lines(
+                    f, 0, PREVIEW_WINDOW_LINES, PREVIEW_MAX_WINDOW_BYTES
+                )
+        except Exception as e:
+            self.send_error(500, f"Cannot read file: {str(e)}")
+            return
 
-function savePaste() {
-    var text = document.getElementById('pasteText');
-    if (!text) return;
-    updatePasteStatus('Saving...', false);
-    fetch('/__pastebin', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ text: text.value })
-    })
-        .then(function(response) {
-            if (!response.ok) throw new Error(response.statusText || response.status);
-            return response.json();
-        })
-        .then(function(data) {
-            applyPasteState(data, 'Saved');
-        })
-        .catch(function(err) {
-            updatePasteStatus('Save failed: ' + err.message, true);
-        });
-}
+        filename = os.path.basename(filepath)
+        file_size = self._format_size(index.size)
+        language = get_syntax_language(filepath)
+        line_count = index.lines
+        complete = len(lines) - 1 if partial else len(lines)
+        escaped_content = "".join(html.escape(line) + "\n" for line in lines[:complete])
+        if partial:
+            escaped_content += html.escape(lines[-1])
+        window_state = json.dumps(
+            {
+                "total": line_count,
+                "next": complete,
+                "rendered": len(lines),
+                "window": PREVIEW_WINDOW_LINES,
+                "language": language,
+            }
+        ).replace("</", "<\\/")
+
+        html_content = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(filename)} - Preview</title>
+<script>
+(function() {{
+    const t = localStorage.getItem('hftp-theme') || 'light';
+    document.documentElement.setAttribute('data-theme', t);
+}})();
+</script>
+<link rel="stylesheet" id="hljs-theme" href="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github.min.css">
+<script>
+(function() {{
+    const t = localStorage.getItem('hftp-theme');
+    if (t === 'dark') {{
+        document.getElementById('hljs-theme').href =
+            'https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/styles/github-dark.min.css';
+    }}
+}})();
+</script>
+<link rel="stylesheet" href="{STATIC_ASSETS["text-preview.css"].url}">
+</head>
+<body>
+<div class="container">
+    <div class="toolbar">
+        <div class="file-info">
+            <h1>📄 {html.escape(filename)}</h1>
+            <div class="file-meta">
+                <span>📏 {file_size}</span>
+                <span id="lineCount">📝 {line_count} lines</span>
+                <span>💻 {language}</span>
+            </div>
+        </div>
+        <div class="toolbar-actions">
+            <a href="./" class="btn">← Back</a>
+            <button class="btn" onclick="toggleTheme()"><span id="themeIcon">🌙</span></button>
+            <button class="btn" id="tailBtn" onclick="toggleTail()" title="Show the end of the file and follow appended lines">⏬ Tail</button>
+            <button class="btn" onclick="copyContent()">📋 Copy</button>
+            <a href="{quote(os.path.basename(filepath))}" class="btn btn-primary" download>⬇️ Download</a>
+        </div>
+    </div>
+    <div class="code-container">
+        <div class="code-wrapper">
+            <div class="line-numbers" id="lineNumbers"></div>
+            <pre><code class="language-{language}" id="codeContent">{escaped_content}</code></pre>
+        </div>
+        <div class="preview-status" id="previewStatus"></div>
+    </div>
+</div>
+<div class="toast" id="toast">Copied to clipboard!</div>
 
-function clearPaste() {
-    if (!confirm('Clear shared text?')) return;
-    fetch('/__pastebin', {
-        method: 'POST',
-        headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ action: 'clear' })
-    })
-        .then(function(response) {
-            if (!response.ok) throw new Error(response.statusText || response.status);
-            return response.json();
-        })
-        .then(function(data) {
-            applyPasteState(data, 'Cleared');
-        })
-        .catch(function(err) {
-            updatePasteStatus('Clear failed: ' + err.message, true);
-        });
-}
+<script src="https://cdnjs.cloudflare.com/ajax/libs/highlight.js/11.9.0/highlight.min.js"></script>
+<script>const preview = {window_state};</script>
+<script src="{STATIC_ASSETS["text-preview.js"].url}"></script>
+</body>
+</html>'''
 
-function copyPaste() {
-    var text = document.getElementById('pasteText');
-    if (!text) return;
-    var finish = function() { updatePasteStatus('Copied', false); };
-    if (navigator.clipboard && navigator.clipboard.writeText) {
-        navigator.clipboard.writeText(text.value).then(finish).catch(function() {
-            fallbackCopy(text.value, finish);
-        });
-    } else {
-        fallbackCopy(text.value, finish);
-    }
-}
+        encoded = html_content.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        encoded = self._negotiate_body(encoded, "text/html")
+        self.send_header("Content-Length", str(len(encoded)))
+        self._send_validators(*self._file_validators(filepath, preview=True))
+        self.end_headers()
+        self.wfile.write(encoded)
 
-var currentSortKey = 'name';
-var currentSortDir = 'asc';
+    def serve_image_preview(self, filepath: str) -> None:
+        """Serve an image file with an inline preview page."""
+        filename = os.path.basename(filepath)
+        st = os.stat(filepath)
+        file_size = self._format_size(st.st_size)
+        ext = os.path.splitext(filename)[1].lower()
+        original_url = quote(filename)
+        if has_thumbnail(filepath):
+            img_url = f"{original_url}?thumb={THUMBNAIL_SIZES[-1]}&v={int(st.st_mtime)}"
+            original_button = '<button class="btn" id="originalBtn" onclick="showOriginal()" title="Load the full-resolution file">🔍 Original</button>'
+        else:
+            img_url = original_url
+            original_button = ""
 
-function applySort() {
-    var container = document.getElementById('fileListBody');
-    if (!container) return;
-    var nodeList = container.getElementsByClassName('file-item');
-    if (!nodeList || nodeList.length === 0) return;
+        html_content = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(filename)} - Preview</title>
+<script>(function(){{const t=localStorage.getItem('hftp-theme')||'light';document.documentElement.setAttribute('data-theme',t);}})();</script>
+<link rel="stylesheet" href="{STATIC_ASSETS["image-preview.css"].url}">
+</head>
+<body>
+<div class="container">
+    <div class="toolbar">
+        <div class="file-info">
+            <h1>🖼️ {html.escape(filename)}</h1>
+            <div class="file-meta">
+                <span>📏 {file_size}</span>
+                <span>🎨 {ext.lstrip(".").upper()}</span>
+            </div>
+        </div>
+        <div class="toolbar-actions">
+            <div class="zoom-controls">
+                <button class="zoom-btn" onclick="zoomBy(1/1.25)" title="Zoom out">−</button>
+                <span class="zoom-label" id="zoomLabel">100%</span>
+                <button class="zoom-btn" onclick="zoomBy(1.25)" title="Zoom in">+</button>
+                <button class="zoom-btn" onclick="resetZoom()" title="Reset (double-click image)">⟲</button>
+            </div>
+            <a href="./" class="btn">← Back</a>
+            <button class="btn" onclick="toggleTheme()"><span id="themeIcon">🌙</span></button>
+            {original_button}
+            <a href="{original_url}" class="btn btn-primary" download>⬇️ Download</a>
+        </div>
+    </div>
+    <div class="image-container" id="imgContainer">
+        <img src="{img_url}" alt="{html.escape(filename)}" id="previewImg" data-original="{original_url}"
+             onload="onImageLoad(this)">
+    </div>
+</div>
+<script src="{STATIC_ASSETS["image-preview.js"].url}"></script>
+</body>
+</html>'''
 
-    var upItem = null;
-    var items = [];
-    for (var idx = 0; idx < nodeList.length; idx += 1) {
-        var el = nodeList[idx];
-        if (el.getAttribute('data-up') === '1') {
-            upItem = el;
-        } else {
-            items.push(el);
-        }
-    }
+        encoded = html_content.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        encoded = self._negotiate_body(encoded, "text/html")
+        self.send_header("Content-Length", str(len(encoded)))
+        self._send_validators(*self._file_validators(filepath, preview=True))
+        self.end_headers()
+        self.wfile.write(encoded)
 
-    items.sort(function(a, b) {
-        var typeA = a.getAttribute('data-type') || 'file';
-        var typeB = b.getAttribute('data-type') || 'file';
+    def serve_video_preview(self, filepath: str) -> None:
+        """Serve a browser-native video player preview page."""
+        filename = os.path.basename(filepath)
+        file_size = self._format_size(os.path.getsize(filepath))
+        ext = os.path.splitext(filename)[1].lower()
+        mime_type = VIDEO_MIME_TYPES.get(ext, "video/mp4")
+        video_url = quote(filename)
 
-        if (typeA !== typeB) {
-            return typeA === 'dir' ? -1 : 1;
-        }
+        html_content = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{html.escape(filename)} - Preview</title>
+<script>(function(){{const t=localStorage.getItem('hftp-theme')||'light';document.documentElement.setAttribute('data-theme',t);}})();</script>
+<link rel="stylesheet" href="{STATIC_ASSETS["video-preview.css"].url}">
+</head>
+<body>
+<div class="container">
+    <div class="toolbar">
+        <div class="file-info">
+            <h1>🎬 {html.escape(filename)}</h1>
+            <div class="file-meta">
+                <span>📏 {file_size}</span>
+                <span>🎞️ {ext.lstrip(".").upper()}</span>
+                <span id="durInfo"></span>
+            </div>
+        </div>
+        <div class="toolbar-actions">
+            <a href="./" class="btn">← Back</a>
+            <button class="btn" onclick="toggleTheme()"><span id="themeIcon">🌙</span></button>
+            <a href="{video_url}" class="btn btn-primary" download>⬇️ Download</a>
+        </div>
+    </div>
+    <div class="video-container">
+        <video controls preload="metadata" id="videoPlayer">
+            <source src="{video_url}" type="{mime_type}">
+        </video>
+    </div>
+</div>
+<script src="{STATIC_ASSETS["video-preview.js"].url}"></script>
+</body>
+</html>'''
 
-        if (currentSortKey === 'name') {
-            var nameA = (a.getAttribute('data-name') || '').toLowerCase();
-            var nameB = (b.getAttribute('data-name') || '').toLowerCase();
-            if (nameA < nameB) return currentSortDir === 'asc' ? -1 : 1;
-            if (nameA > nameB) return currentSortDir === 'asc' ? 1 : -1;
-            return 0;
-        }
+        encoded = html_content.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-type", "text/html; charset=utf-8")
+        encoded = self._negotiate_body(encoded, "text/html")
+        self.send_header("Content-Length", str(len(encoded)))
+        self._send_validators(*self._file_validators(filepath, preview=True))
+        self.end_headers()
+        self.wfile.write(encoded)
 
-        if (currentSortKey === 'size') {
-            var sizeA = parseFloat(a.getAttribute('data-size') || '0');
-            var sizeB = parseFloat(b.getAttribute('data-size') || '0');
-            if (sizeA === sizeB) return 0;
-            return currentSortDir === 'asc' ? sizeA - sizeB : sizeB - sizeA;
-        }
+    def do_PUT(self) -> None:
+        """Handle PUT requests for pastebin updates or file uploads."""
+        parsed = urlparse(self.path)
+        if parsed.path == PASTEBIN_ENDPOINT:
+            self._handle_pastebin_put()
+            return
 
-        if (currentSortKey === 'mtime') {
-            var mA = parseFloat(a.getAttribute('data-mtime') || '0');
-            var mB = parseFloat(b.getAttribute('data-mtime') || '0');
-            if (mA === mB) return 0;
-            return currentSortDir === 'asc' ? mA - mB : mB - mA;
-        }
+        path = self.translate_path(parsed.path)
+        if parsed.path.endswith("/"):
+            access_log(self, "upload", "400")
+            self.send_error(400, "Cannot PUT to directory")
+            return
 
-        return 0;
-    });
+        action = "upload"
+        try:
+            length = int(self.headers["Content-Length"])
+            result = UPLOAD_COORDINATOR.write_stream(
+                path, self.rfile, length, self._wants_durable()
+            )
+            action = "modify" if result.existed else "upload"
 
-    container.innerHTML = '';
-    if (upItem) {
-        container.appendChild(upItem);
-    }
-    for (var i = 0; i < items.length; i += 1) {
-        container.appendChild(items[i]);
-    }
+            NEW_FILE_TRACKER.register(path)
+            self.send_response(201)
+            self.end_headers()
+            access_log(self, action, "201", path)
+            debug("File uploaded via PUT", path=path)
+        except Exception as e:
+            access_log(self, action, "500", path)
+            debug("PUT error", error=str(e))
+            self.send_error(500, str(e))
 
-    var headers = document.getElementsByClassName('file-list-header-cell');
-    for (var j = 0; j < headers.length; j += 1) {
-        var btn = headers[j];
-        var key = btn.getAttribute('data-sort-key');
-        var indicator = btn.querySelector('.sort-indicator');
-        if (key === currentSortKey) {
-            btn.classList.add('active');
-            if (indicator) {
-                indicator.textContent = currentSortDir === 'asc' ? '▲' : '▼';
-            }
-        } else {
-            btn.classList.remove('active');
-            if (indicator) {
-                indicator.textContent = '';
-            }
-        }
-    }
-}
+    def translate_path(self, path: str) -> str:
+        """Convert URL path to filesystem path, constrained to server root."""
+        path = unquote(path, errors="surrogateescape")
+        path = path.lstrip("/")
+        root = self.server.root_dir
+        joined = os.path.join(root, path)
+        resolved = os.path.realpath(joined)
 
-function setupSorting() {
-    var headers = document.getElementsByClassName('file-list-header-cell');
-    for (var i = 0; i < headers.length; i += 1) {
-        headers[i].addEventListener('click', function() {
-            var key = this.getAttribute('data-sort-key');
-            if (!key) return;
-            if (currentSortKey === key) {
-                currentSortDir = currentSortDir === 'asc' ? 'desc' : 'asc';
-            } else {
-                currentSortKey = key;
-                currentSortDir = 'asc';
-            }
-            applySort();
-        });
-    }
-    applySort();
-}
+        if resolved == root:
+            return resolved
 
-var activeUpload = false;
-var queuedUploads = [];
+        try:
+            common = os.path.commonpath([resolved, root])
+        except ValueError:
+            common = None
 
-function updateBatchProgress(label, percent, loaded, totalSize, speed, remaining) {
-    progressContainer.classList.add('active');
-    document.getElementById('fileName').textContent = label;
-    document.getElementById('progressFill').style.width = percent + '%';
-    document.getElementById('progressPercent').textContent = percent + '%';
-    document.getElementById('uploadedSize').textContent = formatBytes(loaded);
-    document.getElementById('totalSize').textContent = formatBytes(totalSize);
-    document.getElementById('uploadSpeed').textContent = speed;
-    document.getElementById('timeRemaining').textContent = remaining;
-}
+        if common == root:
+            return resolved
 
-function uploadBatch(files, basePath, onProgress) {
-    return new Promise(function(resolve, reject) {
-        const xhr = new XMLHttpRequest();
-        const formData = new FormData();
-        files.forEach(function(file) {
-            formData.append('file', file, file.name);
-        });
+        current = joined
+        while True:
+            if os.path.islink(current):
+                return resolved
+            parent = os.path.dirname(current)
+            if parent == current or not parent.startswith(root):
+                break
+            current = parent
 
-        let lastLoaded = 0;
-        let lastTime = Date.now();
-        let smoothedSpeed = 0;
-        let speedText = '-';
-        let remainingText = '-';
+        return root
 
-        xhr.upload.addEventListener('progress', function(e) {
-            if (e.lengthComputable) {
-                const percent = Math.round((e.loaded / e.total) * 100);
-                const now = Date.now();
-                const timeDiff = (now - lastTime) / 1000;
-                if (timeDiff >= 0.25) {
-                    const byteDiff = e.loaded - lastLoaded;
-                    const measuredSpeed = byteDiff / timeDiff;
-                    if (measuredSpeed > 0) {
-                        smoothedSpeed = smoothedSpeed > 0
-                            ? smoothedSpeed * 0.7 + measuredSpeed * 0.3
-                            : measuredSpeed;
-                        speedText = formatBytes(smoothedSpeed) + '/s';
-                    }
-                    lastLoaded = e.loaded;
-                    lastTime = now;
-                }
-                remainingText = smoothedSpeed > 0
-                    ? formatTime((e.total - e.loaded) / smoothedSpeed)
-                    : '-';
-                onProgress(e.loaded, e.total, speedText, remainingText);
-            }
-        });
+    def _translate_path_for_read(self, url_path: str) -> str:
+        """
+        Convert URL path to filesystem path for read-only operations.
 
-        xhr.addEventListener('load', function() {
-            if (xhr.status >= 200 && xhr.status < 300) {
-                resolve();
-            } else {
-                reject(new Error(xhr.status + ' ' + (xhr.statusText || 'upload failed')));
-            }
-        });
+        This translation blocks '..' traversal but intentionally does not resolve symlinks.
+        It enables serving symlink entries that point outside the server root while keeping
+        URL-path traversal constrained to the root.
+        """
+        path = unquote(url_path, errors="surrogateescape")
+        path = path.split("?", 1)[0].split("#", 1)[0]
+        path = path.lstrip("/")
+        root = self.server.root_dir
 
-        xhr.addEventListener('error', function() {
-            reject(new Error('network error'));
-        });
+        normalized = os.path.normpath(path)
+        if normalized in (".", ""):
+            return root
+        if normalized.startswith("..") or os.path.isabs(normalized):
+            return root
+        return os.path.join(root, normalized)
 
-        xhr.open('POST', basePath, true);
-        xhr.send(formData);
-    });
-}
+    def _fs_path_to_url_path(self, fs_path: str, trailing_slash: bool = False) -> str:
+        """Convert filesystem path under root to URL path (avoids symlink duplication)."""
+        root = self.server.root_dir
+        try:
+            rel = os.path.relpath(fs_path, root)
+        except ValueError:
+            return "/"
+        if rel == "." or rel.startswith(".."):
+            return "/"
+        parts = rel.replace(os.sep, "/").split("/")
+        parts = [p for p in parts if p]
+        url = "/" + "/".join(quote(p, errors="surrogateescape") for p in parts)
+        if trailing_slash and os.path.isdir(fs_path):
+            url += "/"
+        return url
 
-function uploadFiles(files) {
-    if (!files || files.length === 0) return;
-    const validFiles = files.filter(function(file) {
-        return file && typeof file.name === 'string';
-    });
-    if (validFiles.length === 0) return;
-    queuedUploads.push(validFiles);
-    if (activeUpload) return;
-    uploadNextBatch();
-}
+    def log_message(self, format, *args):
+        """Override to reduce console noise"""
+        if DEBUG_MODE:
+            super().log_message(format, *args)
 
-function uploadNextBatch() {
-    const files = queuedUploads.shift();
-    if (!files || files.length === 0) {
-        activeUpload = false;
-        return;
-    }
+    def list_directory(self, path: str) -> Optional[io.BytesIO]:
+        """Generate directory listing HTML page (None when 304 or error was sent)"""
+        try:
+            listing = self._get_listing(path)
+        except OSError:
+            self.send_error(404, "No permission to list directory")
+            return None
 
-    activeUpload = true;
-    const basePath = (window.location.pathname || '/').replace(/\\/$/, '') + '/';
-    const total = files.length;
-    const totalSize = files.reduce(function(size, file) {
-        return size + file.size;
-    }, 0);
-    const label = total > 1 ? 'Uploading ' + total + ' files' : files[0].name;
-    updateBatchProgress(label, 0, 0, totalSize, '-', '-');
-    uploadBatch(files, basePath, function(loaded, requestSize, speed, remaining) {
-        const uploadedSize = requestSize > 0
-            ? Math.min(totalSize, Math.round((loaded / requestSize) * totalSize))
-            : 0;
-        const percent = totalSize > 0 ? Math.round((uploadedSize / totalSize) * 100) : 100;
-        updateBatchProgress(label, percent, uploadedSize, totalSize, speed, remaining);
-    })
-        .then(function() {
-            updateBatchProgress(label, 100, totalSize, totalSize, '-', '0s');
-            document.getElementById('progressPercent').textContent = 'Complete!';
-            if (queuedUploads.length > 0) {
-                uploadNextBatch();
-            } else {
-                activeUpload = false;
-                setTimeout(function() { location.reload(); }, 800);
-            }
-        })
-        .catch(function(err) {
-            activeUpload = false;
-            queuedUploads = [];
-            document.getElementById('progressPercent').textContent = 'Failed';
-            document.getElementById('uploadSpeed').textContent = '-';
-            document.getElementById('timeRemaining').textContent = 'Select files to retry';
-            alert('Upload failed: ' + err.message);
-        });
-}
+        etag, last_modified = self._listing_validators(listing)
+        if self._is_not_modified(etag, last_modified):
+            try:
+                listing = self._get_listing(path, revalidate=True)
+            except OSError:
+                self.send_error(404, "No permission to list directory")
+                return None
+            etag, last_modified = self._listing_validators(listing)
+            if self._is_not_modified(etag, last_modified):
+                access_log(self, "view", "304", path)
+                self._send_not_modified(etag, last_modified)
+                return None
 
-uploadZone.addEventListener('dragover', function(e) {
-    e.preventDefault();
-    uploadZone.classList.add('dragover');
-});
+        # The first page is rendered inline in stored order, which is the name/asc order.
+        first_page_cursor = (
+            listing.cursor_after(LISTING_PAGE_SIZE - 1, "name", False)
+            if listing.count > LISTING_PAGE_SIZE
+            else ""
+        )
+        displaypath = unquote(self.path)
+        enc = sys.getfilesystemencoding()
+        title = f"{PORTAL_NAME} - Directory: {displaypath}"
+        paste_snapshot = PASTEBIN.snapshot()
+        paste_text = html.escape(paste_snapshot["text"])
+        paste_size = self._format_size(paste_snapshot["size"])
+        paste_updated = self._format_paste_time(paste_snapshot["updated_at"])
+        paste_updated_by = html.escape(paste_snapshot["updated_by"] or "-")
+
+        html_content = f'''<!DOCTYPE html>
+<html lang="en">
+<head>
+<meta charset="{enc}">
+<meta name="viewport" content="width=device-width, initial-scale=1.0">
+<title>{title}</title>
+<script>(function(){{const t=localStorage.getItem('hftp-theme')||'light';document.documentElement.setAttribute('data-theme',t);}})();</script>
+<link rel="stylesheet" href="{STATIC_ASSETS["listing.css"].url}">
+</head>
+<body>
+<div class="container">
+    <header>
+        <div class="header-left">
+            <h1>{html.escape(PORTAL_NAME)}</h1>
+            <div class="breadcrumb">{self._generate_breadcrumb(displaypath)}</div>
+            <div class="archive-links">Download folder: <a href="?archive=zip" download>zip</a> · <a href="?archive=tar.gz" download>tar.gz</a></div>
+        </div>
+        <button class="theme-toggle" onclick="toggleTheme()">
+            <span id="themeText">Dark</span>
+        </button>
+    </header>
+
+    <div class="paste-section collapsed" id="pasteSection">
+        <div class="paste-header">
+            <div class="paste-header-left">
+                <div class="paste-title">Temporary Pastebin</div>
+                <div class="paste-meta" id="pasteMeta">
+                    <span>Updated</span>
+                    <span class="paste-meta-highlight paste-meta-time" id="pasteUpdatedAt">{paste_updated}</span>
+                    <span>by</span>
+                    <span class="paste-meta-highlight paste-meta-ip" id="pasteUpdatedBy">{paste_updated_by}</span>
+                    <span>·</span>
+                    <span class="paste-meta-size" id="pasteSize">{paste_size}</span>
+                </div>
+            </div>
+            <button type="button" class="paste-btn" id="pasteToggle" onclick="togglePastebin()">Expand</button>
+        </div>
+        <div class="paste-body">
+            <textarea class="paste-editor" id="pasteText" spellcheck="false" maxlength="{MAX_PASTEBIN_BYTES}">{paste_text}</textarea>
+            <div class="paste-actions">
+                <button type="button" class="paste-btn primary" onclick="savePaste()">Save</button>
+                <button type="button" class="paste-btn" onclick="loadPaste(true)">Refresh</button>
+                <button type="button" class="paste-btn" onclick="copyPaste()">Copy</button>
+                <button type="button" class="paste-btn danger" onclick="clearPaste()">Clear</button>
+                <span class="paste-status" id="pasteStatus"></span>
+            </div>
+            <div class="paste-cli">
+                <div class="paste-command-row">
+                    <code id="cmdPasteCurlGet"></code>
+                    <button onclick="copyCmd(this, window.__hftpPasteCmds.curlGet)" title="Copy">⎘</button>
+                </div>
+                <div class="paste-command-row">
+                    <code id="cmdPasteCurlPut"></code>
+                    <button onclick="copyCmd(this, window.__hftpPasteCmds.curlPut)" title="Copy">⎘</button>
+                </div>
+                <div class="paste-command-row">
+                    <code id="cmdPasteCurlPipe"></code>
+                    <button onclick="copyCmd(this, window.__hftpPasteCmds.curlPipe)" title="Copy">⎘</button>
+                </div>
+                <div class="paste-command-row">
+                    <code id="cmdPasteWgetGet"></code>
+                    <button onclick="copyCmd(this, window.__hftpPasteCmds.wgetGet)" title="Copy">⎘</button>
+                </div>
+                <div class="paste-command-row">
+                    <code id="cmdPasteWgetPut"></code>
+                    <button onclick="copyCmd(this, window.__hftpPasteCmds.wgetPut)" title="Copy">⎘</button>
+                </div>
+                <div class="paste-command-row">
+                    <code id="cmdPasteWgetPipe"></code>
+                    <button onclick="copyCmd(this, window.__hftpPasteCmds.wgetPipe)" title="Copy">⎘</button>
+                </div>
+            </div>
+        </div>
+    </div>
 
-uploadZone.addEventListener('dragleave', function(e) {
-    e.preventDefault();
-    uploadZone.classList.remove('dragover');
-});
+    <div class="upload-section">
+        <div class="upload-title">Upload File</div>
+        <div class="upload-zone" id="uploadZone">
+            <input type="file" id="fileInput" name="file" multiple>
+            <p>Drag & drop, click to browse, or press Ctrl+V to paste from clipboard</p>
+            <button type="button" class="btn" onclick="document.getElementById('fileInput').click()">Select File(s)</button>
+        </div>
+        <div style="display:flex;flex-direction:column;gap:6px;margin-top:4px;">
+            <div style="display:flex;align-items:center;background:var(--bg-secondary);border:1px solid var(--border-color);border-radius:6px;overflow:hidden;">
+                <code id="cmdCurlPut" style="flex:1;padding:6px 10px;font-family:'SF Mono','Fira Code',Consolas,monospace;font-size:0.8em;white-space:nowrap;overflow-x:auto;background:transparent;"></code>
+                <button onclick="copyCmd(this, window.__hftpCmds.curlPut)" style="flex-shrink:0;padding:4px 8px;background:transparent;border:none;border-left:1px solid var(--border-color);cursor:pointer;color:var(--text-muted);font-size:0.75em;" title="Copy">⎘</button>
+            </div>
+            <div style="display:flex;align-items:center;background:var(--bg-secondary);border:1px solid var(--border-color);border-radius:6px;overflow:hidden;">
+                <code id="cmdCurlPutBinary" style="flex:1;padding:6px 10px;font-family:'SF Mono','Fira Code',Consolas,monospace;font-size:0.8em;white-space:nowrap;overflow-x:auto;background:transparent;"></code>
+                <button onclick="copyCmd(this, window.__hftpCmds.curlPutBinary)" style="flex-shrink:0;padding:4px 8px;background:transparent;border:none;border-left:1px solid var(--border-color);cursor:pointer;color:var(--text-muted);font-size:0.75em;" title="Copy">⎘</button>
+            </div>
+            <div style="display:flex;align-items:center;background:var(--bg-secondary);border:1px solid var(--border-color);border-radius:6px;overflow:hidden;">
+                <code id="cmdWgetPut" style="flex:1;padding:6px 10px;font-family:'SF Mono','Fira Code',Consolas,monospace;font-size:0.8em;white-space:nowrap;overflow-x:auto;background:transparent;"></code>
+                <button onclick="copyCmd(this, window.__hftpCmds.wgetPut)" style="flex-shrink:0;padding:4px 8px;background:transparent;border:none;border-left:1px solid var(--border-color);cursor:pointer;color:var(--text-muted);font-size:0.75em;" title="Copy">⎘</button>
+            </div>
+        </div>
+        <div class="progress-container" id="progressContainer">
+            <div class="progress-info">
+                <span id="fileName">-</span>
+                <span id="progressPercent">0%</span>
+            </div>
+            <div class="progress-bar">
+                <div class="progress-fill" id="progressFill"></div>
+            </div>
+            <div class="progress-stats">
+                <div class="stat-item">
+                    <div class="stat-label">Total Size</div>
+                    <div class="stat-value" id="totalSize">-</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">Uploaded</div>
+                    <div class="stat-value" id="uploadedSize">-</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">Speed</div>
+                    <div class="stat-value" id="uploadSpeed">-</div>
+                </div>
+                <div class="stat-item">
+                    <div class="stat-label">Remaining</div>
+                    <div class="stat-value" id="timeRemaining">-</div>
+                </div>
+            </div>
+        </div>
+    </div>
 
-uploadZone.addEventListener('drop', function(e) {
-    e.preventDefault();
-    uploadZone.classList.remove('dragover');
-    const files = e.dataTransfer.files;
-    if (files.length > 0) uploadFiles(Array.from(files));
-});
+        <div class="file-list">
+        <div class="file-list-header">
+            <button type="button" class="file-list-header-cell sortable" data-sort-key="name">
+                <span>Name</span><span class="sort-indicator" data-key="name"></span>
+            </button>
+            <button type="button" class="file-list-header-cell sortable" data-sort-key="size">
+                <span>Size</span><span class="sort-indicator" data-key="size"></span>
+            </button>
+            <button type="button" class="file-list-header-cell sortable" data-sort-key="mtime">
+                <span>Modified</span><span class="sort-indicator" data-key="mtime"></span>
+            </button>
+            <span>Actions</span>
+        </div>
+        <div id="fileListBody" data-cursor="{first_page_cursor}" data-page-size="{LISTING_PAGE_SIZE}">
+'''
 
-document.addEventListener('paste', function(e) {
-    if (!e.clipboardData || !e.clipboardData.items) {
-        return;
-    }
-    var items = e.clipboardData.items;
-    var files = [];
-    var ts = Date.now();
-    for (var i = 0; i < items.length; i += 1) {
-        var item = items[i];
-        if (item.kind === 'file') {
-            var file = item.getAsFile();
-            if (file) {
-                var name = file.name || '';
-                var dotIndex = name.lastIndexOf('.');
-                var base = dotIndex > 0 ? name.slice(0, dotIndex) : name;
-                var ext = dotIndex > 0 ? name.slice(dotIndex) : '';
+        root = self.server.root_dir
+        if os.path.normpath(path.rstrip(os.sep)) != os.path.normpath(
+            root.rstrip(os.sep)
+        ):
+            try:
+                parent_fs = os.path.dirname(path)
+                parent_rel = os.path.relpath(parent_fs, root)
+                if parent_rel.startswith("..") or parent_rel == "..":
+                    parent_url = "/"
+                else:
+                    parent_url = self._fs_path_to_url_path(
+                        parent_fs, trailing_slash=True
+                    )
+            except ValueError:
+                parent_url = "/"
+            html_content += f"""
+        <div class="file-item" data-name=".." data-size="0" data-mtime="0" data-type="dir" data-up="1">
+            <div class="file-name">
+                <a href="{parent_url}">..</a>
+                <span class="folder-badge">DIR</span>
+            </div>
+            <div class="file-size">-</div>
+            <div class="file-date">-</div>
+            <div class="file-actions"></div>
+        </div>
+"""
 
-                if (base === 'image' && (ext === '.png' || ext === '.jpg' || ext === '.jpeg')) {
-                    var newName = base + '-' + ts + '-' + i + ext;
-                    if (typeof File === 'function') {
-                        files.push(new File([file], newName, { type: file.type }));
-                    } else {
-                        file.name = newName;
-                        files.push(file);
-                    }
-                } else {
-                    files.push(file);
-                }
-            }
-        }
-    }
-    if (files.length > 0) {
-        e.preventDefault();
-        uploadFiles(files);
-    }
-});
+        if listing.count:
+            html_content += "".join(listing.rows[:LISTING_PAGE_SIZE])
+        else:
+            html_content += """
+        <div class="empty-state">
+            <p>📭 This directory is empty</p>
+        </div>
+"""
 
-fileInput.addEventListener('change', function(e) {
-    const files = e.target.files;
-    if (files && files.length > 0) uploadFiles(Array.from(files));
-    e.target.value = '';
-});
+        html_content += f"""
+    </div>
+    <div id="listingSentinel"></div>
+</div>
+<footer>{html.escape(PORTAL_NAME)}</footer>
+</div>
 
-// Theme toggle
-function initTheme() {
-    const saved = localStorage.getItem('hftp-theme');
-    const theme = saved || 'light';
-    document.documentElement.setAttribute('data-theme', theme);
-    updateThemeButton(theme);
-}
+<div class="modal-overlay" id="deleteModal">
+    <div class="modal">
+        <h3>⚠️ Confirm Delete</h3>
+        <p>Are you sure you want to delete <strong id="deleteFileName"></strong>?</p>
+        <p style="font-size: 0.8rem; color: var(--accent-red);" id="deleteDirWarning"></p>
+        <div class="modal-actions">
+            <button class="modal-btn cancel" onclick="closeDeleteModal()">Cancel</button>
+            <button class="modal-btn confirm" onclick="executeDelete()">Delete</button>
+        </div>
+    </div>
+</div>
 
-function toggleTheme() {
-    const current = document.documentElement.getAttribute('data-theme') || 'light';
-    const next = current === 'dark' ? 'light' : 'dark';
-    document.documentElement.setAttribute('data-theme', next);
-    localStorage.setItem('hftp-theme', next);
-    updateThemeButton(next);
-}
+<script src="{STATIC_ASSETS["listing.js"].url}"></script>
+</body>
+</html>"""
 
-function updateThemeButton(theme) {
-    document.getElementById('themeText').textContent = theme === 'dark' ? 'Light theme' : 'Dark theme';
-}
+        encoded = html_content.encode(enc, "surrogateescape")
 
-initTheme();
-setupSorting();
-loadPaste(false);
+        self.send_response(200)
+        self.send_header("Content-type", f"text/html; charset={enc}")
+        encoded = self._negotiate_body(encoded, "text/html")
+        self.send_header("Content-Length", str(len(encoded)))
+        self._send_validators(etag, last_modified)
+        self.end_headers()
+        access_log(self, "view", "200", path, len(encoded))
+        return io.BytesIO(encoded)
 
-// Delete functionality
-let deleteTarget = '';
-let deleteIsDir = false;
+    def _serve_listing_json(self, path: str, query: dict) -> None:
+        """Stream one page of a directory listing as JSON.
 
-function confirmDelete(deleteUrl, isDir, displayName) {
-    deleteTarget = deleteUrl;
-    deleteIsDir = isDir;
-    document.getElementById('deleteFileName').textContent = displayName || deleteUrl;
-    document.getElementById('deleteDirWarning').textContent = isDir 
-        ? 'This will delete the folder and all its contents!' 
-        : '';
-    document.getElementById('deleteModal').classList.add('show');
-}
+        Query: sort=name|size|mtime, order=asc|desc, prefix=<name prefix>,
+        cursor=<next_cursor of the previous page, empty for the first>,
+        limit=<page size>.
+        """
+        sort = query.get("sort", ["name"])[0]
+        order = query.get("order", ["asc"])[0]
+        prefix = query.get("prefix", [""])[0]
+        cursor = query.get("cursor", [""])[0] or None
+        try:
+            limit = int(query.get("limit", [str(LISTING_PAGE_SIZE)])[0])
+        except ValueError:
+            self.send_error(400, "limit must be an integer")
+            return
+        if sort not in LISTING_SORT_KEYS or order not in ("asc", "desc"):
+            self.send_error(400, "Invalid sort or order")
+            return
+        if limit < 1:
+            self.send_error(400, "Invalid limit")
+            return
+        limit = min(limit, LISTING_MAX_LIMIT)
 
-function closeDeleteModal() {
-    document.getElementById('deleteModal').classList.remove('show');
-    deleteTarget = '';
-    deleteIsDir = false;
-}
+        try:
+            listing = self._get_listing(path)
+        except OSError:
+            self.send_error(404, "No permission to list directory")
+            return
 
-function executeDelete() {
-    if (!deleteTarget) return;
-    
-    const xhr = new XMLHttpRequest();
-    xhr.open('DELETE', deleteTarget, true);
-    
-    xhr.onload = function() {
-        if (xhr.status === 200 || xhr.status === 204) {
-            location.reload();
-        } else {
-            alert('Delete failed: ' + xhr.statusText);
-            closeDeleteModal();
-        }
-    };
-    
-    xhr.onerror = function() {
-        alert('Delete error occurred');
-        closeDeleteModal();
-    };
-    
-    xhr.send();
-}
+        etag = f'W/"{listing.digest}-json"'
+        if self._is_not_modified(etag, listing.last_modified):
+            try:
+                listing = self._get_listing(path, revalidate=True)
+            except OSError:
+                self.send_error(404, "No permission to list directory")
+                return
+            etag = f'W/"{listing.digest}-json"'
+            if self._is_not_modified(etag, listing.last_modified):
+                self._send_not_modified(etag, listing.last_modified)
+                return
 
-document.getElementById('deleteModal').addEventListener('click', function(e) {
-    if (e.target === this) closeDeleteModal();
-});
+        descending = order == "desc"
+        indices = listing.order(sort, descending)
+        if prefix:
+            indices = [i for i in indices if listing.entries[i].name.startswith(prefix)]
+        start = 0
+        if cursor is not None:
+            try:
+                start = listing.resume(
+                    listing.entries, indices, cursor, sort, descending
+                )
+            except ValueError as e:
+                self.send_error(400, str(e))
+                return
+        page = indices[start : start + limit]
+        more = start + len(page) < len(indices)
+
+        head = {
+            "path": unquote(urlparse(self.path).path),
+            "total": len(indices),
+            "cursor": cursor,
+            "next_cursor": (
+                listing.cursor_after(page[-1], sort, descending) if more else None
+            ),
+        }
+        self._start_stream(200, "application/json; charset=utf-8")
+        self._send_validators(etag, listing.last_modified)
+        self.end_headers()
+        with self._body_write_timeout():
+            try:
+                self._write_stream(json.dumps(head)[:-1].encode("utf-8") + b', "entries": [')
+                for offset in range(0, len(page), 256):
+                    batch = page[offset : offset + 256]
+                    # ensure_ascii keeps undecodable names (lone surrogates) valid JSON text.
+                    chunk = ", ".join(
+                        json.dumps(listing.entries[i].to_json()) for i in batch
+                    )
+                    if offset:
+                        chunk = ", " + chunk
+                    self._write_stream(chunk.encode("ascii"))
+                self._write_stream(b"]}")
+                self._end_stream()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
 
-function initUploadCliExamples() {
-    const base = window.location.origin.replace(/\\/+$/, '');
-    const path = (window.location.pathname || '/').replace(/\\/+$/, '') + '/file.txt';
-    const target = base + path;
+    def _serve_archive(self, path: str, fmt: str) -> None:
+        """Stream the directory as a zip, tar or tar.gz archive generated on the fly."""
+        if fmt not in ARCHIVE_FORMATS:
+            self.send_error(400, f"archive must be one of: {', '.join(ARCHIVE_FORMATS)}")
+            return
+        name = os.path.basename(path.rstrip(os.sep)) or "files"
+        archive = DirectoryArchive(path, fmt, name)
+        try:
+            archive.scan(ARCHIVE_MAX_ENTRIES, ARCHIVE_MAX_BYTES)
+        except ArchiveLimitError as e:
+            access_log(self, "archive", "413", path)
+            self.send_error(413, str(e))
+            return
 
-    window.__hftpCmds = {
-        curlPut: `curl ${target} -T file.txt`,
-        curlPutBinary: `curl ${target} -X PUT --data-binary @file.txt`,
-        wgetPut: `wget ${target} --method=PUT --body-file=file.txt`
-    };
+        content_type, suffix = ARCHIVE_FORMATS[fmt]
+        filename = name + suffix
+        fallback = filename.encode("ascii", "replace").decode("ascii").replace('"', "_")
+        started = time.perf_counter()
+        self._start_stream(200, content_type, compress=False)
+        self.send_header(
+            "Content-Disposition",
+            f"attachment; filename=\"{fallback}\"; filename*=UTF-8''{quote(filename)}",
+        )
+        self.end_headers()
+        sink = ArchiveSink(self._write_stream)
+        status = "200"
+        with self._body_write_timeout():
+            try:
+                archive.write(sink)
+                self._end_stream()
+            except (BrokenPipeError, ConnectionResetError):
+                status = "aborted"
+            except (OSError, tarfile.TarError, zipfile.LargeZipFile) as e:
+                # Headers are gone; dropping the connection without the final chunk
+                # is the only way left to tell the client the archive is incomplete.
+                debug("Archive stream failed", path=path, error=str(e))
+                status = "500"
+        if status != "200":
+            self.close_connection = True
+        access_log(
+            self, "archive", status, path, sink.written, time.perf_counter() - started
+        )
 
-    const el1 = document.getElementById('cmdCurlPut');
-    const el2 = document.getElementById('cmdCurlPutBinary');
-    const el3 = document.getElementById('cmdWgetPut');
-    if (el1) el1.textContent = window.__hftpCmds.curlPut;
-    if (el2) el2.textContent = window.__hftpCmds.curlPutBinary;
-    if (el3) el3.textContent = window.__hftpCmds.wgetPut;
-}
+    def _start_stream(
+        self, status: int, content_type: str, compress: bool = True
+    ) -> None:
+        """Begin a response of unknown length; the caller finishes the headers.
 
-function initPasteCliExamples() {
-    const base = window.location.origin.replace(/\\/+$/, '');
-    const endpoint = base + '/__pastebin';
-    const rawEndpoint = endpoint + '?raw=1';
+        HTTP/1.1 clients get chunked transfer encoding (and may keep the connection),
+        older clients a close-delimited body. With compress, the body is gzipped
+        when the client accepts it.
+        """
+        self._chunked = self.request_version == "HTTP/1.1"
+        if self._chunked:
+            self.protocol_version = "HTTP/1.1"
+        self._stream_compressor = None
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        if compress:
+            self.send_header("Vary", "Accept-Encoding")
+        # Streams are gzip-only so they never depend on the optional brotli module.
+        if compress and choose_encoding(
+            self.headers.get("Accept-Encoding", ""), allow_br=False
+        ):
+            self._stream_compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+            self.send_header("Content-Encoding", "gzip")
+        if self._chunked:
+            self.send_header("Transfer-Encoding", "chunked")
+        else:
+            self.send_header("Connection", "close")
+
+    def _write_stream(self, data: bytes) -> None:
+        """Write one piece of a streamed body."""
+        if self._stream_compressor is not None:
+            # Sync-flush each piece so the client can start parsing before the end.
+            compressor = self._stream_compressor
+            data = compressor.compress(data) + compressor.flush(zlib.Z_SYNC_FLUSH)
+        if not data:
+            return
+        if self._chunked:
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(data), data))
+        else:
+            self.wfile.write(data)
+
+    def _end_stream(self) -> None:
+        """Terminate a streamed body."""
+        if self._stream_compressor is not None:
+            tail, self._stream_compressor = self._stream_compressor.flush(), None
+            if self._chunked:
+                self.wfile.write(b"%x\r\n%s\r\n" % (len(tail), tail))
+            else:
+                self.wfile.write(tail)
+        if self._chunked:
+            self.wfile.write(b"0\r\n\r\n")
 
-    window.__hftpPasteCmds = {
-        curlGet: `curl -sS '${rawEndpoint}'`,
-        curlPut: `curl '${endpoint}' -T paste.txt`,
-        curlPipe: `echo 'STH' | curl -sS -X PUT --data-binary @- '${endpoint}'`,
-        wgetGet: `wget -qO- '${rawEndpoint}'`,
-        wgetPut: `wget -O- '${endpoint}' --method=PUT --body-file=paste.txt`,
-        wgetPipe: `echo 'STH' | sh -c 'wget --method=PUT --body-data="$(cat)" -O- "$1"' sh '${endpoint}'`
-    };
+    def _get_listing(self, path: str, revalidate: bool = False) -> "DirectoryListing":
+        """Return the rendered rows for a directory, rebuilding them when it changed.
 
-    const el1 = document.getElementById('cmdPasteCurlGet');
-    const el2 = document.getElementById('cmdPasteCurlPut');
-    const el3 = document.getElementById('cmdPasteCurlPipe');
-    const el4 = document.getElementById('cmdPasteWgetGet');
-    const el5 = document.getElementById('cmdPasteWgetPut');
-    const el6 = document.getElementById('cmdPasteWgetPipe');
-    if (el1) el1.textContent = window.__hftpPasteCmds.curlGet;
-    if (el2) el2.textContent = window.__hftpPasteCmds.curlPut;
-    if (el3) el3.textContent = window.__hftpPasteCmds.curlPipe;
-    if (el4) el4.textContent = window.__hftpPasteCmds.wgetGet;
-    if (el5) el5.textContent = window.__hftpPasteCmds.wgetPut;
-    if (el6) el6.textContent = window.__hftpPasteCmds.wgetPipe;
-}
+        A cached listing only notices in-place edits after LISTING_CACHE_TTL; with
+        revalidate the entries are stat()ed again first, so a 304 is never stale.
+        """
+        st = os.stat(path)
+        key = os.path.abspath(path)
+        listing = LISTING_CACHE.get(key, st.st_mtime_ns)
+        if listing is not None and revalidate and not listing.is_current(path):
+            listing = None
+        if listing is None:
+            listing = self._build_listing(path, st)
+            LISTING_CACHE.put(key, listing)
+        return listing
+
+    def _build_listing(self, path: str, st: os.stat_result) -> "DirectoryListing":
+        """Scan a directory once and pre-render its file rows."""
+        entries: List[Tuple[str, bool, Optional[os.stat_result]]] = []
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                try:
+                    entry_st = entry.stat()
+                except OSError:
+                    entry_st = None
+                entries.append((entry.name, is_dir, entry_st))
 
-function copyCmd(btn, text) {
-    const finish = () => {
-        const orig = btn.textContent;
-        btn.textContent = '✓';
-        btn.style.color = 'var(--accent-green)';
-        setTimeout(() => { btn.textContent = orig; btn.style.color = ''; }, 1500);
-    };
-    if (navigator.clipboard && navigator.clipboard.writeText) {
-        navigator.clipboard.writeText(text).then(finish).catch(() => fallbackCopy(text, finish));
-    } else {
-        fallbackCopy(text, finish);
-    }
-}
+        entries.sort(key=lambda item: (not item[1], item[0].lower(), item[0]))
 
-function fallbackCopy(text, cb) {
-    const ta = document.createElement('textarea');
-    ta.value = text;
-    ta.style.cssText = 'position:fixed;opacity:0';
-    document.body.appendChild(ta);
-    ta.select();
-    document.execCommand('copy');
-    document.body.removeChild(ta);
-    cb();
-}
+        latest = st.st_mtime
+        listing_entries: List[ListingEntry] = []
+        rows: List[str] = []
+        for name, is_dir, entry_st in entries:
+            fullname = os.path.join(path, name)
+            if entry_st is not None:
+                mtime_ts = entry_st.st_mtime
+                mtime = time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime_ts))
+                latest = max(latest, mtime_ts)
+            else:
+                mtime_ts = 0.0
+                mtime = "-"
 
-// Initialize dynamic upload CLI examples on load
-initUploadCliExamples();
-initPasteCliExamples();
-</script>
-</body>
-</html>"""
+            if is_dir:
+                dir_url = self._fs_path_to_url_path(fullname, trailing_slash=True)
+                escaped_name = html.escape(name).replace("'", "\\'")
+                dir_url_attr = dir_url.replace("\\", "\\\\").replace("'", "\\'")
+                rows.append(f'''
+        <div class="file-item" data-name="{html.escape(name)}" data-size="0" data-mtime="{mtime_ts}" data-type="dir">
+            <div class="file-name">
+                <a href="{dir_url}">{html.escape(name)}</a>
+                <span class="folder-badge">DIR</span>
+            </div>
+            <div class="file-size">-</div>
+            <div class="file-date">{mtime}</div>
+            <div class="file-actions">
+                <button class="action-btn delete" onclick="confirmDelete('{dir_url_attr}', true, '{escaped_name}/')">Delete</button>
+            </div>
+        </div>
+''')
+                listing_entries.append(
+                    ListingEntry(name, True, 0, mtime_ts, False, dir_url, False)
+                )
+            else:
+                if entry_st is not None:
+                    size = entry_st.st_size
+                    size_str = self._format_size(size)
+                else:
+                    size = 0
+                    size_str = "-"
 
-        encoded = html_content.encode(enc, "surrogateescape")
+                icon, icon_class = self._get_file_icon(name)
+                is_previewable = (
+                    is_text_file(fullname)
+                    or is_image_file(fullname)
+                    or is_video_file(fullname)
+                )
+                file_url = self._fs_path_to_url_path(fullname, trailing_slash=False)
+                preview_badge = (
+                    f'<a class="preview-badge" href="{file_url}?preview=1">VIEW</a>'
+                    if is_previewable
+                    else ""
+                )
+                thumb_url = (
+                    f"{file_url}?thumb={THUMBNAIL_SIZES[0]}&v={int(mtime_ts)}"
+                    if has_thumbnail(fullname)
+                    else None
+                )
+                thumb = (
+                    f'<img class="file-thumb" src="{thumb_url}" loading="lazy" alt="">'
+                    if thumb_url
+                    else ""
+                )
+                is_new = NEW_FILE_TRACKER.is_new(fullname, mtime_ts)
+                new_badge = '<span class="new-badge">NEW</span>' if is_new else ""
+                escaped_name = html.escape(name).replace("'", "\\'")
+                file_url_attr = file_url.replace("\\", "\\\\").replace("'", "\\'")
 
-        f = io.BytesIO()
-        f.write(encoded)
-        f.seek(0)
+                rows.append(f'''
+        <div class="file-item" data-name="{html.escape(name)}" data-size="{size}" data-mtime="{mtime_ts}" data-type="file">
+            <div class="file-name">
+                {thumb}<a href="{file_url}" target="_blank" rel="noopener noreferrer">{html.escape(name)}</a>{preview_badge}{new_badge}
+            </div>
+            <div class="file-size">{size_str}</div>
+            <div class="file-date">{mtime}</div>
+            <div class="file-actions">
+                <a href="{file_url}" class="action-btn" download>Download</a>
+                <button class="action-btn delete" onclick="confirmDelete('{file_url_attr}', false, '{escaped_name}')">Delete</button>
+            </div>
+        </div>
+''')
+                listing_entries.append(
+                    ListingEntry(
+                        name,
+                        False,
+                        size,
+                        mtime_ts,
+                        is_new,
+                        file_url,
+                        is_previewable,
+                        thumb_url,
+                    )
+                )
 
-        self.send_response(200)
-        self.send_header("Content-type", f"text/html; charset={enc}")
-        self.send_header("Content-Length", str(len(encoded)))
-        self.end_headers()
-        return f
+        return DirectoryListing(
+            mtime_ns=st.st_mtime_ns,
+            built_at=time.monotonic(),
+            digest=listing_digest(st, ((name, stat) for name, _, stat in entries)),
+            last_modified=latest,
+            entries=tuple(listing_entries),
+            rows=tuple(rows),
+            nbytes=sum(len(row) for row in rows) + 256 * len(rows),
+        )
 
     def _generate_breadcrumb(self, path: str) -> str:
         """Generate breadcrumb navigation HTML"""
@@ -3498,14 +6282,7 @@ initPasteCliExamples();
 
     def _format_size(self, size: int) -> str:
         """Format file size to human readable string"""
-        if size < 1024:
-            return f"{size} B"
-        elif size < 1024 * 1024:
-            return f"{size / 1024:.1f} KB"
-        elif size < 1024 * 1024 * 1024:
-            return f"{size / (1024 * 1024):.1f} MB"
-        else:
-            return f"{size / (1024 * 1024 * 1024):.2f} GB"
+        return format_size(size)
 
     def _format_paste_time(self, timestamp: float) -> str:
         """Format pastebin update time for the directory page."""
@@ -3578,6 +6355,10 @@ initPasteCliExamples();
 
     def do_DELETE(self) -> None:
         """Handle DELETE requests: remove only the requested path (symlink or file), never the link target."""
+        if urlparse(self.path).path.startswith(UPLOADS_ENDPOINT + "/"):
+            self._abort_upload_session()
+            return
+
         path = self._translate_path_no_follow(self.path)
         if path is None:
             access_log(self, "delete", "403", self.path)
@@ -3601,6 +6382,7 @@ initPasteCliExamples();
                 os.remove(path)
                 debug("File deleted", path=path)
 
+            LISTING_CACHE.invalidate(path)
             self.send_response(204)
             self.end_headers()
             access_log(self, "delete", "204", path)
@@ -3624,6 +6406,12 @@ initPasteCliExamples();
         if parsed.path == PASTEBIN_ENDPOINT:
             self._handle_pastebin_post()
             return
+        if parsed.path == UPLOADS_ENDPOINT:
+            self._create_upload_session(parse_qs(parsed.query))
+            return
+        if parsed.path.startswith(UPLOADS_ENDPOINT + "/"):
+            self._finalize_upload_session()
+            return
 
         content_type = self.headers.get("Content-Type", "")
         try:
@@ -3638,13 +6426,15 @@ initPasteCliExamples();
             debug("POST error", error=str(e))
             self.send_error(500, str(e))
 
-    def _resolve_upload_path(self, filename: str = None) -> str:
+    def _resolve_upload_path(
+        self, filename: str = None, url_path: Optional[str] = None
+    ) -> str:
         """Resolve upload destination from URL path and optional filename
 
         Priority: provided filename > query param ?filename= > URL path basename > generated name
         """
         parsed = urlparse(self.path)
-        fs_path = self.translate_path(parsed.path)
+        fs_path = self.translate_path(parsed.path if url_path is None else url_path)
 
         if os.path.isdir(fs_path) or fs_path.endswith(os.sep):
             if not filename:
@@ -3655,10 +6445,15 @@ initPasteCliExamples();
             return os.path.join(fs_path, os.path.basename(filename))
         return fs_path
 
-    def _send_cli_response(self, filepath: str, existed: bool = False) -> None:
+    def _wants_durable(self) -> bool:
+        """Whether the client asked (?durable=1) to be answered only after fsync."""
+        query = parse_qs(urlparse(self.path).query)
+        return query.get("durable", ["0"])[0] == "1"
+
+    def _send_cli_response(self, filepath: str, existed: bool, size: int) -> None:
         """Send plain text response for CLI uploads"""
         fn = os.path.basename(filepath)
-        size_str = self._format_size(os.path.getsize(filepath))
+        size_str = self._format_size(size)
         status = "replaced" if existed else "uploaded"
 
         self.send_response(200)
@@ -3666,62 +6461,67 @@ initPasteCliExamples();
         self.end_headers()
         self.wfile.write(f"OK {status} {fn} ({size_str})\n".encode("utf-8"))
 
-    def _get_multipart_file_items(
-        self, form: cgi.FieldStorage
-    ) -> List[cgi.FieldStorage]:
-        """Return valid uploaded file fields from a multipart form."""
-        if "file" not in form:
-            return []
-
-        fileitems = form["file"]
-        if not isinstance(fileitems, list):
-            fileitems = [fileitems]
-
-        return [
-            fileitem
-            for fileitem in fileitems
-            if getattr(fileitem, "filename", None)
-            and getattr(fileitem, "file", None) is not None
-        ]
-
     def _handle_multipart_upload(self) -> None:
-        """Handle multipart/form-data uploads (browser, curl -F)."""
-        form = cgi.FieldStorage(
-            fp=self.rfile,
-            headers=self.headers,
-            environ={
-                "REQUEST_METHOD": "POST",
-                "CONTENT_TYPE": self.headers["Content-Type"],
-                "CONTENT_LENGTH": self.headers.get("Content-Length", "0"),
-            },
-        )
+        """Handle multipart/form-data uploads (browser, curl -F).
 
-        fileitems = self._get_multipart_file_items(form)
-        if not fileitems:
+        File parts named "file" stream straight into UPLOAD_COORDINATOR's sibling
+        temp file, so each byte hits the disk once; other fields are skipped.
+        """
+        content_type = email.message.Message()
+        content_type["Content-Type"] = self.headers.get("Content-Type", "")
+        boundary = content_type.get_param("boundary")
+        if not boundary or len(boundary) > 200:
             access_log(self, "upload", "400")
-            self.send_error(400, "No file uploaded")
+            self.send_error(400, "Missing multipart boundary")
+            return
+        try:
+            length = int(self.headers["Content-Length"])
+        except (TypeError, ValueError):
+            access_log(self, "upload", "411")
+            self.send_error(411, "Content-Length required")
             return
 
         uploaded_files = []
-        for fileitem in fileitems:
-            fn = os.path.basename(fileitem.filename)
-            save_path = self._resolve_upload_path(fn)
-            result = UPLOAD_COORDINATOR.write_stream(save_path, fileitem.file)
-            file_exists = result.existed
-
-            NEW_FILE_TRACKER.register(save_path)
-            action = "modify" if file_exists else "upload"
-            access_log(self, action, "200", save_path)
-            debug(
-                "File uploaded via multipart",
-                path=save_path,
-                size=os.path.getsize(save_path),
+        try:
+            reader = MultipartReader(
+                self.rfile,
+                boundary.encode("latin-1", "replace"),
+                length,
+                MAX_UPLOAD_PART_BYTES,
             )
-            uploaded_files.append((fn, save_path, file_exists))
+            for part in reader:
+                if part.name != "file" or not part.filename:
+                    continue
+                fn = os.path.basename(part.filename)
+                save_path = self._resolve_upload_path(fn)
+                result = UPLOAD_COORDINATOR.write_stream(
+                    save_path, part, wait_durable=self._wants_durable()
+                )
+                file_exists = result.existed
+
+                NEW_FILE_TRACKER.register(save_path)
+                action = "modify" if file_exists else "upload"
+                access_log(self, action, "200", save_path)
+                debug(
+                    "File uploaded via multipart",
+                    path=save_path,
+                    size=result.size,
+                )
+                uploaded_files.append((fn, save_path, file_exists, result.size))
+        except MultipartError as e:
+            access_log(self, "upload", str(e.status))
+            self.close_connection = True
+            self.send_error(e.status, str(e))
+            return
+
+        if not uploaded_files:
+            access_log(self, "upload", "400")
+            self.send_error(400, "No file uploaded")
+            return
 
         if len(uploaded_files) == 1:
-            fn, save_path, file_exists = uploaded_files[0]
-            self._send_html_upload_response(fn, save_path, file_exists)
+            fn, save_path, file_exists, size = uploaded_files[0]
+            self._send_html_upload_response(fn, save_path, file_exists, size)
             return
 
         self._send_multi_upload_response(uploaded_files)
@@ -3746,53 +6546,290 @@ initPasteCliExamples();
             self.send_error(400, "Missing 'data' field in POST body")
             return
 
-        file_content = base64.b64decode(data_field)
-        filename = params.get("filename", [None])[0]
-        save_path = self._resolve_upload_path(filename)
-        result = UPLOAD_COORDINATOR.write_bytes(save_path, file_content)
-        file_exists = result.existed
+        file_content = base64.b64decode(data_field)
+        filename = params.get("filename", [None])[0]
+        save_path = self._resolve_upload_path(filename)
+        result = UPLOAD_COORDINATOR.write_bytes(
+            save_path, file_content, self._wants_durable()
+        )
+        file_exists = result.existed
+
+        NEW_FILE_TRACKER.register(save_path)
+        action = "modify" if file_exists else "upload"
+        access_log(self, action, "200", save_path)
+        debug(
+            "File uploaded via urlencoded",
+            path=save_path,
+            size=result.size,
+        )
+        self._send_cli_response(save_path, file_exists, result.size)
+
+    def _handle_raw_upload(self) -> None:
+        """Handle raw binary body uploads (curl --data-binary, etc.)
+
+        Target filename resolved from URL path or ?filename= query param.
+        """
+        length = int(self.headers.get("Content-Length", 0))
+        if length == 0:
+            access_log(self, "upload", "400")
+            self.send_error(400, "Empty request body")
+            return
+
+        save_path = self._resolve_upload_path()
+        result = UPLOAD_COORDINATOR.write_stream(
+            save_path, self.rfile, length, self._wants_durable()
+        )
+        file_exists = result.existed
+
+        NEW_FILE_TRACKER.register(save_path)
+        action = "modify" if file_exists else "upload"
+        access_log(self, action, "200", save_path)
+        debug(
+            "File uploaded via raw body",
+            path=save_path,
+            size=result.size,
+        )
+        self._send_cli_response(save_path, file_exists, result.size)
+
+    def do_HEAD(self) -> None:
+        """Report resumable upload offsets; everything else is a regular HEAD."""
+        if urlparse(self.path).path.startswith(UPLOADS_ENDPOINT + "/"):
+            session = self._get_upload_session()
+            if session is not None:
+                self._send_upload_offset(200, session)
+            return
+        super().do_HEAD()
+
+    def do_PATCH(self) -> None:
+        """Write one chunk of a resumable upload at the offset stated by the client.
+
+        Request: PATCH /__uploads/<id> with Upload-Offset and Content-Length.
+        A mismatched offset gets 409 with the server's Upload-Offset; the
+        session is finalized once the offset reaches Upload-Length.
+        """
+        # Until the chunk has been read the body is still on the wire, so
+        # any early answer has to end the connection.
+        keep_alive = not self.close_connection
+        self.close_connection = True
+        session = self._get_upload_session()
+        if session is None:
+            return
+        try:
+            offset = int(self.headers["Upload-Offset"])
+            count = int(self.headers["Content-Length"])
+            length = self._parse_upload_length()
+        except (TypeError, ValueError):
+            access_log(self, "upload", "400", session.destination)
+            self.send_error(400, "Upload-Offset and Content-Length are required")
+            return
+        if length is not None and session.length not in (None, length):
+            access_log(self, "upload", "400", session.destination)
+            self.send_error(400, "Upload-Length does not match the session")
+            return
+        if not self._claim_upload_session(session):
+            return
+
+        received, elapsed = 0, 0.0
+        result: Optional[UploadResult] = None
+        error: Optional[OSError] = None
+        try:
+            if length is not None:
+                session.length = length
+            if offset != session.offset:
+                outcome = "409"
+            elif session.length is not None and offset + count > session.length:
+                outcome = "413"
+            else:
+                started = time.perf_counter()
+                received = RESUMABLE_UPLOADS.write(session, self.rfile, count)
+                elapsed = time.perf_counter() - started
+                self.close_connection = not keep_alive
+                if received < count:
+                    outcome = "400"
+                elif session.length is not None and session.offset >= session.length:
+                    result = RESUMABLE_UPLOADS.finalize(session, self._wants_durable())
+                    outcome = "200"
+                else:
+                    outcome = "204"
+        except FileNotFoundError:
+            # The part file was removed underneath the session.
+            RESUMABLE_UPLOADS.discard(session)
+            outcome = "404"
+        except OSError as e:
+            error, outcome = e, "500"
+        finally:
+            session.lock.release()
+
+        # Answer only once the lock is free, so a client that sends its next
+        # chunk as soon as it reads this response never finds the session busy.
+        if outcome == "409":
+            access_log(self, "upload", "409", session.destination)
+            self._send_upload_offset(409, session)
+        elif outcome == "404":
+            access_log(self, "upload", "404", session.destination)
+            self.send_error(404, "Upload part file is gone")
+        elif outcome == "413":
+            access_log(self, "upload", "413", session.destination)
+            self.send_error(413, "Chunk exceeds Upload-Length")
+        elif outcome == "400":
+            # The client went away mid-chunk; keep what arrived for the resume.
+            self.close_connection = True
+            access_log(self, "upload", "400", session.destination, received, elapsed)
+            try:
+                self.send_error(400, "Incomplete upload chunk")
+            except OSError:
+                pass
+        elif outcome == "500":
+            access_log(self, "upload", "500", session.destination, received, elapsed)
+            self.send_error(500, f"Upload could not be committed: {error}")
+        elif result is not None:
+            self._send_upload_complete(session, result)
+        else:
+            access_log(self, "upload", "204", session.destination, received, elapsed)
+            self._send_upload_offset(204, session)
+
+    def _create_upload_session(self, query: dict) -> None:
+        """Start a resumable upload: POST /__uploads?path=/dir/name [Upload-Length: N]."""
+        url_path = query.get("path", [None])[0]
+        if not url_path:
+            access_log(self, "upload", "400")
+            self.send_error(400, "Missing ?path= for the upload target")
+            return
+        try:
+            length = self._parse_upload_length()
+        except ValueError:
+            access_log(self, "upload", "400")
+            self.send_error(400, "Invalid Upload-Length")
+            return
+
+        target = self._resolve_upload_path(url_path=url_path)
+        if os.path.isdir(target):
+            access_log(self, "upload", "400", target)
+            self.send_error(400, "Upload target is a directory")
+            return
+        session = RESUMABLE_UPLOADS.create(target, length)
+        location = f"{UPLOADS_ENDPOINT}/{session.id}"
+        payload = json.dumps(
+            {
+                "id": session.id,
+                "location": location,
+                "path": self._fs_path_to_url_path(target),
+                "offset": 0,
+                "length": length,
+                "expires_in": RESUMABLE_UPLOADS.ttl,
+            }
+        ).encode("utf-8")
+        self.send_response(201)
+        self.send_header("Location", location)
+        self.send_header("Upload-Offset", "0")
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(payload)))
+        self.send_header("Cache-Control", "no-store")
+        self.end_headers()
+        self.wfile.write(payload)
+        access_log(self, "upload", "201", target)
+        debug("Upload session created", path=target, length=length)
+
+    def _finalize_upload_session(self) -> None:
+        """Finish an upload of unknown length at its current offset."""
+        session = self._get_upload_session()
+        if session is None or not self._claim_upload_session(session):
+            return
+        result: Optional[UploadResult] = None
+        error: Optional[OSError] = None
+        try:
+            if session.length is None or session.offset == session.length:
+                result = RESUMABLE_UPLOADS.finalize(session, self._wants_durable())
+        except OSError as e:
+            error = e
+        finally:
+            session.lock.release()
+        if isinstance(error, FileNotFoundError):
+            access_log(self, "upload", "404", session.destination)
+            self.send_error(404, "Upload part file is gone")
+            return
+        if error is not None:
+            access_log(self, "upload", "500", session.destination)
+            self.send_error(500, f"Upload could not be committed: {error}")
+            return
+        if result is None:
+            access_log(self, "upload", "409", session.destination)
+            self._send_upload_offset(409, session)
+            return
+        self._send_upload_complete(session, result)
 
-        NEW_FILE_TRACKER.register(save_path)
-        action = "modify" if file_exists else "upload"
-        access_log(self, action, "200", save_path)
-        debug(
-            "File uploaded via urlencoded",
-            path=save_path,
-            size=os.path.getsize(save_path),
-        )
-        self._send_cli_response(save_path, file_exists)
+    def _send_upload_complete(
+        self, session: UploadSession, result: UploadResult
+    ) -> None:
+        NEW_FILE_TRACKER.register(session.destination)
+        action = "modify" if result.existed else "upload"
+        access_log(self, action, "200", session.destination)
+        debug("File uploaded via resumable session", path=session.destination, size=result.size)
+        self._send_cli_response(session.destination, result.existed, result.size)
+
+    def _abort_upload_session(self) -> None:
+        session = self._get_upload_session()
+        if session is None or not self._claim_upload_session(session, "delete"):
+            return
+        try:
+            RESUMABLE_UPLOADS.discard(session)
+        finally:
+            session.lock.release()
+        self.send_response(204)
+        self.end_headers()
+        access_log(self, "delete", "204", session.destination)
 
-    def _handle_raw_upload(self) -> None:
-        """Handle raw binary body uploads (curl --data-binary, etc.)
+    def _claim_upload_session(self, session: UploadSession, action: str = "upload") -> bool:
+        """Take the session lock, answering 409 if another request holds it.
 
-        Target filename resolved from URL path or ?filename= query param.
+        expire() or a DELETE may have ended the session after it was looked
+        up; that is checked under the lock and answered with 404.
         """
-        length = int(self.headers.get("Content-Length", 0))
-        if length == 0:
-            access_log(self, "upload", "400")
-            self.send_error(400, "Empty request body")
-            return
-
-        save_path = self._resolve_upload_path()
-        result = UPLOAD_COORDINATOR.write_stream(save_path, self.rfile, length)
-        file_exists = result.existed
+        if not session.lock.acquire(blocking=False):
+            access_log(self, action, "409", session.destination)
+            self.send_error(409, "Upload session is busy")
+            return False
+        if not RESUMABLE_UPLOADS.is_live(session):
+            session.lock.release()
+            access_log(self, action, "404", session.destination)
+            self.send_error(404, "Upload session not found or expired")
+            return False
+        return True
 
-        NEW_FILE_TRACKER.register(save_path)
-        action = "modify" if file_exists else "upload"
-        access_log(self, action, "200", save_path)
-        debug(
-            "File uploaded via raw body",
-            path=save_path,
-            size=os.path.getsize(save_path),
-        )
-        self._send_cli_response(save_path, file_exists)
+    def _get_upload_session(self) -> Optional[UploadSession]:
+        """Look up the session named in the URL, answering 404 when it is unknown."""
+        session_id = urlparse(self.path).path[len(UPLOADS_ENDPOINT) + 1 :]
+        session = RESUMABLE_UPLOADS.get(session_id)
+        if session is None:
+            access_log(self, "upload", "404", self.path)
+            self.send_error(404, "Upload session not found or expired")
+        return session
+
+    def _parse_upload_length(self) -> Optional[int]:
+        value = self.headers.get("Upload-Length")
+        if value is None:
+            return None
+        length = int(value)
+        if length < 0:
+            raise ValueError("Negative Upload-Length")
+        return length
+
+    def _send_upload_offset(self, status: int, session: UploadSession) -> None:
+        self.send_response(status)
+        self.send_header("Upload-Offset", str(session.offset))
+        if session.length is not None:
+            self.send_header("Upload-Length", str(session.length))
+        self.send_header("Cache-Control", "no-store")
+        if status != 204:
+            self.send_header("Content-Length", "0")
+        self.end_headers()
 
     def _send_html_upload_response(
-        self, filename: str, filepath: str, file_exists: bool
+        self, filename: str, filepath: str, file_exists: bool, size: int
     ) -> None:
         """Send HTML upload success response for browser clients"""
         status = "replaced" if file_exists else "uploaded"
-        size_str = self._format_size(os.path.getsize(filepath))
+        size_str = self._format_size(size)
         fn_escaped = html.escape(filename)
 
         self.send_response(200)
@@ -3876,13 +6913,13 @@ document.documentElement.setAttribute('data-theme', theme);
         self.wfile.write(response_html.encode("utf-8"))
 
     def _send_multi_upload_response(
-        self, uploaded_files: List[Tuple[str, str, bool]]
+        self, uploaded_files: List[Tuple[str, str, bool, int]]
     ) -> None:
         """Send plain text response for multi-file multipart uploads."""
         lines = [f"OK uploaded {len(uploaded_files)} files"]
-        for filename, filepath, file_exists in uploaded_files:
+        for filename, filepath, file_exists, size in uploaded_files:
             status = "replaced" if file_exists else "uploaded"
-            size_str = self._format_size(os.path.getsize(filepath))
+            size_str = self._format_size(size)
             lines.append(f"{status} {filename} ({size_str})")
 
         payload = ("\n".join(lines) + "\n").encode("utf-8")
@@ -3893,7 +6930,65 @@ document.documentElement.setAttribute('data-theme', theme);
         self.wfile.write(payload)
 
 
-class ThreadedTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
+class KeepAliveHTTPRequestHandler(EnhancedHTTPRequestHandler):
+    """HTTP/1.1 handler used by the worker-pool server so connections can be reused."""
+
+    protocol_version = "HTTP/1.1"
+
+
+class ConnectionStatsMixin:
+    """Track open connections and whether each is busy or idle between requests."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        self._connections_lock = threading.Lock()
+        self._connections: Dict[socket.socket, bool] = {}
+        super().__init__(*args, **kwargs)
+
+    def finish_request(self, request, client_address) -> None:
+        with self._connections_lock:
+            self._connections[request] = False
+        try:
+            super().finish_request(request, client_address)
+        finally:
+            with self._connections_lock:
+                self._connections.pop(request, None)
+
+    def mark_connection(self, request: socket.socket, busy: bool) -> None:
+        with self._connections_lock:
+            if request in self._connections:
+                self._connections[request] = busy
+
+    def close_connections(self, idle_only: bool = True) -> int:
+        """Shut down tracked sockets (only idle keep-alive ones by default)."""
+        with self._connections_lock:
+            targets = [
+                request
+                for request, busy in self._connections.items()
+                if not (idle_only and busy)
+            ]
+        for request in targets:
+            try:
+                request.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+        return len(targets)
+
+    def connection_stats(self) -> dict:
+        with self._connections_lock:
+            busy = sum(1 for value in self._connections.values() if value)
+            total = len(self._connections)
+        return {
+            "mode": type(self).__name__,
+            "open": total,
+            "active": busy,
+            "idle": total - busy,
+            "queued": 0,
+        }
+
+
+class ThreadedTCPServer(
+    ConnectionStatsMixin, socketserver.ThreadingMixIn, socketserver.TCPServer
+):
     """Threaded TCP server supporting multiple client connections"""
 
     allow_reuse_address = True
@@ -3918,9 +7013,448 @@ class ThreadedTCPServer(socketserver.ThreadingMixIn, socketserver.TCPServer):
         debug("Server shutdown completed")
 
 
+class PooledTCPServer(ConnectionStatsMixin, socketserver.TCPServer):
+    """TCP server handing accepted connections to a fixed pool of worker threads.
+
+    Connections beyond the pool wait in a queue bounded by the backlog; when that
+    is full the client gets an immediate 503. drain() stops accepting, lets
+    in-flight requests finish and closes idle keep-alive connections.
+    """
+
+    allow_reuse_address = True
+
+    def __init__(
+        self,
+        server_address,
+        RequestHandlerClass,
+        root_dir: str,
+        workers: int,
+        backlog: int = DEFAULT_BACKLOG,
+        idle_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+    ):
+        self.request_queue_size = backlog
+        super().__init__(server_address, RequestHandlerClass)
+        self.running = True
+        self.draining = False
+        self.root_dir = os.path.realpath(root_dir)
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = drain_timeout
+        self._pending: "queue.Queue[Optional[tuple]]" = queue.Queue(maxsize=backlog)
+        self._workers = [
+            threading.Thread(target=self._worker, name=f"hftp-worker-{i}", daemon=True)
+            for i in range(workers)
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def process_request(self, request, client_address) -> None:
+        try:
+            self._pending.put_nowait((request, client_address))
+        except queue.Full:
+            debug("Connection queue full, rejecting", client=client_address)
+            try:
+                request.sendall(
+                    b"HTTP/1.1 503 Service Unavailable\r\n"
+                    b"Content-Length: 0\r\nRetry-After: 1\r\nConnection: close\r\n\r\n"
+                )
+            except OSError:
+                pass
+            self.shutdown_request(request)
+
+    def _worker(self) -> None:
+        while True:
+            item = self._pending.get()
+            if item is None:
+                return
+            request, client_address = item
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+    def connection_stats(self) -> dict:
+        stats = super().connection_stats()
+        stats.update(
+            workers=len(self._workers),
+            queued=self._pending.qsize(),
+            backlog=self.request_queue_size,
+            draining=self.draining,
+        )
+        return stats
+
+    def drain(self) -> None:
+        """Stop accepting and wait up to drain_timeout for in-flight requests."""
+        debug("Draining server", **self.connection_stats())
+        self.draining = True
+        self.running = False
+        super().shutdown()
+        self.server_close()
+
+        deadline = time.monotonic() + self.drain_timeout
+        while time.monotonic() < deadline:
+            self.close_connections(idle_only=True)
+            stats = super().connection_stats()
+            if stats["open"] == 0 and self._pending.empty():
+                break
+            time.sleep(0.05)
+        self.close_connections(idle_only=False)
+        for _ in self._workers:
+            self._pending.put(None)
+        debug("Server drained")
+
+
+class ResponseRecorder:
+    """File-like sink collecting response bytes and file ranges as ordered segments."""
+
+    def __init__(self) -> None:
+        self.segments: List[object] = []
+        self._pending = bytearray()
+
+    def write(self, data: bytes) -> int:
+        self._pending += data
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def add_file(self, filepath: str, offset: int, count: int) -> None:
+        if count <= 0:
+            return
+        self._take_pending()
+        self.segments.append((filepath, offset, count))
+
+    def take_segments(self) -> List[object]:
+        self._take_pending()
+        segments, self.segments = self.segments, []
+        return segments
+
+    def _take_pending(self) -> None:
+        if self._pending:
+            self.segments.append(bytes(self._pending))
+            self._pending = bytearray()
+
+
+class BufferedRequestHandler(KeepAliveHTTPRequestHandler):
+    """Run the handler's read paths against an already received request head.
+
+    The response is captured in a ResponseRecorder (file bodies as sendfile
+    segments) so AsyncHTTPServer can deliver it without holding a thread.
+    """
+
+    def __init__(self, head: bytes, connection: socket.socket, client_address, server):
+        # BaseRequestHandler.__init__ would serve the socket directly; only the
+        # state the request methods rely on is set up here.
+        self.request = self.connection = connection
+        self.client_address = client_address
+        self.server = server
+        self.rfile = io.BytesIO(head)
+        self.wfile = ResponseRecorder()
+        self.deferred_logs: List[tuple] = []
+        self.close_connection = True
+        self.raw_requestline = self.rfile.readline(65537)
+        self.parsed = self.parse_request()
+
+    def has_body(self) -> bool:
+        if "chunked" in self.headers.get("Transfer-Encoding", "").lower():
+            return True
+        try:
+            return int(self.headers.get("Content-Length", 0) or 0) > 0
+        except ValueError:
+            return True
+
+    def streams_response(self) -> bool:
+        # Archives are produced while they are sent and may be far too large to record.
+        return "archive" in parse_qs(urlparse(self.path).query)
+
+    def run(self) -> None:
+        getattr(self, "do_" + self.command)()
+
+    def _send_file_range(
+        self, filepath: str, offset: int, count: int
+    ) -> Tuple[int, float]:
+        self.wfile.add_file(filepath, offset, count)
+        return count, 0.0
+
+
+class _PrefixedReader(io.RawIOBase):
+    """Raw stream that replays already received bytes before reading the socket."""
+
+    def __init__(self, prefix: bytes, stream: BinaryIO) -> None:
+        self._prefix = memoryview(prefix)
+        self._stream = stream
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        if self._prefix:
+            size = min(len(buffer), len(self._prefix))
+            buffer[:size] = self._prefix[:size]
+            self._prefix = self._prefix[size:]
+            return size
+        return self._stream.readinto(buffer)
+
+
+class HandoffRequestHandler(EnhancedHTTPRequestHandler):
+    """Blocking handler for requests the async backend passes to a worker thread."""
+
+    def __init__(self, request, client_address, server, prefix: bytes = b""):
+        self._prefix = prefix
+        super().__init__(request, client_address, server)
+
+    def setup(self) -> None:
+        super().setup()
+        if self._prefix:
+            self.rfile.close()
+            raw = self.connection.makefile("rb", buffering=0)
+            self.rfile = io.BufferedReader(_PrefixedReader(self._prefix, raw))
+
+
+class AsyncHTTPServer:
+    """asyncio backend serving read paths without a thread per connection.
+
+    GET/HEAD requests are computed by a BufferedRequestHandler on the executor,
+    then delivered from the event loop with loop.sock_sendall/sock_sendfile, so
+    slow clients only cost a coroutine and a socket. Uploads, deletes and other
+    requests with bodies are handed to a HandoffRequestHandler on the executor,
+    which writes through UPLOAD_COORDINATOR as usual; so are directory archive
+    downloads, which stream from that thread instead of being recorded.
+    """
+
+    def __init__(
+        self,
+        server_address,
+        root_dir: str,
+        workers: int = DEFAULT_ASYNC_WORKERS,
+        backlog: int = DEFAULT_BACKLOG,
+        idle_timeout: float = DEFAULT_KEEPALIVE_TIMEOUT,
+        drain_timeout: float = DEFAULT_DRAIN_TIMEOUT,
+    ):
+        self.socket = socket.create_server(server_address, backlog=backlog)
+        self.socket.setblocking(False)
+        self.server_address = self.socket.getsockname()
+        self.root_dir = os.path.realpath(root_dir)
+        self.running = True
+        self.draining = False
+        self.idle_timeout = idle_timeout
+        self.drain_timeout = drain_timeout
+        self.backlog = backlog
+        self.workers = workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="hftp-async"
+        )
+        self._connections: Dict[socket.socket, bool] = {}
+        self._tasks: set = set()
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._accept_task: Optional[asyncio.Task] = None
+        self._stopped: Optional[asyncio.Event] = None
+        self._raise_fd_limit()
+
+    @staticmethod
+    def _raise_fd_limit() -> None:
+        """Lift the soft open-file limit so thousands of idle clients fit."""
+        try:
+            import resource
+        except ImportError:
+            return
+        soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+        target = 65536 if hard == resource.RLIM_INFINITY else min(hard, 65536)
+        if soft < target:
+            try:
+                resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            except (ValueError, OSError):
+                pass
+
+    def serve_forever(self) -> None:
+        asyncio.run(self._serve())
+
+    async def _serve(self) -> None:
+        self._loop = asyncio.get_running_loop()
+        self._stopped = asyncio.Event()
+        self._accept_task = asyncio.ensure_future(self._accept_loop())
+        await self._stopped.wait()
+
+    async def _accept_loop(self) -> None:
+        while self.running:
+            try:
+                sock, client_address = await self._loop.sock_accept(self.socket)
+            except OSError as e:
+                debug("Accept failed", error=str(e))
+                await asyncio.sleep(0.05)
+                continue
+            sock.setblocking(False)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            task = asyncio.ensure_future(self._serve_connection(sock, client_address))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    def mark_connection(self, request: socket.socket, busy: bool) -> None:
+        if request in self._connections:
+            self._connections[request] = busy
+
+    def connection_stats(self) -> dict:
+        busy = sum(1 for value in list(self._connections.values()) if value)
+        total = len(self._connections)
+        return {
+            "mode": type(self).__name__,
+            "open": total,
+            "active": busy,
+            "idle": total - busy,
+            "queued": self._executor._work_queue.qsize(),
+            "workers": self.workers,
+            "backlog": self.backlog,
+            "draining": self.draining,
+        }
+
+    async def _read_head(self, sock: socket.socket, buffer: bytearray) -> Optional[bytes]:
+        """Read one request head (through the blank line) or None on EOF/timeout."""
+        while b"\r\n\r\n" not in buffer:
+            if len(buffer) > MAX_REQUEST_HEAD_BYTES:
+                return None
+            try:
+                data = await asyncio.wait_for(
+                    self._loop.sock_recv(sock, 65536), self.idle_timeout
+                )
+            except (asyncio.TimeoutError, OSError):
+                return None
+            if not data:
+                return None
+            buffer += data
+        end = buffer.index(b"\r\n\r\n") + 4
+        head = bytes(buffer[:end])
+        del buffer[:end]
+        return head
+
+    async def _serve_connection(self, sock: socket.socket, client_address) -> None:
+        self._connections[sock] = False
+        buffer = bytearray()
+        handed_off = False
+        try:
+            while not self.draining:
+                head = await self._read_head(sock, buffer)
+                if head is None:
+                    break
+                self._connections[sock] = True
+                handler = BufferedRequestHandler(head, sock, client_address, self)
+                if handler.parsed and (
+                    handler.command not in ("GET", "HEAD")
+                    or handler.has_body()
+                    or handler.streams_response()
+                ):
+                    handed_off = True
+                    sock.setblocking(True)
+                    await self._loop.run_in_executor(
+                        self._executor,
+                        self._hand_off,
+                        sock,
+                        client_address,
+                        head + bytes(buffer),
+                    )
+                    return
+                if handler.parsed:
+                    await self._loop.run_in_executor(self._executor, handler.run)
+                await self._deliver(sock, handler)
+                self._connections[sock] = False
+                if handler.close_connection:
+                    break
+        except (OSError, asyncio.CancelledError):
+            pass
+        except Exception as e:
+            debug("Async connection error", error=str(e))
+        finally:
+            self._connections.pop(sock, None)
+            if not handed_off:
+                try:
+                    sock.close()
+                except OSError:
+                    pass
+
+    async def _deliver(self, sock: socket.socket, handler: BufferedRequestHandler) -> None:
+        """Send recorded response segments, then emit the deferred access log lines."""
+        started = time.perf_counter()
+        body_sent = 0
+        try:
+            for segment in handler.wfile.take_segments():
+                if isinstance(segment, bytes):
+                    await self._loop.sock_sendall(sock, segment)
+                    continue
+                filepath, offset, count = segment
+                with open(filepath, "rb") as f:
+                    body_sent += await self._loop.sock_sendfile(
+                        sock, f, offset, count
+                    )
+        finally:
+            elapsed = time.perf_counter() - started
+            logs, handler.deferred_logs = handler.deferred_logs, None
+            for action, status, path, nbytes, _ in logs:
+                if nbytes is None:
+                    access_log(handler, action, status, path)
+                else:
+                    access_log(handler, action, status, path, body_sent, elapsed)
+
+    def _hand_off(self, sock: socket.socket, client_address, prefix: bytes) -> None:
+        try:
+            HandoffRequestHandler(sock, client_address, self, prefix=prefix)
+        except Exception as e:
+            debug("Handoff request error", error=str(e))
+        finally:
+            try:
+                sock.shutdown(socket.SHUT_WR)
+            except OSError:
+                pass
+            sock.close()
+
+    def drain(self) -> None:
+        """Stop accepting and wait up to drain_timeout for in-flight responses."""
+        if self._loop is None:
+            return
+        future = asyncio.run_coroutine_threadsafe(self._drain(), self._loop)
+        try:
+            future.result(timeout=self.drain_timeout + 1)
+        except Exception as e:
+            debug("Async drain error", error=str(e))
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    async def _drain(self) -> None:
+        debug("Draining async server", **self.connection_stats())
+        self.draining = True
+        self.running = False
+        if self._accept_task:
+            self._accept_task.cancel()
+        self.socket.close()
+        deadline = time.monotonic() + self.drain_timeout
+        while self._tasks and time.monotonic() < deadline:
+            for sock, busy in list(self._connections.items()):
+                if not busy:
+                    try:
+                        sock.shutdown(socket.SHUT_RDWR)
+                    except OSError:
+                        pass
+            await asyncio.sleep(0.05)
+        for task in list(self._tasks):
+            task.cancel()
+        self._stopped.set()
+        debug("Async server drained")
+
+
 def run_server(server: ThreadedTCPServer) -> None:
     """Run server request loop in a separate thread."""
     debug("Starting server thread")
+    if isinstance(server, AsyncHTTPServer):
+        try:
+            server.serve_forever()
+        finally:
+            debug("Server thread exiting")
+        return
+    if isinstance(server, PooledTCPServer):
+        try:
+            server.serve_forever(poll_interval=0.5)
+        finally:
+            debug("Server thread exiting")
+        return
     try:
         while server.running and not EXIT_EVENT.is_set():
             try:
@@ -4143,6 +7677,68 @@ def handle_generate_service(port: int) -> int:
         return 1
 
 
+def run_durability_benchmark(
+    root_dir: str, count: int, size: int = 16 * 1024, concurrency: int = 8
+) -> int:
+    """Upload count small files through UploadCoordinator at each durability level.
+
+    return = exit code
+    """
+    payload = os.urandom(size)
+    runs = [(level, False) for level in DURABILITY_LEVELS] + [("batched", True)]
+    print(
+        CLIStyle.color(
+            f"Durability benchmark: {count} files x {format_size(size)}, "
+            f"{concurrency} writers, in {root_dir}",
+            CLIStyle.COLORS["TITLE"],
+        )
+    )
+    work_dir = tempfile.mkdtemp(prefix=".hftp-bench-", dir=root_dir)
+    try:
+        for level, wait in runs:
+            coordinator = UploadCoordinator(durability=level)
+            run_dir = os.path.join(work_dir, f"{level}-{int(wait)}")
+            os.makedirs(run_dir)
+            names = queue.Queue()
+            for index in range(count):
+                names.put(os.path.join(run_dir, f"file-{index:06d}.bin"))
+
+            def writer() -> None:
+                while True:
+                    try:
+                        filepath = names.get_nowait()
+                    except queue.Empty:
+                        return
+                    coordinator.write_bytes(filepath, payload, wait_durable=wait)
+
+            started = time.perf_counter()
+            threads = [threading.Thread(target=writer) for _ in range(concurrency)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            acknowledged = time.perf_counter() - started
+            coordinator.flush()
+            durable = time.perf_counter() - started
+
+            label = f"{level} (wait)" if wait else level
+            print(
+                f"  {CLIStyle.color(f'{label:<16}', CLIStyle.COLORS['CONTENT'])}"
+                f"{count / acknowledged:10.0f} files/s"
+                f"{count * size / acknowledged / 1024 / 1024:10.1f} MB/s"
+                f"   durable after {durable:.2f}s"
+                f"   ({coordinator.committer.batches} batches)"
+            )
+        return 0
+    except Exception as e:
+        print(CLIStyle.color(f"Benchmark failed: {str(e)}", CLIStyle.COLORS["ERROR"]))
+        if DEBUG_MODE:
+            traceback.print_exc()
+        return 1
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+
 def resolve_exec_command() -> str:
     """
     Resolve the ExecStart command for the current runtime form.
@@ -4250,6 +7846,14 @@ def main() -> int:
         ("Batch mode (auto-confirm)", "--batch"),
         ("Generate systemd service file", "--generate-service --port 8080"),
         ("Quick start with preview", "--port 8000 --preview"),
+        ("Worker pool with keep-alive", "--workers 16 --backlog 256"),
+        ("asyncio backend for many slow readers", "--backend asyncio --workers 8"),
+        ("Keep unfinished resumable uploads for 72 hours", "--upload-expiry 72"),
+        ("Group-commit fsync for many small uploads", "--durability batched"),
+        ("Keep up to 1 GiB of image thumbnails", "--thumb-cache /var/cache/hftp --thumb-cache-size 1024"),
+        ("Compare durability levels on the served disk", "-d /srv/share --benchmark-durability 2000"),
+        ("Keep a machine-readable access log", "--access-log /var/log/hftp/access.ndjson"),
+        ("Allow folder archives of up to 200k entries / 64 GiB", "--archive-max-entries 200000 --archive-max-size 65536"),
     ]
 
     notes = [
@@ -4261,6 +7865,19 @@ def main() -> int:
         "Batch mode auto-confirms all prompts (useful for systemd services)",
         "Generate service file creates hftp.service in current directory with installation steps",
         "When port is occupied, you can choose to force close the process or use alternative port",
+        "--workers N serves from a fixed pool of N threads with HTTP/1.1 keep-alive and drains gracefully on Ctrl+C",
+        "--backend asyncio serves downloads, listings and the pastebin from one event loop; uploads run on --workers threads",
+        f"Connection counts are available as JSON at {STATUS_ENDPOINT}",
+        f"Resumable uploads: POST {UPLOADS_ENDPOINT}?path=/dir/name with Upload-Length, "
+        "PATCH the returned Location with Upload-Offset, HEAD it to find where to resume",
+        "--durability batched answers uploads before their fsync and syncs them in groups; "
+        "add ?durable=1 to an upload URL to wait for the fsync",
+        "With Pillow installed, listings and image previews load downscaled WebP/JPEG thumbnails (?thumb=N); "
+        "previews link to the original",
+        "Append ?archive=zip, ?archive=tar or ?archive=tar.gz to a folder URL to download it as one streamed archive; "
+        "zip stores images, video and other compressed files without recompressing them",
+        "Access log lines are written by a background thread; if the console or log file falls behind, "
+        f"records are dropped and counted (see {STATUS_ENDPOINT}) instead of slowing requests down",
     ]
 
     parser = ColoredArgumentParser(
@@ -4299,6 +7916,97 @@ def main() -> int:
         action="store_true",
         help="Open server URL in browser after starting",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=0,
+        help="Serve with a fixed pool of N worker threads and keep-alive (default: 0, one thread per connection)",
+    )
+    parser.add_argument(
+        "--max-part-size",
+        type=int,
+        default=0,
+        help="Reject multipart file parts larger than N MiB (default: 0, unlimited)",
+    )
+    parser.add_argument(
+        "--upload-expiry",
+        type=float,
+        default=UPLOAD_SESSION_TTL / 3600,
+        help=f"Hours before an idle resumable upload is discarded (default: {UPLOAD_SESSION_TTL / 3600:g})",
+    )
+    parser.add_argument(
+        "--durability",
+        choices=DURABILITY_LEVELS,
+        default="per-file",
+        help="When uploads are fsynced: none, per-file before replace, or batched group commit (default: per-file)",
+    )
+    parser.add_argument(
+        "--benchmark-durability",
+        type=int,
+        metavar="N",
+        default=0,
+        help="Upload N small files under the root at each durability level, print throughput and exit",
+    )
+    parser.add_argument(
+        "--thumb-cache",
+        type=str,
+        default=None,
+        help=f"Directory for cached image thumbnails (default: {THUMBNAILS.directory})",
+    )
+    parser.add_argument(
+        "--thumb-cache-size",
+        type=int,
+        default=THUMBNAIL_CACHE_MAX_BYTES // (1024 * 1024),
+        help=f"Thumbnail cache limit in MiB, least recently used evicted first (default: {THUMBNAIL_CACHE_MAX_BYTES // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--no-thumbnails",
+        action="store_true",
+        help="Always send original images in listings and previews",
+    )
+    parser.add_argument(
+        "--access-log",
+        type=str,
+        metavar="FILE",
+        default=None,
+        help="Also append access records as NDJSON (time, IP, action, status, bytes, duration) to FILE",
+    )
+    parser.add_argument(
+        "--archive-max-entries",
+        type=int,
+        default=DEFAULT_ARCHIVE_MAX_ENTRIES,
+        help=f"Refuse folder archives with more than N files and folders, 0 for unlimited (default: {DEFAULT_ARCHIVE_MAX_ENTRIES})",
+    )
+    parser.add_argument(
+        "--archive-max-size",
+        type=int,
+        default=DEFAULT_ARCHIVE_MAX_BYTES // (1024 * 1024),
+        help=f"Refuse folder archives holding more than N MiB of files, 0 for unlimited (default: {DEFAULT_ARCHIVE_MAX_BYTES // (1024 * 1024)})",
+    )
+    parser.add_argument(
+        "--backend",
+        choices=("threads", "asyncio"),
+        default="threads",
+        help="Connection backend (default: threads)",
+    )
+    parser.add_argument(
+        "--backlog",
+        type=int,
+        default=DEFAULT_BACKLOG,
+        help=f"Accept backlog and max queued connections in worker-pool mode (default: {DEFAULT_BACKLOG})",
+    )
+    parser.add_argument(
+        "--keepalive-timeout",
+        type=float,
+        default=DEFAULT_KEEPALIVE_TIMEOUT,
+        help=f"Idle seconds before a keep-alive connection is closed (default: {DEFAULT_KEEPALIVE_TIMEOUT:g})",
+    )
+    parser.add_argument(
+        "--drain-timeout",
+        type=float,
+        default=DEFAULT_DRAIN_TIMEOUT,
+        help=f"Seconds to let in-flight requests finish on shutdown (default: {DEFAULT_DRAIN_TIMEOUT:g})",
+    )
     parser.add_argument(
         "--generate-service",
         action="store_true",
@@ -4317,9 +8025,31 @@ def main() -> int:
         )
         return 1
 
-    global DEBUG_MODE, BATCH_MODE
+    global DEBUG_MODE, BATCH_MODE, MAX_UPLOAD_PART_BYTES
+    global ARCHIVE_MAX_ENTRIES, ARCHIVE_MAX_BYTES
     DEBUG_MODE = args.debug
     BATCH_MODE = args.batch
+    if args.max_part_size > 0:
+        MAX_UPLOAD_PART_BYTES = args.max_part_size * 1024 * 1024
+    ARCHIVE_MAX_ENTRIES = args.archive_max_entries or None
+    ARCHIVE_MAX_BYTES = args.archive_max_size * 1024 * 1024 or None
+    RESUMABLE_UPLOADS.ttl = args.upload_expiry * 3600
+    UPLOAD_COORDINATOR.durability = args.durability
+    THUMBNAILS.enabled = not args.no_thumbnails
+    THUMBNAILS.max_bytes = args.thumb_cache_size * 1024 * 1024
+    if args.thumb_cache:
+        THUMBNAILS.directory = os.path.realpath(args.thumb_cache)
+    if args.access_log:
+        try:
+            ACCESS_LOG.open_ndjson(os.path.abspath(args.access_log))
+        except OSError as e:
+            print(
+                CLIStyle.color(
+                    f"Error: cannot open access log '{args.access_log}': {e}",
+                    CLIStyle.COLORS["ERROR"],
+                )
+            )
+            return 1
 
     if DEBUG_MODE:
         print(CLIStyle.color("Debug mode enabled", CLIStyle.COLORS["WARNING"]))
@@ -4332,6 +8062,9 @@ def main() -> int:
     if args.generate_service:
         return handle_generate_service(args.port)
 
+    if args.benchmark_durability > 0:
+        return run_durability_benchmark(root_dir, args.benchmark_durability)
+
     selected_port = ensure_available_port(args.port)
     if selected_port is None:
         return 1
@@ -4351,9 +8084,29 @@ def main() -> int:
         )
 
         global SERVER_INSTANCE
-        SERVER_INSTANCE = ThreadedTCPServer(
-            ("0.0.0.0", args.port), EnhancedHTTPRequestHandler, root_dir
-        )
+        if args.backend == "asyncio":
+            SERVER_INSTANCE = AsyncHTTPServer(
+                ("0.0.0.0", args.port),
+                root_dir,
+                workers=args.workers or DEFAULT_ASYNC_WORKERS,
+                backlog=args.backlog,
+                idle_timeout=args.keepalive_timeout,
+                drain_timeout=args.drain_timeout,
+            )
+        elif args.workers > 0:
+            SERVER_INSTANCE = PooledTCPServer(
+                ("0.0.0.0", args.port),
+                KeepAliveHTTPRequestHandler,
+                root_dir,
+                workers=args.workers,
+                backlog=args.backlog,
+                idle_timeout=args.keepalive_timeout,
+                drain_timeout=args.drain_timeout,
+            )
+        else:
+            SERVER_INSTANCE = ThreadedTCPServer(
+                ("0.0.0.0", args.port), EnhancedHTTPRequestHandler, root_dir
+            )
 
         server_thread = threading.Thread(
             target=run_server, args=(SERVER_INSTANCE,), daemon=True
@@ -4370,6 +8123,10 @@ def main() -> int:
         while SERVER_INSTANCE.running and not EXIT_EVENT.is_set():
             time.sleep(0.05)
 
+        if isinstance(SERVER_INSTANCE, (PooledTCPServer, AsyncHTTPServer)):
+            SERVER_INSTANCE.drain()
+            emergency_exit()
+
     except Exception as e:
         debug("Server error", error=str(e))
         print(CLIStyle.color(f"Error: {str(e)}", CLIStyle.COLORS["ERROR"]))
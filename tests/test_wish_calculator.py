@@ -0,0 +1,77 @@
+import importlib.util
+import itertools
+import os
+import sys
+
+import numpy as np
+import pytest
+
+SCRIPT = os.path.join(os.path.dirname(__file__), os.pardir, "wish-calculator.py")
+spec = importlib.util.spec_from_file_location("wish_calculator", SCRIPT)
+wish_calculator = importlib.util.module_from_spec(spec)
+sys.modules["wish_calculator"] = wish_calculator
+spec.loader.exec_module(wish_calculator)
+
+
+def capturing_radiance_dp_reference(item_num=1, up_pity=0, cr_count=1, cr_p=None):
+    """The original per-(i, j) double loop, kept as the reference."""
+    if cr_p is None:
+        cr_p = wish_calculator.CR_P
+    cr = np.asarray(cr_p, dtype=float)
+    max_5star = (item_num // 3 * 5) + item_num % 3 * 2 + int(cr_count == 0)
+    matrix = np.zeros((max_5star + 1, item_num + 1, 4), dtype=float)
+    matrix[up_pity, up_pity, cr_count] = 1
+    for i in range(1, max_5star + 1):
+        for j in range(1, item_num + 1):
+            if i >= 2:
+                matrix[i, j, 1:4] += matrix[i - 2, j - 1, 0:3] * (0.5 - cr[0:3] / 2)
+            matrix[i, j, 0:2] += matrix[i - 1, j - 1, 1:3] * (0.5 - cr[1:3] / 2)
+            matrix[i, j, 0] += matrix[i - 1, j - 1, 0] * (0.5 - cr[0] / 2)
+            matrix[i, j, 1] += matrix[i - 1, j - 1, 0:4] @ cr
+    return np.trim_zeros(np.sum(matrix[:, item_num, :], axis=1), "b")
+
+
+@pytest.mark.parametrize(
+    "item_num, up_pity, cr_count",
+    list(itertools.product(range(1, 8), range(2), range(4))),
+)
+def test_capturing_radiance_dp_matches_reference(item_num, up_pity, cr_count):
+    expected = capturing_radiance_dp_reference(item_num, up_pity, cr_count)
+    actual = wish_calculator.capturing_radiance_dp(item_num, up_pity, cr_count)
+    assert np.array_equal(actual, expected)
+
+
+def test_capturing_radiance_dp_matches_reference_custom_cr_p():
+    cr_p = [0.0, 0.1, 0.3, 1.0]
+    for item_num, up_pity, cr_count in itertools.product(
+        range(1, 8), range(2), range(4)
+    ):
+        expected = capturing_radiance_dp_reference(item_num, up_pity, cr_count, cr_p)
+        actual = wish_calculator.capturing_radiance_dp(
+            item_num, up_pity, cr_count, cr_p
+        )
+        assert np.array_equal(actual, expected)
+
+
+def test_multi_dist_returns_list_from_cache():
+    model = wish_calculator.EpitomizedPathModel(
+        wish_calculator.PITY_W5STAR,
+        wish_calculator.EP_PITY_P,
+        wish_calculator.EP_UP_PITY_P,
+    )
+    first = model(3, True)
+    second = model(3, True)
+    assert isinstance(first, list) and isinstance(second, list)
+    assert first is not second
+    assert all(a is b for a, b in zip(first, second))
+
+
+def test_totals_do_not_use_model_cache():
+    wish_calculator.MODEL_CACHE.clear()
+    wish_calculator.TOTAL_CACHE.clear()
+    wish_calculator.WishCalculator(
+        fates=300, target_characters=1, target_weapons=1
+    ).compute()
+    assert wish_calculator.TOTAL_CACHE.info()["size"] == 1
+    keys = list(wish_calculator.MODEL_CACHE._data)
+    assert all(key[0] != "WishCalculator" for key in keys)
@@ -7,10 +7,24 @@
 # ///
 # Genshin Impact wish calculator.
 # Gacha modeling ported from https://github.com/OneBST/GGanalysis
-# Single file, numpy-only (scipy convolution/FFT replaced by numpy.convolve).
+# Single file, numpy-only (scipy convolution/FFT replaced by numpy.convolve and
+# numpy.fft, selected by input length).
 
+import os
 import sys
+import json
+import shutil
+import hashlib
 import argparse
+import http.server
+import platform
+import time
+import timeit
+import functools
+import concurrent.futures
+import tempfile
+import threading
+from collections import OrderedDict
 from typing import Union
 
 import numpy as np
@@ -168,6 +182,122 @@ def cut_dist(
     return ans / np.sum(ans)
 
 
+# Convolution backend. "direct" is np.convolve (O(n*m)), "fft" is a zero-padded
+# real FFT (O(n log n)); "auto" picks FFT once the shorter input is long enough.
+CONV_METHODS = ("auto", "direct", "fft")
+FFT_CONV_THRESHOLD = 128
+# FFT round-off is relative to the peak value; anything below this is noise.
+FFT_CLAMP_EPS = 1e-14
+
+
+def select_conv_method(len_a: int, len_b: int, method: str = "auto") -> str:
+    """Resolve "auto" to "direct" or "fft" for inputs of the given lengths."""
+    if method not in CONV_METHODS:
+        raise ValueError(f"unknown convolution method: {method}")
+    if method != "auto":
+        return method
+    return "fft" if min(len_a, len_b) >= FFT_CONV_THRESHOLD else "direct"
+
+
+def fft_size(target_len: int) -> int:
+    """Smallest power of two >= target_len, used as the FFT grid size."""
+    return 1 << max(int(target_len) - 1, 0).bit_length()
+
+
+def clamp_fft_error(
+    values: np.ndarray, expected_sum: float, clamp_eps: float = FFT_CLAMP_EPS
+) -> np.ndarray:
+    """Zero FFT round-off (tiny or negative values) and renormalize to expected_sum."""
+    peak = float(np.max(np.abs(values))) if values.size else 0.0
+    values[values <= peak * clamp_eps] = 0.0
+    total = float(np.sum(values))
+    if total > 0 and expected_sum > 0:
+        values *= expected_sum / total
+    return values
+
+
+def convolve(a: np.ndarray, b: np.ndarray, method: str = "auto") -> np.ndarray:
+    """
+    Linear convolution of two 1D arrays with direct/FFT method selection.
+    ```python
+    convolve(np.array([0.5, 0.5]), np.array([0, 1]), method="fft")
+
+    return = np.ndarray
+    ```
+    """
+    a = np.asarray(a, dtype=float)
+    b = np.asarray(b, dtype=float)
+    if select_conv_method(len(a), len(b), method) == "direct":
+        return np.convolve(a, b)
+    out_len = len(a) + len(b) - 1
+    size = fft_size(out_len)
+    ans = np.fft.irfft(np.fft.rfft(a, size) * np.fft.rfft(b, size), size)[:out_len]
+    return clamp_fft_error(ans, float(np.sum(a)) * float(np.sum(b)))
+
+
+def prune_tail(dist: np.ndarray, tail_eps: float) -> tuple:
+    """
+    Cut the right tail of dist once the mass beyond the cut is <= tail_eps.
+    ```python
+    prune_tail(np.array([0.5, 0.5 - 1e-16, 1e-16]), 1e-15)
+
+    return = (np.ndarray, float)  # pruned array, discarded mass
+    ```
+    """
+    if tail_eps <= 0 or len(dist) <= 1:
+        return dist, 0.0
+    tail = np.cumsum(dist[::-1])
+    cut = min(int(np.searchsorted(tail, tail_eps, side="right")), len(dist) - 1)
+    if cut == 0:
+        return dist, 0.0
+    return dist[: len(dist) - cut], float(tail[cut - 1])
+
+
+def compound_dist(
+    overlay: np.ndarray, c_dist: np.ndarray, f_dist: np.ndarray, method: str = "auto"
+) -> np.ndarray:
+    """
+    Compound distribution sum_i overlay[i] * c * f^(i-1) (overlay[0] at 0).
+
+    The "fft" path evaluates the generating function
+    overlay[0] + C(z) * P(F(z)) on one FFT grid, where P holds overlay[1:] as
+    polynomial coefficients, instead of doing one convolution per overlay index.
+    ```python
+    compound_dist(np.array([0, 0.5, 0.5]), c, f)
+
+    return = np.ndarray
+    ```
+    """
+    overlay = np.asarray(overlay, dtype=float)
+    c_dist = np.asarray(c_dist, dtype=float)
+    f_dist = np.asarray(f_dist, dtype=float)
+    max_i = len(overlay) - 1
+    if max_i < 1:
+        return overlay.copy()
+    out_len = len(c_dist) + (max_i - 1) * (len(f_dist) - 1)
+    if select_conv_method(out_len, out_len, method) == "direct":
+        ans = np.zeros(max(out_len, 1), dtype=float)
+        ans[0] += overlay[0]
+        temp = np.ones(1, dtype=float)
+        for i in range(1, max_i + 1):
+            seg = np.convolve(c_dist, temp)
+            ans[: len(seg)] += overlay[i] * seg
+            temp = np.convolve(temp, f_dist)
+        return ans
+    size = fft_size(out_len)
+    f_hat = np.fft.rfft(f_dist, size)
+    # np.polyval wants the highest power first: overlay[max_i] is f^(max_i-1).
+    ans_hat = np.fft.rfft(c_dist, size) * np.polyval(overlay[:0:-1], f_hat)
+    ans = np.fft.irfft(ans_hat, size)[:out_len]
+    ans[0] += overlay[0]
+    f_sum = float(np.sum(f_dist))
+    powers = f_sum ** np.arange(max_i, dtype=float)
+    expected_sum = float(overlay[0]) + float(np.sum(c_dist)) * float(
+        np.dot(overlay[1:], powers)
+    )
+    return clamp_fft_error(ans, expected_sum)
+
+
 class FiniteDist:
     """
     Finite-length 1D discrete distribution.
@@ -175,7 +305,10 @@ class FiniteDist:
     Wraps a numpy array. ``*`` between two FiniteDist is convolution (sum of
     random variables); ``*`` with a scalar is element scaling; ``+`` adds two
     distributions aligned at position 0; ``** n`` is n-fold self convolution.
-    ``exp`` / ``var`` / ``p_sum`` / ``cdf`` are computed lazily on access.
+    ``convolve`` / ``power`` do the same with an explicit backend (see
+    ``convolve``). ``exp`` / ``var`` / ``p_sum`` / ``cdf`` are computed lazily.
+    ``dropped`` is the probability mass discarded by ``prune`` (0 by default)
+    and is carried through every operation as an upper bound.
     ```python
     FiniteDist([0.5, 0.5]) * FiniteDist([0, 1])
 
@@ -217,6 +350,8 @@ class FiniteDist:
             cdf = np.cumsum(self._dist)
             self.__dict__["cdf"] = cdf
             return cdf
+        if key == "dropped":
+            return 0.0
         raise AttributeError(key)
 
     def _calc_moments(self, p_error: float = 1e-6) -> None:
@@ -232,6 +367,12 @@ class FiniteDist:
         self.__dict__["exp"] = exp
         self.__dict__["var"] = float(np.dot((x - exp) ** 2, self._dist))
 
+    def freeze(self) -> "FiniteDist":
+        """Make the array and cached cdf read-only in place; returns self."""
+        self._dist.flags.writeable = False
+        self.cdf.flags.writeable = False
+        return self
+
     def __getitem__(self, sliced):
         return self._dist[sliced].copy()
 
@@ -250,36 +391,152 @@ class FiniteDist:
         target_len = max(len(self), len(other))
         return FiniteDist(
             pad_zero(self._dist, target_len) + pad_zero(other._dist, target_len)
-        )
+        )._with_dropped(self.dropped + other.dropped)
 
     def __mul__(self, other: Union["FiniteDist", float, int]) -> "FiniteDist":
         if isinstance(other, FiniteDist):
-            return FiniteDist(np.convolve(self._dist, other._dist))
-        return FiniteDist(self._dist * other)
+            return self.convolve(other)
+        return FiniteDist(self._dist * other)._with_dropped(self.dropped * other)
 
     def __rmul__(self, other: Union["FiniteDist", float, int]) -> "FiniteDist":
         return self * other
 
     def __truediv__(self, other: Union[float, int]) -> "FiniteDist":
-        return FiniteDist(self._dist / other)
+        return FiniteDist(self._dist / other)._with_dropped(self.dropped / other)
+
+    def _with_dropped(self, dropped: float) -> "FiniteDist":
+        if dropped:
+            self.dropped = dropped
+        return self
+
+    def prune(self, tail_eps: float) -> "FiniteDist":
+        """Drop the right tail holding <= tail_eps mass, keeping exp/var if set."""
+        arr, dropped = prune_tail(self._dist, tail_eps)
+        if not dropped:
+            return self
+        ans = FiniteDist(arr)._with_dropped(self.dropped + dropped)
+        for key in ("exp", "var"):
+            if key in self.__dict__:
+                ans.__dict__[key] = self.__dict__[key]
+        return ans
 
     def __pow__(self, pow_times: int) -> "FiniteDist":
+        return self.power(pow_times)
+
+    def convolve(self, other: "FiniteDist", method: str = "auto") -> "FiniteDist":
+        """Convolution with another FiniteDist; method is auto/direct/fft."""
+        return FiniteDist(convolve(self._dist, other._dist, method))._with_dropped(
+            self.dropped + other.dropped
+        )
+
+    def power(
+        self, pow_times: int, method: str = "auto", tail_eps: float = 0.0
+    ) -> "FiniteDist":
+        """
+        n-fold self convolution by repeated squaring; method is auto/direct/fft.
+        With tail_eps > 0 every intermediate product is pruned (see ``prune``).
+        """
         if not isinstance(pow_times, int) or pow_times < 0:
             raise ValueError("pow_times must be a non-negative integer")
         result = np.ones(1, dtype=float)
         base = self._dist.copy()
+        result_dropped, base_dropped = 0.0, self.dropped
         while pow_times > 0:
             if pow_times & 1:
-                result = np.convolve(result, base)
+                result, dropped = prune_tail(convolve(result, base, method), tail_eps)
+                result_dropped += base_dropped + dropped
             pow_times >>= 1
             if pow_times > 0:
-                base = np.convolve(base, base)
-        return FiniteDist(result)
+                base, dropped = prune_tail(convolve(base, base, method), tail_eps)
+                base_dropped = 2 * base_dropped + dropped
+        return FiniteDist(result)._with_dropped(result_dropped)
 
     def __str__(self) -> str:
         return f"finite 1D dist {self._dist}"
 
 
+class DistCache:
+    """
+    Bounded, thread-safe LRU cache of finished model distributions.
+
+    Shared by every model in the process (see ``MODEL_CACHE``). Values are
+    frozen before they are stored: a FiniteDist gets read-only arrays (see
+    ``FiniteDist.freeze``) and a list of them is stored as a tuple, so a caller
+    writing into a shared result raises instead of corrupting later hits.
+    Lists are handed back as fresh lists of the frozen distributions.
+    ```python
+    MODEL_CACHE.get_or_build(key, lambda: model._get_dist(...))
+
+    return = FiniteDist
+    ```
+    """
+
+    def __init__(self, maxsize: int = 512) -> None:
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._data: OrderedDict = OrderedDict()
+
+    def get_or_build(self, key: tuple, builder):
+        with self._lock:
+            if key in self._data:
+                self._data.move_to_end(key)
+                self.hits += 1
+                return self._thaw(self._data[key])
+            self.misses += 1
+        # Build outside the lock; concurrent misses on one key just race.
+        value = self._freeze(builder())
+        with self._lock:
+            if self.maxsize > 0:
+                self._data[key] = value
+                self._data.move_to_end(key)
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+        return self._thaw(value)
+
+    @staticmethod
+    def _freeze(value):
+        if isinstance(value, FiniteDist):
+            return value.freeze()
+        if isinstance(value, list):
+            return tuple(DistCache._freeze(v) for v in value)
+        return value
+
+    @staticmethod
+    def _thaw(value):
+        if isinstance(value, tuple):
+            return list(value)
+        return value
+
+    def clear(self) -> None:
+        """Drop all entries and reset the hit/miss counters."""
+        with self._lock:
+            self._data.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def info(self) -> dict:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+            }
+
+
+MODEL_CACHE = DistCache()
+# Combined character x weapon totals; kept apart so a large grid cannot
+# evict the per-model entries above.
+TOTAL_CACHE = DistCache(maxsize=128)
+
+
+def table_key(*tables) -> tuple:
+    """Hashable cache-key form of one or more pity/probability tables."""
+    return tuple(tuple(np.asarray(t, dtype=float).tolist()) for t in tables)
+
+
 class GachaLayer:
     """Base gacha layer; a callable returns (full_dist, conditional_dist)."""
 
@@ -298,8 +555,15 @@ class GachaLayer:
 class PityLayer(GachaLayer):
     """Pity layer; chains an inner per-item distribution into a compound one."""
 
-    def __init__(self, pity_info: Union[list, np.ndarray, FiniteDist]) -> None:
+    def __init__(
+        self,
+        pity_info: Union[list, np.ndarray, FiniteDist],
+        conv_method: str = "auto",
+        tail_eps: float = 0.0,
+    ) -> None:
         super().__init__()
+        self.conv_method = conv_method
+        self.tail_eps = tail_eps
         if isinstance(pity_info, FiniteDist):
             self.dist = pity_info
         else:
@@ -313,22 +577,19 @@ class PityLayer(GachaLayer):
             return FiniteDist(cut_dist(self.dist, item_pity))
         f_dist: FiniteDist = input_dist[0]
         c_dist: FiniteDist = input_dist[0] if full_mode else input_dist[1]
-        overlay_dist = FiniteDist(cut_dist(self.dist, item_pity))
-        output_dist = FiniteDist([0])
-        output_e = 0.0
-        output_d = 0.0
-        temp_dist = FiniteDist([1])
-        output_dist += float(overlay_dist[0]) * temp_dist
-        for i in range(1, len(overlay_dist)):
-            c_i = float(overlay_dist[i])
-            output_dist += c_i * (c_dist * temp_dist)
-            temp_dist = temp_dist * f_dist
-            output_e += c_i * (c_dist.exp + (i - 1) * f_dist.exp)
-            output_d += c_i * (
-                c_dist.var
-                + (i - 1) * f_dist.var
-                + (c_dist.exp + (i - 1) * f_dist.exp) ** 2
-            )
+        overlay = FiniteDist(cut_dist(self.dist, item_pity)).dist
+        output, dropped = prune_tail(
+            compound_dist(overlay, c_dist.dist, f_dist.dist, self.conv_method),
+            self.tail_eps,
+        )
+        # Moments of the compound: the i-th term is c + (i - 1) independent f.
+        steps = np.arange(len(overlay) - 1, dtype=float)
+        weights = overlay[1:]
+        dropped += float(np.dot(weights, c_dist.dropped + steps * f_dist.dropped))
+        output_dist = FiniteDist(output)._with_dropped(dropped)
+        item_e = c_dist.exp + steps * f_dist.exp
+        output_e = float(np.dot(weights, item_e))
+        output_d = float(np.dot(weights, c_dist.var + steps * f_dist.var + item_e**2))
         output_d -= output_e**2
         output_dist.exp = output_e
         output_dist.var = output_d
@@ -344,9 +605,10 @@ class GachaModel:
 class CommonGachaModel(GachaModel):
     """Layered gacha model where obtaining each item is an independent event."""
 
-    def __init__(self) -> None:
+    def __init__(self, tail_eps: float = 0.0) -> None:
         super().__init__()
         self.layers: list = []
+        self.tail_eps = tail_eps
 
     def __call__(
         self, item_num: int = 1, multi_dist: bool = False, *args, **kwds
@@ -365,14 +627,16 @@ class CommonGachaModel(GachaModel):
         input_dist = self._forward(parameter_list)
         ans_list = [FiniteDist([1]), input_dist[1]]
         for i in range(1, end_pos):
-            ans_list.append(ans_list[i] * input_dist[0])
+            ans_list.append((ans_list[i] * input_dist[0]).prune(self.tail_eps))
             ans_list[i + 1].exp = input_dist[1].exp + input_dist[0].exp * i
             ans_list[i + 1].var = input_dist[1].var + input_dist[0].var * i
         return ans_list
 
     def _get_dist(self, item_num: int, parameter_list: list) -> FiniteDist:
         ans_dist = self._forward(parameter_list)
-        ans: FiniteDist = ans_dist[1] * ans_dist[0] ** (item_num - 1)
+        ans: FiniteDist = (
+            ans_dist[1] * ans_dist[0].power(item_num - 1, tail_eps=self.tail_eps)
+        ).prune(self.tail_eps)
         ans.exp = ans_dist[1].exp + ans_dist[0].exp * (item_num - 1)
         ans.var = ans_dist[1].var + ans_dist[0].var * (item_num - 1)
         return ans
@@ -391,9 +655,9 @@ class CommonGachaModel(GachaModel):
 class PityModel(CommonGachaModel):
     """Single pity model."""
 
-    def __init__(self, pity_p) -> None:
-        super().__init__()
-        self.layers.append(PityLayer(pity_p))
+    def __init__(self, pity_p, tail_eps: float = 0.0) -> None:
+        super().__init__(tail_eps)
+        self.layers.append(PityLayer(pity_p, tail_eps=tail_eps))
 
     def __call__(
         self, item_num: int = 1, multi_dist: bool = False, item_pity: int = 0
@@ -407,10 +671,10 @@ class PityModel(CommonGachaModel):
 class DualPityModel(CommonGachaModel):
     """Two-stage pity model (item pity followed by an up pity)."""
 
-    def __init__(self, pity_p1, pity_p2) -> None:
-        super().__init__()
-        self.layers.append(PityLayer(pity_p1))
-        self.layers.append(PityLayer(pity_p2))
+    def __init__(self, pity_p1, pity_p2, tail_eps: float = 0.0) -> None:
+        super().__init__(tail_eps)
+        self.layers.append(PityLayer(pity_p1, tail_eps=tail_eps))
+        self.layers.append(PityLayer(pity_p2, tail_eps=tail_eps))
 
     def __call__(
         self,
@@ -449,26 +713,33 @@ def capturing_radiance_dp(
     max_5star = (item_num // 3 * 5) + item_num % 3 * 2 + int(cr_count == 0)
     matrix = np.zeros((max_5star + 1, item_num + 1, 4), dtype=float)
     matrix[up_pity, up_pity, cr_count] = 1
+    lose = 0.5 - cr / 2
+    # Row i only reads rows i - 1 and i - 2, so every j is updated at once. The
+    # guarantee term keeps one 1D dot per j: a matrix-vector product rounds
+    # differently and would change the result in the last bit.
     for i in range(1, max_5star + 1):
-        for j in range(1, item_num + 1):
-            if i >= 2:
-                matrix[i, j, 1:4] += matrix[i - 2, j - 1, 0:3] * (0.5 - cr[0:3] / 2)
-            matrix[i, j, 0:2] += matrix[i - 1, j - 1, 1:3] * (0.5 - cr[1:3] / 2)
-            matrix[i, j, 0] += matrix[i - 1, j - 1, 0] * (0.5 - cr[0] / 2)
-            matrix[i, j, 1] += matrix[i - 1, j - 1, 0:4] @ cr
+        if i >= 2:
+            matrix[i, 1:, 1:4] += matrix[i - 2, :-1, 0:3] * lose[0:3]
+        matrix[i, 1:, 0:2] += matrix[i - 1, :-1, 1:3] * lose[1:3]
+        matrix[i, 1:, 0] += matrix[i - 1, :-1, 0] * lose[0]
+        matrix[i, 1:, 1] += [row @ cr for row in matrix[i - 1, :-1, 0:4]]
     return np.trim_zeros(np.sum(matrix[:, item_num, :], axis=1), "b")
 
 
 class CapturingRadianceModel(GachaModel):
     """Genshin character UP model with the 5.0+ Capturing Radiance mechanism."""
 
-    def __init__(self, pity5_p=None, cr_p=None) -> None:
+    def __init__(self, pity5_p=None, cr_p=None, tail_eps: float = 0.0) -> None:
         if pity5_p is None:
             pity5_p = PITY_5STAR
         if cr_p is None:
             cr_p = CR_P
-        self.common_5star = PityModel(pity5_p)
+        self.common_5star = PityModel(pity5_p, tail_eps)
+        self.tail_eps = tail_eps
+        self.pity5_p = pity5_p
         self.cr_p = cr_p
+        self.tables_key = table_key(pity5_p, cr_p)
+        self.cache = MODEL_CACHE
 
     def _get_cr_5star_dist(
         self, item_num: int, up_pity: int = 0, cr_counter: int = 0
@@ -482,7 +753,10 @@ class CapturingRadianceModel(GachaModel):
     ) -> FiniteDist:
         f_dist = self.common_5star(1)
         c_dist = self.common_5star(1, item_pity=item_pity)
-        cr_layer = PityLayer(self._get_cr_5star_dist(item_num, up_pity, cr_counter))
+        cr_layer = PityLayer(
+            self._get_cr_5star_dist(item_num, up_pity, cr_counter),
+            tail_eps=self.tail_eps,
+        )
         return cr_layer._forward((f_dist, c_dist), 0, 0)
 
     def __call__(
@@ -498,20 +772,47 @@ class CapturingRadianceModel(GachaModel):
         if up_pity and cr_counter == 0:
             raise ValueError("up_pity conflicts with cr_counter == 0")
         if not multi_dist:
-            return self._get_dist(item_num, item_pity, up_pity, cr_counter)
+            return self._get_cached_dist(item_num, item_pity, up_pity, cr_counter)
         ans_list = [FiniteDist([1])]
         for i in range(1, item_num + 1):
-            ans_list.append(self._get_dist(i, item_pity, up_pity, cr_counter))
+            ans_list.append(self._get_cached_dist(i, item_pity, up_pity, cr_counter))
         return ans_list
 
+    def cache_key(
+        self, item_num: int, item_pity: int, up_pity: int, cr_counter: int
+    ) -> tuple:
+        """Key identifying one finished distribution of this model."""
+        return (
+            type(self).__name__,
+            self.tables_key,
+            self.tail_eps,
+            item_num,
+            item_pity,
+            up_pity,
+            cr_counter,
+        )
+
+    def _get_cached_dist(
+        self, item_num: int, item_pity: int, up_pity: int, cr_counter: int
+    ) -> FiniteDist:
+        if self.cache is None:
+            return self._get_dist(item_num, item_pity, up_pity, cr_counter)
+        return self.cache.get_or_build(
+            self.cache_key(item_num, item_pity, up_pity, cr_counter),
+            lambda: self._get_dist(item_num, item_pity, up_pity, cr_counter),
+        )
+
 
 class EpitomizedPathModel(GachaModel):
     """Genshin weapon UP model for the 5.0+ Epitomized Path (fate point max 1)."""
 
-    def __init__(self, pity_p1, pity_p2, pity_p3) -> None:
+    def __init__(self, pity_p1, pity_p2, pity_p3, tail_eps: float = 0.0) -> None:
         super().__init__()
-        self.base_model = DualPityModel(pity_p1, pity_p2)
-        self.up_pity_model = DualPityModel(pity_p1, pity_p3)
+        self.base_model = DualPityModel(pity_p1, pity_p2, tail_eps)
+        self.up_pity_model = DualPityModel(pity_p1, pity_p3, tail_eps)
+        self.tail_eps = tail_eps
+        self.tables_key = table_key(pity_p1, pity_p2, pity_p3)
+        self.cache = MODEL_CACHE
 
     def __call__(
         self,
@@ -520,6 +821,35 @@ class EpitomizedPathModel(GachaModel):
         item_pity: int = 0,
         ep_pity: int = 0,
         up_pity: int = 0,
+    ) -> Union[FiniteDist, list]:
+        if self.cache is None or item_num == 0:
+            return self._call(item_num, multi_dist, item_pity, ep_pity, up_pity)
+        return self.cache.get_or_build(
+            self.cache_key(item_num, item_pity, ep_pity, up_pity) + (multi_dist,),
+            lambda: self._call(item_num, multi_dist, item_pity, ep_pity, up_pity),
+        )
+
+    def cache_key(
+        self, item_num: int, item_pity: int, ep_pity: int, up_pity: int
+    ) -> tuple:
+        """Key identifying one finished distribution of this model."""
+        return (
+            type(self).__name__,
+            self.tables_key,
+            self.tail_eps,
+            item_num,
+            item_pity,
+            up_pity,
+            ep_pity,
+        )
+
+    def _call(
+        self,
+        item_num: int,
+        multi_dist: bool,
+        item_pity: int,
+        ep_pity: int,
+        up_pity: int,
     ) -> Union[FiniteDist, list]:
         if (not up_pity) or (ep_pity == 1):
             return self.base_model(item_num, multi_dist, item_pity, ep_pity)
@@ -535,14 +865,14 @@ class EpitomizedPathModel(GachaModel):
         if item_num > 1:
             stander_dist = self.base_model(1)
             for i in range(1, item_num + 1):
-                ans_list.append(ans_list[i] * stander_dist)
+                ans_list.append((ans_list[i] * stander_dist).prune(self.tail_eps))
         return ans_list
 
     def _get_dist(self, item_num: int, item_pity: int) -> FiniteDist:
         first_dist = self.up_pity_model(1, False, item_pity, 0)
         if item_num == 1:
             return first_dist
-        return first_dist * self.base_model(item_num - 1)
+        return (first_dist * self.base_model(item_num - 1)).prune(self.tail_eps)
 
 
 # Genshin Impact pity tables and shared constants.
@@ -559,11 +889,27 @@ PITY_W5STAR[77] = 1
 # Capturing Radiance trigger probability indexed by counter value (0..3).
 CR_P = [0, 0, 0, 1]
 
+# Epitomized Path: chance that a 5-star is the chart weapon (normal / guaranteed).
+EP_PITY_P = [0, 0.375, 1]
+EP_UP_PITY_P = [0, 0.5, 1]
+
+# Confidence levels reported as "fates needed" quantiles.
+QUANTILES = (0.10, 0.25, 0.50, 0.75, 0.90, 0.99)
+
 # Hard pity bounds (used only for input validation and display).
 MAX_CHAR_PITY = len(PITY_5STAR) - 2
 MAX_WEAPON_PITY = len(PITY_W5STAR) - 2
 
 
+@functools.lru_cache(maxsize=8)
+def default_models(tail_eps: float = 0.0) -> tuple:
+    """Character and weapon models for the Genshin tables, shared by calculators."""
+    return (
+        CapturingRadianceModel(PITY_5STAR, CR_P, tail_eps),
+        EpitomizedPathModel(PITY_W5STAR, EP_PITY_P, EP_UP_PITY_P, tail_eps),
+    )
+
+
 class WishCalculator:
     """
     Estimate the chance of reaching a wish goal with a given fate budget.
@@ -571,6 +917,11 @@ class WishCalculator:
     Combines the character UP distribution and the weapon UP distribution by
     convolution, then reads the cumulative probability at the available number
     of intertwined fates.
+
+    With tail_eps > 0 every intermediate distribution is truncated once its
+    remaining tail mass drops below tail_eps; the total discarded mass is
+    reported as ``error_bound`` (the exact success probability lies in
+    [success_prob, success_prob + error_bound]).
     """
 
     def __init__(
@@ -584,21 +935,45 @@ class WishCalculator:
         weapon_pity: int = 0,
         weapon_guaranteed: bool = False,
         fate_point: int = 0,
+        tables: Union["LookupTables", None] = None,
+        tail_eps: float = 0.0,
     ) -> None:
         self.fates = fates
         self.target_characters = target_characters
         self.char_pity = char_pity
-        self.char_guaranteed = bool(char_guaranteed)
+        self.char_guaranteed = char_guaranteed
         self.cr_counter = cr_counter
         self.target_weapons = target_weapons
         self.weapon_pity = weapon_pity
-        self.weapon_guaranteed = bool(weapon_guaranteed)
+        self.weapon_guaranteed = weapon_guaranteed
         self.fate_point = fate_point
+        self.tail_eps = float(tail_eps)
         self._validate()
-        self.character_model = CapturingRadianceModel(PITY_5STAR, CR_P)
-        self.weapon_model = EpitomizedPathModel(PITY_W5STAR, [0, 0.375, 1], [0, 0.5, 1])
+        self.character_model, self.weapon_model = default_models(self.tail_eps)
+        self.tables = tables
 
     def _validate(self) -> None:
+        for name, label in (
+            ("fates", "available fates"),
+            ("target_characters", "target characters"),
+            ("char_pity", "character pity"),
+            ("cr_counter", "capturing radiance counter"),
+            ("target_weapons", "target weapons"),
+            ("weapon_pity", "weapon pity"),
+            ("fate_point", "fate point"),
+        ):
+            # Fractional counts would slip through the range checks and index the
+            # CDF; bool is an int subclass, so JSON true/false must be excluded.
+            value = getattr(self, name)
+            if isinstance(value, bool) or not isinstance(value, (int, np.integer)):
+                raise TypeError(f"{label} must be an integer")
+        for name, label in (
+            ("char_guaranteed", "character guaranteed"),
+            ("weapon_guaranteed", "weapon guaranteed"),
+        ):
+            if not isinstance(getattr(self, name), (bool, np.bool_)):
+                raise TypeError(f"{label} must be a boolean")
+            setattr(self, name, bool(getattr(self, name)))
         checks = [
             (self.fates >= 0, "available fates must be >= 0"),
             (0 <= self.target_characters <= 7, "target characters must be in 0..7"),
@@ -613,6 +988,7 @@ class WishCalculator:
                 f"weapon pity must be in 0..{MAX_WEAPON_PITY}",
             ),
             (self.fate_point in (0, 1), "fate point must be 0 or 1"),
+            (0 <= self.tail_eps < 1, "tail epsilon must be in [0, 1)"),
         ]
         for ok, message in checks:
             if not ok:
@@ -623,6 +999,13 @@ class WishCalculator:
     def _character_dist(self) -> FiniteDist:
         if self.target_characters == 0:
             return FiniteDist([1])
+        if self.tables is not None:
+            return self.tables.character_dist(
+                self.target_characters,
+                self.char_pity,
+                int(self.char_guaranteed),
+                self.cr_counter,
+            )
         return self.character_model(
             self.target_characters,
             item_pity=self.char_pity,
@@ -633,6 +1016,13 @@ class WishCalculator:
     def _weapon_dist(self) -> FiniteDist:
         if self.target_weapons == 0:
             return FiniteDist([1])
+        if self.tables is not None:
+            return self.tables.weapon_dist(
+                self.target_weapons,
+                self.weapon_pity,
+                self.fate_point,
+                int(self.weapon_guaranteed),
+            )
         return self.weapon_model(
             self.target_weapons,
             item_pity=self.weapon_pity,
@@ -640,35 +1030,171 @@ class WishCalculator:
             up_pity=int(self.weapon_guaranteed),
         )
 
+    def _total_dist(self, char_dist: FiniteDist, weapon_dist: FiniteDist) -> FiniteDist:
+        """Character and weapon distributions combined, cached in ``TOTAL_CACHE``."""
+        char_key = weapon_key = None
+        if self.target_characters:
+            char_key = self.character_model.cache_key(
+                self.target_characters,
+                self.char_pity,
+                int(self.char_guaranteed),
+                self.cr_counter,
+            )
+        if self.target_weapons:
+            weapon_key = self.weapon_model.cache_key(
+                self.target_weapons,
+                self.weapon_pity,
+                self.fate_point,
+                int(self.weapon_guaranteed),
+            )
+        # Table rows and direct DP agree only up to float error, so the source
+        # is part of the key; the store directory name is its tables hash.
+        source = "direct" if self.tables is None else os.path.basename(self.tables.path)
+        return TOTAL_CACHE.get_or_build(
+            (type(self).__name__, source, self.tail_eps, char_key, weapon_key),
+            lambda: (char_dist * weapon_dist).prune(self.tail_eps),
+        )
+
     def compute(self) -> dict:
         """
         Run the model and return a result dictionary.
         ```python
         WishCalculator(fates=180, target_characters=1).compute()
 
-        return = dict  # keys: success_prob, expected, std, quantiles, distribution
+        return = dict  # keys: success_prob, error_bound, expected, std, quantiles,
+                       #       distribution
         ```
         """
         char_dist = self._character_dist()
         weapon_dist = self._weapon_dist()
-        total = char_dist * weapon_dist
+        total = self._total_dist(char_dist, weapon_dist)
         cdf = total.cdf
         if self.fates >= len(cdf):
             success_prob = float(cdf[-1])
         else:
             success_prob = float(cdf[self.fates])
         quantiles = {}
-        for q in (0.10, 0.25, 0.50, 0.75, 0.90, 0.99):
+        for q in QUANTILES:
             idx = int(np.searchsorted(cdf, q, side="left"))
             quantiles[q] = idx if idx < len(cdf) else None
         return {
             "success_prob": min(success_prob, 1.0),
+            "error_bound": float(total.dropped),
             "expected": _dist_exp(char_dist) + _dist_exp(weapon_dist),
             "std": (_dist_var(char_dist) + _dist_var(weapon_dist)) ** 0.5,
             "quantiles": quantiles,
             "distribution": total,
         }
 
+    @classmethod
+    def compute_grid(
+        cls,
+        fates,
+        target_characters=0,
+        char_pity=0,
+        char_guaranteed=False,
+        cr_counter=1,
+        target_weapons=0,
+        weapon_pity=0,
+        weapon_guaranteed=False,
+        fate_point=0,
+        tables: Union["LookupTables", None] = None,
+        tail_eps: float = 0.0,
+    ) -> dict:
+        """
+        Vectorized compute() over broadcast arrays of states and budgets.
+
+        Every argument is a scalar or an array; they are broadcast together
+        (use np.meshgrid / np.ix_ for a full grid). Counts must be integer and
+        the guaranteed flags boolean, as in compute(); an empty broadcast gives
+        empty results. Each distinct model state is built once, then all
+        budgets are answered with a single gather from a padded CDF matrix.
+        Quantiles out of range are -1.
+        ```python
+        WishCalculator.compute_grid(
+            fates=np.arange(0, 181)[None, :],
+            target_characters=1,
+            char_pity=np.arange(0, 90)[:, None],
+        )
+
+        return = dict  # keys: success_prob, error_bound, expected, std, quantiles
+        ```
+        """
+        fates, *state_args = np.broadcast_arrays(
+            _grid_array(fates, "available fates"),
+            _grid_array(target_characters, "target characters"),
+            _grid_array(char_pity, "character pity"),
+            _grid_array(char_guaranteed, "character guaranteed", flag=True),
+            _grid_array(cr_counter, "capturing radiance counter"),
+            _grid_array(target_weapons, "target weapons"),
+            _grid_array(weapon_pity, "weapon pity"),
+            _grid_array(weapon_guaranteed, "weapon guaranteed", flag=True),
+            _grid_array(fate_point, "fate point"),
+        )
+        shape = fates.shape
+        if fates.size == 0:
+            empty = np.zeros(shape, dtype=float)
+            return {
+                "success_prob": empty,
+                "error_bound": empty.copy(),
+                "expected": empty.copy(),
+                "std": empty.copy(),
+                "quantiles": {q: np.zeros(shape, dtype=int) for q in QUANTILES},
+            }
+        if np.any(fates < 0):
+            raise ValueError("available fates must be >= 0")
+        states = np.stack([np.ravel(a) for a in state_args], axis=1)
+        distinct, inverse = np.unique(states, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+
+        cdfs = []
+        moments = np.zeros((len(distinct), 3), dtype=float)
+        for k, row in enumerate(distinct):
+            state = [int(v) for v in row]
+            # The guaranteed flags (char_guaranteed, weapon_guaranteed) must be bool.
+            state[2], state[6] = bool(state[2]), bool(state[6])
+            calculator = cls(0, *state, tables=tables, tail_eps=tail_eps)
+            char_dist = calculator._character_dist()
+            weapon_dist = calculator._weapon_dist()
+            total = calculator._total_dist(char_dist, weapon_dist)
+            cdfs.append(total.cdf)
+            moments[k, 0] = _dist_exp(char_dist) + _dist_exp(weapon_dist)
+            moments[k, 1] = (_dist_var(char_dist) + _dist_var(weapon_dist)) ** 0.5
+            moments[k, 2] = total.dropped
+
+        # Pad every CDF with its final value so out-of-range budgets read cdf[-1].
+        max_len = max(len(cdf) for cdf in cdfs)
+        cdf_matrix = np.empty((len(cdfs), max_len), dtype=float)
+        quantile_matrix = np.empty((len(cdfs), len(QUANTILES)), dtype=int)
+        for k, cdf in enumerate(cdfs):
+            cdf_matrix[k, : len(cdf)] = cdf
+            cdf_matrix[k, len(cdf) :] = cdf[-1]
+            idx = np.searchsorted(cdf, QUANTILES, side="left")
+            quantile_matrix[k] = np.where(idx < len(cdf), idx, -1)
+
+        budget = np.minimum(np.ravel(fates), max_len - 1)
+        success_prob = np.minimum(cdf_matrix[inverse, budget], 1.0)
+        return {
+            "success_prob": success_prob.reshape(shape),
+            "error_bound": moments[inverse, 2].reshape(shape),
+            "expected": moments[inverse, 0].reshape(shape),
+            "std": moments[inverse, 1].reshape(shape),
+            "quantiles": {
+                q: quantile_matrix[inverse, i].reshape(shape)
+                for i, q in enumerate(QUANTILES)
+            },
+        }
+
+
+def _grid_array(value, label: str, flag: bool = False) -> np.ndarray:
+    """A compute_grid argument as an int array, rejecting what compute() rejects."""
+    arr = np.asarray(value)
+    if arr.size and not (
+        arr.dtype == bool if flag else np.issubdtype(arr.dtype, np.integer)
+    ):
+        raise TypeError(f"{label} must be {'a boolean' if flag else 'an integer'}")
+    return arr.astype(int)
+
 
 def _dist_exp(dist: FiniteDist) -> float:
     """Robust expectation: prefer the model-provided value, fall back to the array."""
@@ -690,6 +1216,708 @@ def _dist_var(dist: FiniteDist) -> float:
     return calc_variance(arr / total) if total > 0 else float("nan")
 
 
+# On-disk lookup tables: one padded CDF row per calculator state, stored as
+# .npy files under <table dir>/<hash of the pity tables>/ and memory-mapped.
+TABLE_FORMAT_VERSION = 1
+DEFAULT_TABLE_DIR = os.path.join(
+    os.path.expanduser("~"), ".cache", "wish-calculator", "tables"
+)
+MAX_TARGET_CHARACTERS = 7
+MAX_TARGET_WEAPONS = 5
+# Row layout: (target - 1, pity, guaranteed, cr_counter / fate_point).
+CHAR_TABLE_SHAPE = (MAX_TARGET_CHARACTERS, MAX_CHAR_PITY + 1, 2, 4)
+WEAPON_TABLE_SHAPE = (MAX_TARGET_WEAPONS, MAX_WEAPON_PITY + 1, 2, 2)
+
+
+def tables_hash() -> str:
+    """Hash of the pity tables and table format; changes force a rebuild."""
+    digest = hashlib.sha256(f"v{TABLE_FORMAT_VERSION}".encode())
+    for table in (PITY_5STAR, PITY_W5STAR, CR_P, EP_PITY_P, EP_UP_PITY_P):
+        digest.update(np.asarray(table, dtype=np.float64).tobytes())
+        digest.update(b"|")
+    return digest.hexdigest()[:16]
+
+
+def _write_table(path: str, shape: tuple, build_row) -> None:
+    """Build every state of one table and save cdf/len/moments .npy files."""
+    rows = []
+    for index in np.ndindex(*shape):
+        dist = build_row(*index)
+        rows.append((dist.cdf, _dist_exp(dist), _dist_var(dist)))
+    max_len = max(len(cdf) for cdf, _, _ in rows)
+    cdf_table = np.lib.format.open_memmap(
+        path + "_cdf.npy", mode="w+", dtype=np.float64, shape=(len(rows), max_len)
+    )
+    lengths = np.zeros(len(rows), dtype=np.int64)
+    moments = np.zeros((len(rows), 2), dtype=np.float64)
+    for k, (cdf, exp, var) in enumerate(rows):
+        cdf_table[k, : len(cdf)] = cdf
+        cdf_table[k, len(cdf) :] = cdf[-1]
+        lengths[k] = len(cdf)
+        moments[k] = (exp, var)
+    cdf_table.flush()
+    del cdf_table
+    np.save(path + "_len.npy", lengths)
+    np.save(path + "_moments.npy", moments)
+
+
+def build_tables(table_dir: Union[str, None] = None) -> str:
+    """
+    Precompute character/weapon CDFs for every state and store them on disk.
+
+    Builds into a temporary sibling directory and renames it into place. Only
+    the store for the current pity tables is touched; other entries in
+    ``table_dir`` are left alone.
+    ```python
+    build_tables()
+
+    return = str  # path of the table store
+    ```
+    """
+    table_dir = table_dir or DEFAULT_TABLE_DIR
+    key = tables_hash()
+    target = os.path.join(table_dir, key)
+    os.makedirs(table_dir, exist_ok=True)
+    work = tempfile.mkdtemp(prefix=f".{key}.", dir=table_dir)
+    try:
+        character_model = CapturingRadianceModel(PITY_5STAR, CR_P)
+        weapon_model = EpitomizedPathModel(PITY_W5STAR, EP_PITY_P, EP_UP_PITY_P)
+        character_model.cache = weapon_model.cache = None
+        _write_table(
+            os.path.join(work, "char"),
+            CHAR_TABLE_SHAPE,
+            lambda t, pity, g, cr: character_model(
+                t + 1, item_pity=pity, up_pity=g, cr_counter=max(cr, g)
+            ),
+        )
+        _write_table(
+            os.path.join(work, "weapon"),
+            WEAPON_TABLE_SHAPE,
+            lambda t, pity, g, fp: weapon_model(
+                t + 1, item_pity=pity, ep_pity=fp, up_pity=g
+            ),
+        )
+        with open(os.path.join(work, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"hash": key, "version": TABLE_FORMAT_VERSION}, f)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        os.replace(work, target)
+    finally:
+        if os.path.isdir(work):
+            shutil.rmtree(work, ignore_errors=True)
+    return target
+
+
+class LookupTables:
+    """
+    Memory-mapped marginal CDF tables written by ``build_tables``.
+
+    A query reads one row per side and rebuilds the distribution from it, so a
+    cold WishCalculator needs no DP at all.
+    ```python
+    tables = LookupTables.open(build=True)
+    WishCalculator(fates=180, target_characters=1, tables=tables).compute()
+
+    return = dict
+    ```
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._tables = {}
+        for side in ("char", "weapon"):
+            prefix = os.path.join(path, side)
+            self._tables[side] = (
+                np.load(prefix + "_cdf.npy", mmap_mode="r"),
+                np.load(prefix + "_len.npy", mmap_mode="r"),
+                np.load(prefix + "_moments.npy", mmap_mode="r"),
+            )
+
+    @classmethod
+    def open(
+        cls, table_dir: Union[str, None] = None, build: bool = False
+    ) -> Union["LookupTables", None]:
+        """
+        Open the store for the current pity tables.
+
+        A missing store, or one left over from other pity tables, is (re)built
+        only when build=True. Otherwise None is returned, with a warning when a
+        stale store is skipped, and queries fall back to direct computation.
+        """
+        table_dir = table_dir or DEFAULT_TABLE_DIR
+        path = os.path.join(table_dir, tables_hash())
+        if os.path.isfile(os.path.join(path, "meta.json")):
+            return cls(path)
+        if build:
+            return cls(build_tables(table_dir))
+        stale = os.path.isdir(table_dir) and any(
+            os.path.isfile(os.path.join(table_dir, name, "meta.json"))
+            for name in os.listdir(table_dir)
+        )
+        if stale:
+            print(
+                CLIStyle.color(
+                    f"Warning: lookup tables in {table_dir} were built for other "
+                    "pity tables; ignoring them (rebuild with --build-tables)",
+                    CLIStyle.COLORS["WARNING"],
+                ),
+                file=sys.stderr,
+            )
+        return None
+
+    def _read(self, side: str, shape: tuple, index: tuple) -> FiniteDist:
+        cdf_table, lengths, moments = self._tables[side]
+        row = int(np.ravel_multi_index(index, shape))
+        cdf = np.array(cdf_table[row, : int(lengths[row])])
+        dist = FiniteDist(np.diff(cdf, prepend=0.0))
+        dist.exp, dist.var = (float(v) for v in moments[row])
+        return dist
+
+    def character_dist(
+        self, item_num: int, item_pity: int, up_pity: int, cr_counter: int
+    ) -> FiniteDist:
+        if item_num == 0:
+            return FiniteDist([1])
+        index = (item_num - 1, item_pity, up_pity, cr_counter)
+        return self._read("char", CHAR_TABLE_SHAPE, index)
+
+    def weapon_dist(
+        self, item_num: int, item_pity: int, ep_pity: int, up_pity: int
+    ) -> FiniteDist:
+        if item_num == 0:
+            return FiniteDist([1])
+        index = (item_num - 1, item_pity, up_pity, ep_pity)
+        return self._read("weapon", WEAPON_TABLE_SHAPE, index)
+
+
+# Monte Carlo: accounts are simulated in independently seeded batches so the
+# result for a given seed does not depend on the number of worker processes.
+SIM_BATCH_SIZE = 1 << 18
+
+
+def _sample_gaps(rng: np.random.Generator, cdf: np.ndarray, size: int) -> np.ndarray:
+    """Draw pulls-until-5-star gaps by inverse CDF sampling."""
+    idx = np.searchsorted(cdf, rng.random(size), side="right")
+    return np.minimum(idx, len(cdf) - 1)
+
+
+class WishSimulator:
+    """
+    Vectorized Monte Carlo of the character and weapon banners.
+
+    Simulates every account in parallel as NumPy arrays, one 5-star at a time:
+    gaps between 5-stars follow the pity tables, the character side applies
+    the 50/50 + Capturing Radiance counter rules and the weapon side applies
+    the Epitomized Path fate point. ``run`` returns the empirical distribution
+    of total fates spent, comparable bin by bin with ``WishCalculator.compute``.
+    ```python
+    WishSimulator().run(1_000_000, target_characters=1, seed=0)
+
+    return = FiniteDist
+    ```
+    """
+
+    def __init__(
+        self,
+        pity5_p=None,
+        pity_w5_p=None,
+        cr_p=None,
+        ep_p=None,
+        ep_up_p=None,
+    ) -> None:
+        self.pity5_p = PITY_5STAR if pity5_p is None else pity5_p
+        self.pity_w5_p = PITY_W5STAR if pity_w5_p is None else pity_w5_p
+        self.cr_p = np.asarray(CR_P if cr_p is None else cr_p, dtype=float)
+        ep_p = EP_PITY_P if ep_p is None else ep_p
+        ep_up_p = EP_UP_PITY_P if ep_up_p is None else ep_up_p
+        # Row 0: normal hazard, row 1: hazard after losing to a non-UP weapon.
+        ep_len = max(len(ep_p), len(ep_up_p))
+        self.ep_hazard = np.ones((2, ep_len), dtype=float)
+        self.ep_hazard[0, : len(ep_p)] = ep_p
+        self.ep_hazard[1, : len(ep_up_p)] = ep_up_p
+
+    def _gap_cdfs(self, pity_p, item_pity: int) -> tuple:
+        dist = p2dist(pity_p)
+        return np.cumsum(cut_dist(dist.dist, item_pity)), dist.cdf
+
+    def _simulate_characters(
+        self,
+        rng: np.random.Generator,
+        size: int,
+        target: int,
+        item_pity: int,
+        guaranteed: bool,
+        cr_counter: int,
+    ) -> np.ndarray:
+        pulls = np.zeros(size, dtype=np.int64)
+        if target == 0:
+            return pulls
+        first_cdf, gap_cdf = self._gap_cdfs(self.pity5_p, item_pity)
+        remaining = np.full(size, target, dtype=np.int64)
+        sure = np.full(size, guaranteed, dtype=bool)
+        counter = np.full(size, cr_counter, dtype=np.int64)
+        first = True
+        while True:
+            active = np.flatnonzero(remaining)
+            if active.size == 0:
+                return pulls
+            pulls[active] += _sample_gaps(
+                rng, first_cdf if first else gap_cdf, active.size
+            )
+            first = False
+            s, c = sure[active], counter[active]
+            captured = ~s & (rng.random(active.size) < self.cr_p[c])
+            coin = rng.random(active.size) < 0.5
+            won = ~s & ~captured & coin
+            lost = ~s & ~captured & ~coin
+            counter[active] = np.where(
+                captured,
+                1,
+                np.where(
+                    won, np.maximum(c - 1, 0), np.where(lost, np.minimum(c + 1, 3), c)
+                ),
+            )
+            sure[active] = lost
+            remaining[active] -= ~lost
+
+    def _simulate_weapons(
+        self,
+        rng: np.random.Generator,
+        size: int,
+        target: int,
+        item_pity: int,
+        guaranteed: bool,
+        fate_point: int,
+    ) -> np.ndarray:
+        pulls = np.zeros(size, dtype=np.int64)
+        if target == 0:
+            return pulls
+        first_cdf, gap_cdf = self._gap_cdfs(self.pity_w5_p, item_pity)
+        remaining = np.full(size, target, dtype=np.int64)
+        # The guaranteed hazard only applies before the first chart weapon.
+        table = np.full(size, int(guaranteed and fate_point == 0), dtype=np.int64)
+        points = np.full(size, fate_point, dtype=np.int64)
+        last = self.ep_hazard.shape[1] - 1
+        first = True
+        while True:
+            active = np.flatnonzero(remaining)
+            if active.size == 0:
+                return pulls
+            pulls[active] += _sample_gaps(
+                rng, first_cdf if first else gap_cdf, active.size
+            )
+            first = False
+            step = np.minimum(points[active] + 1, last)
+            hit = rng.random(active.size) < self.ep_hazard[table[active], step]
+            points[active] = np.where(hit, 0, step)
+            table[active[hit]] = 0
+            remaining[active] -= hit
+
+    def _run_batch(self, seed: np.random.SeedSequence, size: int, params: dict):
+        rng = np.random.default_rng(seed)
+        total = self._simulate_characters(
+            rng,
+            size,
+            params["target_characters"],
+            params["char_pity"],
+            params["char_guaranteed"],
+            params["cr_counter"],
+        )
+        total += self._simulate_weapons(
+            rng,
+            size,
+            params["target_weapons"],
+            params["weapon_pity"],
+            params["weapon_guaranteed"],
+            params["fate_point"],
+        )
+        return np.bincount(total)
+
+    def run(
+        self,
+        n_accounts: int,
+        target_characters: int = 0,
+        char_pity: int = 0,
+        char_guaranteed: bool = False,
+        cr_counter: int = 1,
+        target_weapons: int = 0,
+        weapon_pity: int = 0,
+        weapon_guaranteed: bool = False,
+        fate_point: int = 0,
+        seed: Union[int, None] = None,
+        workers: int = 1,
+    ) -> FiniteDist:
+        """Simulate n_accounts and return the empirical distribution of fates spent."""
+        if n_accounts <= 0:
+            raise ValueError("number of simulated accounts must be > 0")
+        if char_guaranteed and cr_counter == 0:
+            cr_counter = 1
+        params = {
+            "target_characters": target_characters,
+            "char_pity": char_pity,
+            "char_guaranteed": bool(char_guaranteed),
+            "cr_counter": cr_counter,
+            "target_weapons": target_weapons,
+            "weapon_pity": weapon_pity,
+            "weapon_guaranteed": bool(weapon_guaranteed),
+            "fate_point": fate_point,
+        }
+        sizes = [SIM_BATCH_SIZE] * (n_accounts // SIM_BATCH_SIZE)
+        if n_accounts % SIM_BATCH_SIZE:
+            sizes.append(n_accounts % SIM_BATCH_SIZE)
+        seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+        jobs = [(sd, size, params) for sd, size in zip(seeds, sizes)]
+        if workers > 1 and len(jobs) > 1:
+            with concurrent.futures.ProcessPoolExecutor(workers) as pool:
+                counts = list(pool.map(self._run_batch, *zip(*jobs)))
+        else:
+            counts = [self._run_batch(*job) for job in jobs]
+        hist = np.zeros(max(len(c) for c in counts), dtype=np.int64)
+        for c in counts:
+            hist[: len(c)] += c
+        return FiniteDist(hist / n_accounts)
+
+
+def compare_dists(model: FiniteDist, empirical: FiniteDist) -> dict:
+    """Bin-by-bin gap between a model distribution and an empirical one."""
+    target_len = max(len(model), len(empirical))
+    a = pad_zero(np.asarray(model.dist, dtype=float), target_len)
+    b = pad_zero(np.asarray(empirical.dist, dtype=float), target_len)
+    return {
+        "max_pmf_diff": float(np.max(np.abs(a - b))),
+        "max_cdf_diff": float(np.max(np.abs(np.cumsum(a) - np.cumsum(b)))),
+    }
+
+
+# Benchmarks: a case regresses when its best time exceeds the baseline by
+# more than this factor.
+BENCH_SLOWDOWN_THRESHOLD = 1.25
+BENCH_REPEAT = 5
+# Each repeat runs a case at least this long (seconds) to smooth out noise.
+BENCH_MIN_TIME = 0.05
+
+
+def _bench_cases() -> dict:
+    """Name -> zero-argument callable for every timed hot path."""
+    f_dist = p2dist(PITY_5STAR)
+    long_dist = f_dist**11
+    character_model = CapturingRadianceModel(PITY_5STAR, CR_P)
+    weapon_model = EpitomizedPathModel(PITY_W5STAR, EP_PITY_P, EP_UP_PITY_P)
+    character_model.cache = weapon_model.cache = None
+    cr_layer = PityLayer(FiniteDist(capturing_radiance_dp(7, 0, 1)))
+    c_dist = PityModel(PITY_5STAR)(1, item_pity=30)
+
+    def cold_compute(**kwds):
+        MODEL_CACHE.clear()
+        TOTAL_CACHE.clear()
+        return WishCalculator(**kwds).compute()
+
+    cases = {
+        "p2dist": lambda: p2dist(PITY_5STAR),
+        "FiniteDist.__mul__[91x91]": lambda: f_dist * f_dist,
+        "FiniteDist.__mul__[991x991]": lambda: long_dist * long_dist,
+        "FiniteDist.__pow__[7]": lambda: f_dist**7,
+        "FiniteDist.__pow__[14]": lambda: f_dist**14,
+        "PityLayer._forward[cr 7]": lambda: cr_layer._forward((f_dist, c_dist), 0, 0),
+        "capturing_radiance_dp[1]": lambda: capturing_radiance_dp(1, 0, 1),
+        "capturing_radiance_dp[7]": lambda: capturing_radiance_dp(7, 0, 1),
+    }
+    for n in range(1, 8):
+        for g in (0, 1):
+            cases[f"CapturingRadianceModel.__call__[{n} g={g}]"] = (
+                lambda n=n, g=g: character_model(n, item_pity=20, up_pity=g)
+            )
+    for n in range(1, 6):
+        for g in (0, 1):
+            cases[f"EpitomizedPathModel.__call__[{n} g={g}]"] = (
+                lambda n=n, g=g: weapon_model(n, item_pity=20, up_pity=g)
+            )
+    for n_char, n_weapon in ((1, 0), (0, 1), (3, 1), (7, 5)):
+        for g in (False, True):
+            kwds = {
+                "fates": 500,
+                "target_characters": n_char,
+                "char_guaranteed": g,
+                "target_weapons": n_weapon,
+                "weapon_guaranteed": g,
+            }
+            name = f"WishCalculator.compute[{n_char}c{n_weapon}w g={int(g)}]"
+            cases[name] = lambda kwds=kwds: cold_compute(**kwds)
+    return cases
+
+
+def run_benchmarks(repeat: int = BENCH_REPEAT) -> dict:
+    """
+    Time every hot path and return a JSON-serializable report.
+    ```python
+    run_benchmarks()
+
+    return = dict  # {"meta": {...}, "results": {name: {"best", "median", "number"}}}
+    ```
+    """
+    results = {}
+    for name, func in _bench_cases().items():
+        timer = timeit.Timer(func)
+        number = 1
+        while timer.timeit(number) < BENCH_MIN_TIME:
+            number *= 2
+        times = [t / number for t in timer.repeat(repeat=repeat, number=number)]
+        results[name] = {
+            "best": min(times),
+            "median": float(np.median(times)),
+            "number": number,
+        }
+    MODEL_CACHE.clear()
+    TOTAL_CACHE.clear()
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+        },
+        "results": results,
+    }
+
+
+def compare_benchmarks(
+    current: dict, baseline: dict, threshold: float = BENCH_SLOWDOWN_THRESHOLD
+) -> list:
+    """Return (name, baseline_best, current_best, ratio, regressed) rows."""
+    rows = []
+    for name, entry in current["results"].items():
+        base = baseline.get("results", {}).get(name)
+        if base is None:
+            continue
+        ratio = entry["best"] / base["best"] if base["best"] > 0 else float("inf")
+        rows.append((name, base["best"], entry["best"], ratio, ratio > threshold))
+    return rows
+
+
+def render_benchmarks(report: dict, rows: Union[list, None] = None) -> str:
+    """Colorized benchmark table, with baseline ratios when rows are given."""
+    lines = [CLIStyle.color("=== Benchmarks ===", CLIStyle.COLORS["TITLE"])]
+    if rows is None:
+        for name, entry in report["results"].items():
+            lines.append(
+                CLIStyle.color(
+                    f"  {name:<44s} {entry['best'] * 1e3:10.3f} ms",
+                    CLIStyle.COLORS["CONTENT"],
+                )
+            )
+        return "\n".join(lines)
+    for name, base, best, ratio, regressed in rows:
+        color = CLIStyle.COLORS["ERROR"] if regressed else CLIStyle.COLORS["CONTENT"]
+        flag = "  SLOWER" if regressed else ""
+        lines.append(
+            CLIStyle.color(
+                f"  {name:<44s} {base * 1e3:10.3f} -> {best * 1e3:10.3f} ms "
+                f"(x{ratio:.2f}){flag}",
+                color,
+            )
+        )
+    return "\n".join(lines)
+
+
+# Service mode: one process keeps models, caches and lookup tables warm and
+# answers JSON batches over stdin/stdout (NDJSON) or a local HTTP socket.
+SERVICE_PARAMS = (
+    "fates",
+    "target_characters",
+    "char_pity",
+    "char_guaranteed",
+    "cr_counter",
+    "target_weapons",
+    "weapon_pity",
+    "weapon_guaranteed",
+    "fate_point",
+)
+SERVICE_MAX_BATCH = 10000
+SERVICE_MAX_BODY_BYTES = 4 * 1024 * 1024
+
+
+def serialize_result(result: dict, distribution: Union[str, int] = "none") -> dict:
+    """
+    JSON form of a compute() result.
+
+    distribution is "none" (omit), "full" (CDF at every fate count) or an
+    int N (CDF sampled at about N evenly spaced fate counts, always including
+    the last one).
+    """
+    ans = {
+        "success_prob": result["success_prob"],
+        "error_bound": result["error_bound"],
+        "expected": result["expected"],
+        "std": result["std"],
+        "quantiles": {f"{q:g}": v for q, v in result["quantiles"].items()},
+    }
+    if distribution == "none":
+        return ans
+    cdf = result["distribution"].cdf
+    if distribution == "full":
+        step = 1
+    elif isinstance(distribution, int) and distribution > 0:
+        step = max(1, -(-len(cdf) // distribution))
+    else:
+        raise ValueError('distribution must be "none", "full" or a positive int')
+    fates = np.arange(0, len(cdf), step)
+    if fates[-1] != len(cdf) - 1:
+        fates = np.append(fates, len(cdf) - 1)
+    ans["distribution"] = {"fates": fates.tolist(), "cdf": cdf[fates].tolist()}
+    return ans
+
+
+def handle_batch(
+    request, tables: Union[LookupTables, None] = None, tail_eps: float = 0.0
+) -> dict:
+    """
+    Answer one service request.
+
+    The request is a single parameter object, a list of them, or
+    {"id", "queries", "distribution", "tail_eps"}. Each query is answered
+    independently; a bad query yields {"error": ...} in its slot. tail_eps is
+    fixed by the server (--tail-eps): a request may only repeat it, so clients
+    cannot churn the default_models cache with arbitrary values.
+    ```python
+    handle_batch({"id": 1, "queries": [{"fates": 90, "target_characters": 1}]})
+
+    return = dict  # {"id": 1, "results": [{...}]}
+    ```
+    """
+    if isinstance(request, list):
+        request = {"queries": request}
+    elif not isinstance(request, dict):
+        raise ValueError("request must be a JSON object or array")
+    elif "queries" not in request:
+        request = {"queries": [request]}
+    queries = request["queries"]
+    if not isinstance(queries, list) or len(queries) > SERVICE_MAX_BATCH:
+        raise ValueError(f"queries must be a list of at most {SERVICE_MAX_BATCH}")
+    distribution = request.get("distribution", "none")
+    if "tail_eps" in request and request["tail_eps"] != tail_eps:
+        raise ValueError(f"tail_eps is fixed to {tail_eps} by the server (--tail-eps)")
+    results = []
+    for query in queries:
+        try:
+            if not isinstance(query, dict):
+                raise ValueError("query must be a JSON object")
+            unknown = set(query) - set(SERVICE_PARAMS)
+            if unknown:
+                raise ValueError(f"unknown parameters: {', '.join(sorted(unknown))}")
+            calculator = WishCalculator(**query, tables=tables, tail_eps=tail_eps)
+            results.append(serialize_result(calculator.compute(), distribution))
+        except (TypeError, ValueError) as e:
+            results.append({"error": str(e)})
+        except Exception as e:
+            # One query must never take the whole service down with it.
+            results.append({"error": f"{type(e).__name__}: {e}"})
+    return {"id": request.get("id"), "results": results}
+
+
+def serve_stdio(tables: Union[LookupTables, None] = None, tail_eps: float = 0.0) -> int:
+    """Answer NDJSON requests from stdin, one JSON response line per request."""
+    for line in sys.stdin:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            response = handle_batch(json.loads(line), tables, tail_eps)
+        except (TypeError, ValueError) as e:
+            response = {"id": None, "error": str(e)}
+        except Exception as e:
+            response = {"id": None, "error": f"{type(e).__name__}: {e}"}
+        sys.stdout.write(json.dumps(response) + "\n")
+        sys.stdout.flush()
+    return 0
+
+
+class WishServiceHandler(http.server.BaseHTTPRequestHandler):
+    """POST a service request as JSON; GET /health returns cache statistics."""
+
+    tables: Union[LookupTables, None] = None
+    tail_eps = 0.0
+
+    def _send_json(self, status: int, payload: dict) -> None:
+        body = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._send_json(404, {"error": "not found"})
+            return
+        self._send_json(
+            200,
+            {
+                "status": "ok",
+                "cache": MODEL_CACHE.info(),
+                "total_cache": TOTAL_CACHE.info(),
+            },
+        )
+
+    def do_POST(self) -> None:
+        try:
+            length = int(self.headers.get("Content-Length", "0"))
+        except ValueError:
+            length = -1
+        if length < 0:
+            # rfile.read(-1) would block until the client closes the connection.
+            self.close_connection = True
+            self._send_json(400, {"id": None, "error": "invalid Content-Length"})
+            return
+        if length > SERVICE_MAX_BODY_BYTES:
+            self.close_connection = True
+            self._send_json(
+                413,
+                {"id": None, "error": f"body exceeds {SERVICE_MAX_BODY_BYTES} bytes"},
+            )
+            return
+        try:
+            response = handle_batch(
+                json.loads(self.rfile.read(length)), self.tables, self.tail_eps
+            )
+        except (TypeError, ValueError) as e:
+            self._send_json(400, {"id": None, "error": str(e)})
+            return
+        except Exception as e:
+            self._send_json(500, {"id": None, "error": f"{type(e).__name__}: {e}"})
+            return
+        self._send_json(200, response)
+
+    def log_message(self, format: str, *args) -> None:
+        if DEBUG_MODE:
+            super().log_message(format, *args)
+
+
+def serve_http(
+    host: str,
+    port: int,
+    tables: Union[LookupTables, None] = None,
+    tail_eps: float = 0.0,
+) -> int:
+    """Serve WishServiceHandler until interrupted."""
+    handler = type(
+        "BoundWishServiceHandler",
+        (WishServiceHandler,),
+        {"tables": tables, "tail_eps": tail_eps},
+    )
+    server = http.server.ThreadingHTTPServer((host, port), handler)
+    print(
+        CLIStyle.color(f"Serving on http://{host}:{port}", CLIStyle.COLORS["CONTENT"]),
+        file=sys.stderr,
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
 def render_report(config: dict, result: dict) -> str:
     """Build a human-readable, colorized report of the calculation."""
     lines = []
@@ -746,6 +1974,13 @@ def render_report(config: dict, result: dict) -> str:
     lines.append(
         CLIStyle.color(f"  With {config['fates']} fates: {prob * 100:.2f}%", prob_color)
     )
+    if result.get("error_bound"):
+        lines.append(
+            CLIStyle.color(
+                f"  Truncation error bound: +{result['error_bound']:.2e}",
+                CLIStyle.COLORS["CONTENT"],
+            )
+        )
 
     lines.append(
         CLIStyle.color(
@@ -799,6 +2034,10 @@ def build_parser() -> ColoredArgumentParser:
         "所有可选参数默认对应全新卡池：垫抽 0、无大保底、命定值 0、明光计数器 1。",
         "最终输出：用 -f 缘达成目标的概率、期望所需抽数、各置信度所需抽数。",
         "--demo：忽略其它所有参数，运行内置默认示例。",
+        "--simulate N：用 N 个模拟账号验证模型（--seed 固定随机数，--workers 多进程）。",
+        "--bench FILE / --bench-compare BASELINE：记录热点耗时到 JSON，或与基线对比并标记变慢项。",
+        "--serve / --serve-http PORT：常驻进程，保持模型与缓存常热，按 JSON 批量请求返回结果。",
+        "--build-tables / --tables：预计算并使用查找表，冷启动查询只需查表加一次卷积；卡池概率表变化后自动重建。",
     ]
     parser = ColoredArgumentParser(
         description="原神抽卡计算器，估算在给定纠缠之缘预算下达成抽卡目标的概率 (based on `https://github.com/OneBST/GGanalysis.git`）",
@@ -842,6 +2081,60 @@ def build_parser() -> ColoredArgumentParser:
     parser.add_argument(
         "--fate-point", type=int, default=0, help="定轨命定值（0 或 1）"
     )
+    parser.add_argument(
+        "--tables",
+        action="store_true",
+        help="使用预计算查找表（不存在时自动构建）",
+    )
+    parser.add_argument(
+        "--build-tables", action="store_true", help="预计算所有状态的查找表后退出"
+    )
+    parser.add_argument(
+        "--table-dir",
+        default=None,
+        help="查找表存放目录（指定后使用已有查找表；默认取 WISH_CALC_TABLE_DIR 或内置目录）",
+    )
+    parser.add_argument(
+        "--tail-eps",
+        type=float,
+        default=0.0,
+        help="精度模式：截断尾部概率低于该值的部分并报告误差上界（默认 0 关闭）",
+    )
+    parser.add_argument(
+        "--simulate",
+        type=int,
+        default=0,
+        metavar="N",
+        help="额外用 N 个账号做蒙特卡洛模拟并与模型对比",
+    )
+    parser.add_argument("--seed", type=int, default=None, help="蒙特卡洛随机种子")
+    parser.add_argument("--workers", type=int, default=1, help="蒙特卡洛使用的进程数")
+    parser.add_argument(
+        "--serve",
+        action="store_true",
+        help="常驻服务模式：从 stdin 逐行读取 JSON 请求并逐行输出结果",
+    )
+    parser.add_argument(
+        "--serve-http",
+        type=int,
+        metavar="PORT",
+        help="常驻服务模式：在本地 HTTP 端口上接收 POST JSON 请求",
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="HTTP 服务监听地址")
+    parser.add_argument(
+        "--bench", metavar="FILE", help="运行性能基准并把结果写入 JSON 文件"
+    )
+    parser.add_argument(
+        "--bench-compare",
+        metavar="BASELINE",
+        help="运行性能基准并与基线 JSON 对比，变慢时返回非零",
+    )
+    parser.add_argument(
+        "--bench-threshold",
+        type=float,
+        default=BENCH_SLOWDOWN_THRESHOLD,
+        help="判定变慢的耗时倍数",
+    )
     parser.add_argument("--demo", action="store_true", help="运行内置的默认示例")
     parser.add_argument("--log", action="store_true", help="开启调试模式")
     return parser
@@ -854,6 +2147,35 @@ def main() -> int:
     args = parser.parse_args()
     DEBUG_MODE = args.log
 
+    if args.bench or args.bench_compare:
+        report = run_benchmarks()
+        if args.bench:
+            with open(args.bench, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        if not args.bench_compare:
+            print(render_benchmarks(report))
+            return 0
+        with open(args.bench_compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        rows = compare_benchmarks(report, baseline, args.bench_threshold)
+        print(render_benchmarks(report, rows))
+        return 1 if any(row[4] for row in rows) else 0
+
+    # Lookup tables are opt-in: without --tables/--table-dir queries never touch the store.
+    table_dir = args.table_dir or os.environ.get("WISH_CALC_TABLE_DIR")
+    use_tables = args.tables or args.table_dir is not None
+
+    if args.build_tables:
+        path = build_tables(table_dir)
+        print(CLIStyle.color(f"Lookup tables written to {path}"))
+        return 0
+
+    if args.serve or args.serve_http:
+        tables = LookupTables.open(table_dir, build=args.tables) if use_tables else None
+        if args.serve_http:
+            return serve_http(args.host, args.serve_http, tables, args.tail_eps)
+        return serve_stdio(tables, args.tail_eps)
+
     if args.demo:
         config = dict(DEFAULT_DEMO_CONFIG)
         print(
@@ -876,7 +2198,8 @@ def main() -> int:
         }
 
     try:
-        calculator = WishCalculator(**config)
+        tables = LookupTables.open(table_dir, build=args.tables) if use_tables else None
+        calculator = WishCalculator(**config, tables=tables, tail_eps=args.tail_eps)
         result = calculator.compute()
     except ValueError as e:
         print(CLIStyle.color(f"Error: {str(e)}", CLIStyle.COLORS["ERROR"]))
@@ -890,6 +2213,22 @@ def main() -> int:
         return 1
 
     print(render_report(config, result))
+    if args.simulate > 0:
+        params = {k: v for k, v in config.items() if k != "fates"}
+        empirical = WishSimulator().run(
+            args.simulate, seed=args.seed, workers=args.workers, **params
+        )
+        gap = compare_dists(result["distribution"], empirical)
+        cdf = empirical.cdf
+        sim_prob = float(cdf[min(config["fates"], len(cdf) - 1)])
+        print(CLIStyle.color("\nMonte Carlo check:", CLIStyle.COLORS["SUB_TITLE"]))
+        print(
+            CLIStyle.color(
+                f"  {args.simulate} accounts: {sim_prob * 100:.2f}% "
+                f"(max CDF gap vs model {gap['max_cdf_diff']:.2e})",
+                CLIStyle.COLORS["CONTENT"],
+            )
+        )
     return 0
 
 